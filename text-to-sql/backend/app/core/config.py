@@ -107,6 +107,7 @@ class Settings:
     db_timeout_sec_accuracy: int
     api_request_timeout_sec: int
     db_precount_enabled: bool
+    db_fetch_array_size: int
     sql_auto_repair_enabled: bool
     sql_auto_repair_max_attempts: int
     sql_zero_result_repair_enabled: bool
@@ -120,6 +121,8 @@ class Settings:
     oracle_pool_max: int
     oracle_pool_inc: int
     oracle_pool_timeout_sec: int
+    oracle_stmt_cache_size: int
+    oracle_pool_warmup: bool
     oracle_healthcheck_timeout_sec: int
     metadata_owner_fallback_enabled: bool
 
@@ -202,6 +205,7 @@ def load_settings() -> Settings:
         db_timeout_sec_accuracy=_int(os.getenv("DB_TIMEOUT_SEC_ACCURACY"), 180),
         api_request_timeout_sec=_int(os.getenv("API_REQUEST_TIMEOUT_SEC"), 190),
         db_precount_enabled=_bool(os.getenv("DB_PRECOUNT_ENABLED"), False),
+        db_fetch_array_size=_int(os.getenv("DB_FETCH_ARRAY_SIZE"), 1000),
         sql_auto_repair_enabled=_bool(os.getenv("SQL_AUTO_REPAIR_ENABLED"), True),
         sql_auto_repair_max_attempts=_int(os.getenv("SQL_AUTO_REPAIR_MAX_ATTEMPTS"), 1),
         sql_zero_result_repair_enabled=_bool(os.getenv("SQL_ZERO_RESULT_REPAIR_ENABLED"), False),
@@ -214,6 +218,8 @@ def load_settings() -> Settings:
         oracle_pool_max=_int(os.getenv("ORACLE_POOL_MAX"), 4),
         oracle_pool_inc=_int(os.getenv("ORACLE_POOL_INC"), 1),
         oracle_pool_timeout_sec=_int(os.getenv("ORACLE_POOL_TIMEOUT_SEC"), 10),
+        oracle_stmt_cache_size=_int(os.getenv("ORACLE_STMT_CACHE_SIZE"), 50),
+        oracle_pool_warmup=_bool(os.getenv("ORACLE_POOL_WARMUP"), True),
         oracle_healthcheck_timeout_sec=_int(os.getenv("ORACLE_HEALTHCHECK_TIMEOUT_SEC"), 8),
         metadata_owner_fallback_enabled=_bool(os.getenv("METADATA_OWNER_FALLBACK_ENABLED"), False),
         rag_persist_dir=_str(os.getenv("RAG_PERSIST_DIR"), "var/rag"),
@@ -5,6 +5,7 @@ from fastapi.responses import JSONResponse
 import os
 
 from app.core.config import get_settings
+from app.services.oracle.connection import warmup_pool
 from app.api.routes import (
     admin_budget,
     admin_metadata,
@@ -54,6 +55,13 @@ if origins:
     )
 
 
+@app.on_event("startup")
+async def warmup_oracle_pool() -> None:
+    if get_settings().oracle_pool_warmup:
+        # Fire and forget: startup should not wait on (or fail because of) the database.
+        asyncio.get_running_loop().run_in_executor(None, warmup_pool)
+
+
 @app.get("/health")
 async def health() -> dict[str, str]:
     return {"status": "ok"}
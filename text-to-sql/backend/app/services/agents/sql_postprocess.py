@@ -1,10 +1,14 @@
 from __future__ import annotations
 
-from typing import Any, Iterable
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Iterable
 import json
 import re
+import time
 
 from app.core.config import get_settings
+from app.core.paths import project_path
 from app.services.runtime.column_value_store import load_column_value_rows
 from app.services.runtime.diagnosis_map_store import match_diagnosis_mappings
 from app.services.runtime.label_intent_store import load_label_intent_profiles, match_label_intent_profiles
@@ -19,96 +23,134 @@ _DISTINCT_RE = re.compile(
     r"^List distinct values of ([A-Za-z0-9_]+) in ([A-Za-z0-9_]+) \(sample\)$",
     re.IGNORECASE,
 )
+_COUNT_SAMPLE_SQL = "SELECT COUNT(*) AS cnt FROM {table} WHERE ROWNUM <= 1000"
+_DISTINCT_SAMPLE_SQL = "SELECT DISTINCT {col} FROM {table} WHERE {col} IS NOT NULL AND ROWNUM <= 50"
+_SAMPLE_ROWS_SQL = "SELECT {cols} FROM {table} WHERE {first} IS NOT NULL AND ROWNUM <= {limit}"
 _SAMPLE_KO_TABLE_PAREN_RE = re.compile(r"\(([A-Za-z0-9_]+)\)")
 _SAMPLE_KO_LIMIT_RE = re.compile(r"(?:샘플\s*([0-9][0-9,]*)\s*(?:건|개|명|행|줄)|([0-9][0-9,]*)\s*(?:건|개|명|행|줄)\s*샘플)")
-_IDENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_$#]*$")
-_LIMIT_RE = re.compile(r"\blimit\s+(\d+)\s*;?\s*$", re.IGNORECASE)
-_FETCH_RE = re.compile(r"\bfetch\s+first\s+(\d+)\s+rows\s+only\s*;?\s*$", re.IGNORECASE)
-_TOP_RE = re.compile(r"^\s*select\s+top\s+(\d+)\s+", re.IGNORECASE)
-_WHERE_TRUE_RE = re.compile(r"\bwhere\s+true\b", re.IGNORECASE)
-_AND_TRUE_RE = re.compile(r"\band\s+true\b", re.IGNORECASE)
-_INTERVAL_YEAR_RE = re.compile(r"interval\s+'(\d+)\s*year[s]?'", re.IGNORECASE)
-_INTERVAL_MONTH_RE = re.compile(r"interval\s+'(\d+)\s*month[s]?'", re.IGNORECASE)
-_INTERVAL_DAY_RE = re.compile(r"interval\s+'(\d+)\s*day[s]?'", re.IGNORECASE)
-_TO_DATE_RE = re.compile(r"TO_DATE\s*\(\s*([A-Za-z0-9_\\.]+)\s*,\s*'[^']+'\s*\)", re.IGNORECASE)
-_HAVING_WHERE_RE = re.compile(r"\bHAVING\s+WHERE\b", re.IGNORECASE)
-_HAVING_TRUE_RE = re.compile(r"\bHAVING\s+1\s*=\s*1\b", re.IGNORECASE)
-_EXTRACT_DAY_RE = re.compile(r"EXTRACT\s*\(\s*DAY\s+FROM\s+([^)]+)\)", re.IGNORECASE)
+_IDENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_$#]*$", re.ASCII)
+_ANY_IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_$#\\.]*", re.ASCII)
+_LIMIT_RE = re.compile(r"\blimit\s+(\d+)\s*;?\s*$", re.IGNORECASE | re.ASCII)
+_FETCH_RE = re.compile(r"\bfetch\s+first\s+(\d+)\s+rows\s+only\s*;?\s*$", re.IGNORECASE | re.ASCII)
+_TOP_RE = re.compile(r"^\s*select\s+top\s+(\d+)\s+", re.IGNORECASE | re.ASCII)
+_WHERE_TRUE_RE = re.compile(r"\bwhere\s+true\b", re.IGNORECASE | re.ASCII)
+_AND_TRUE_RE = re.compile(r"\band\s+true\b", re.IGNORECASE | re.ASCII)
+_INTERVAL_YEAR_RE = re.compile(r"interval\s+'(\d+)\s*year[s]?'", re.IGNORECASE | re.ASCII)
+_INTERVAL_MONTH_RE = re.compile(r"interval\s+'(\d+)\s*month[s]?'", re.IGNORECASE | re.ASCII)
+_INTERVAL_DAY_RE = re.compile(r"interval\s+'(\d+)\s*day[s]?'", re.IGNORECASE | re.ASCII)
+_TO_DATE_RE = re.compile(r"TO_DATE\s*\(\s*([A-Za-z0-9_\\.]+)\s*,\s*'[^']+'\s*\)", re.IGNORECASE | re.ASCII)
+_HAVING_WHERE_RE = re.compile(r"\bHAVING\s+WHERE\b", re.IGNORECASE | re.ASCII)
+_HAVING_TRUE_RE = re.compile(r"\bHAVING\s+1\s*=\s*1\b", re.IGNORECASE | re.ASCII)
+_EXTRACT_DAY_RE = re.compile(r"EXTRACT\s*\(\s*DAY\s+FROM\s+([^)]+)\)", re.IGNORECASE | re.ASCII)
 _COUNT_ALIAS_RE = re.compile(
     r"(COUNT\s*\(\s*(?:DISTINCT\s+)?(?:\*|[A-Za-z0-9_\.]+)\s*\)\s+(?:AS\s+)?)"
     r"([A-Za-z_][A-Za-z0-9_$#]*)(?=\s*(?:,|FROM\b|WHERE\b|GROUP\b|ORDER\b|HAVING\b|$))",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
-_HOSPITAL_EXPIRE_RE = re.compile(r"\bHOSPITAL_EXPIRE_FLAG\s+IS\s+NOT\s+NULL\b", re.IGNORECASE)
+_HOSPITAL_EXPIRE_RE = re.compile(r"\bHOSPITAL_EXPIRE_FLAG\s+IS\s+NOT\s+NULL\b", re.IGNORECASE | re.ASCII)
 _AGE_FROM_ANCHOR_RE = re.compile(
     r"EXTRACT\s*\(\s*YEAR\s+FROM\s+(?:CURRENT_DATE|SYSDATE)\s*\)\s*-\s*([A-Za-z0-9_\\.]*ANCHOR_YEAR)",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 _AGE_FROM_BIRTHDATE_RE = re.compile(
     r"EXTRACT\s*\(\s*YEAR\s+FROM\s+(?:CURRENT_DATE|SYSDATE)\s*\)\s*-\s*EXTRACT\s*\(\s*YEAR\s+FROM\s+([A-Za-z0-9_\\.]*"
     r"(?:BIRTHDATE|DOB))\s*\)",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 _ANCHOR_MINUS_BIRTH_EXTRACT_RE = re.compile(
     r"(?P<anchor>[A-Za-z0-9_\\.]*ANCHOR_YEAR)\s*-\s*EXTRACT\s*\(\s*YEAR\s+FROM\s+"
     r"(?P<birth>[A-Za-z0-9_\\.]*(?:BIRTHDATE|DOB))\s*\)",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
-_BIRTH_YEAR_DIFF_RE = re.compile(r"([A-Za-z0-9_\\.]*ANCHOR_YEAR)\s*-\s*([A-Za-z0-9_\\.]*BIRTH_YEAR)", re.IGNORECASE)
-_BIRTH_YEAR_RE = re.compile(r"\bBIRTH_YEAR\b", re.IGNORECASE)
-_ORDER_BY_BAD_COUNT_RE = re.compile(
+_BIRTH_YEAR_DIFF_RE = re.compile(
+    r"([A-Za-z0-9_\\.]*ANCHOR_YEAR)\s*-\s*([A-Za-z0-9_\\.]*BIRTH_YEAR)",
+    re.IGNORECASE | re.ASCII,
+)
+_BIRTH_YEAR_RE = re.compile(r"\bBIRTH_YEAR\b", re.IGNORECASE | re.ASCII)
+_ORDER_BY_BAD_COUNT_PATTERN = (
     r"\border\s+by\s+(?:count\(\*\)\s+)?"
-    r"(?:label_count|test_count|organism_count|transition_count|event_count|admission_count|patient_count|transfer_count|count)\b",
-    re.IGNORECASE,
+    r"(?:label_count|test_count|organism_count|transition_count|event_count|admission_count|patient_count|transfer_count|count)\b"
+)
+_ORDER_BY_CNT_STAR_TAIL = r"\s*\(\s*\*\s*\)\s+CNT\b"
+# Context-free literal fix-ups, applied in one scan. "ORDER BY COUNT(*) CNT" first
+# loses COUNT to the bad-alias rewrite and then its "(*) CNT" tail, hence the
+# combined alternative reporting both rules.
+_MASTER_FIXUPS: tuple[tuple[str, str, str, tuple[str, ...]], ...] = (
+    (
+        "bad_alias_star",
+        _ORDER_BY_BAD_COUNT_PATTERN + _ORDER_BY_CNT_STAR_TAIL,
+        "ORDER BY CNT",
+        ("order_by_bad_alias_to_cnt", "order_by_cnt_star"),
+    ),
+    ("bad_alias", _ORDER_BY_BAD_COUNT_PATTERN, "ORDER BY CNT", ("order_by_bad_alias_to_cnt",)),
+    ("cnt_star", r"\bORDER\s+BY\s+CNT" + _ORDER_BY_CNT_STAR_TAIL, "ORDER BY CNT", ("order_by_cnt_star",)),
+    ("for_update", r"\bFOR\s+UPDATE\b(?:\s+SKIP\s+LOCKED)?", "", ("strip_for_update",)),
+)
+_MASTER_FIXUPS_RE = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, pattern, _, _ in _MASTER_FIXUPS),
+    re.IGNORECASE | re.ASCII,
 )
-_FOR_UPDATE_RE = re.compile(r"\bFOR\s+UPDATE\b(?:\s+SKIP\s+LOCKED)?", re.IGNORECASE)
+_MASTER_FIXUP_HANDLERS = {name: (replacement, fixup_rules) for name, _, replacement, fixup_rules in _MASTER_FIXUPS}
+_MASTER_FIXUP_RULE_ORDER = ("order_by_bad_alias_to_cnt", "order_by_cnt_star", "strip_for_update")
 _TIME_WINDOW_RE = re.compile(
     r"\b([A-Za-z0-9_\\.]*TIME)\b\s*(>=|>)\s*(SYSDATE|CURRENT_DATE)"
     r"(?:\s*-\s*INTERVAL\s*'[^']+'\s*(DAY|MONTH|YEAR))?"
     r"(?:\s+AND\s+\1\s*<=\s*(SYSDATE|CURRENT_DATE)"
     r"(?:\s*-\s*INTERVAL\s*'[^']+'\s*(DAY|MONTH|YEAR))?)?",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 _QUESTION_TIME_INTENT_RE = re.compile(
     r"(최근|지난|작년|올해|전년|기간|이내|이후|전후|입원\s*후|수술\s*후|\d+\s*(일|주|개월|달|월|년)|"
     r"\b(last|past|recent|today|yesterday|week|month|year|since|before|after|between|from|to|within)\b)",
     re.IGNORECASE,
 )
+# Connector cleanup after a time-window predicate is removed. The first two
+# alternatives fold "WHERE AND" into the GROUP/ORDER and end-of-text cases it
+# would otherwise expose to a second pass.
+_DANGLING_WHERE_RE = re.compile(
+    r"\bWHERE\s+AND\b\s*(?P<where_and_kw>GROUP|ORDER)\b"
+    r"|(?P<where_and_end>\bWHERE\s+AND\b\s*$)"
+    r"|(?P<where_and>\bWHERE\s+AND\b)"
+    r"|(?P<and_and>\bAND\s+AND\b)"
+    r"|\bWHERE\s*(?P<where_kw>GROUP|ORDER)\b"
+    r"|(?P<where_end>\bWHERE\s*$)",
+    re.IGNORECASE | re.ASCII,
+)
 _DIAGNOSIS_TITLE_FILTER_RE = re.compile(
     r"(?:UPPER|LOWER)?\s*\(\s*(?:[A-Za-z0-9_]+\.)?LONG_TITLE\s*\)\s*(?:LIKE|=)\s*"
     r"(?:(?:UPPER|LOWER)\s*\(\s*)?'[^']+'(?:\s*\))?"
     r"|(?:[A-Za-z0-9_]+\.)?LONG_TITLE\s*(?:LIKE|=)\s*"
     r"(?:(?:UPPER|LOWER)\s*\(\s*)?'[^']+'(?:\s*\))?",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 _ICD_CODE_LIKE_RE = re.compile(
     r"(?P<lhs>(?:[A-Za-z0-9_]+\.)?ICD_CODE)\s+LIKE\s+(?P<quote>'?)(?P<prefix>[A-Za-z0-9]+)%(?P=quote)",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 _TO_CHAR_BARE_FMT_RE = re.compile(
     r"TO_CHAR\s*\(\s*(?P<expr>[^,]+?)\s*,\s*(?P<fmt>YYYY|YYY|YY|Y|MM|MON|MONTH|DD|HH24|MI|SS)\s*\)",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
-_JOIN_ICD_TABLE_RE = re.compile(r"\bJOIN\s+(DIAGNOSES_ICD|PROCEDURES_ICD)\b", re.IGNORECASE)
+_JOIN_ICD_TABLE_RE = re.compile(r"\bJOIN\s+(DIAGNOSES_ICD|PROCEDURES_ICD)\b", re.IGNORECASE | re.ASCII)
 _COUNT_DENOM_NULLIF_RE = re.compile(
     r"/\s*NULLIF\s*\(\s*COUNT\s*\(\s*(?!DISTINCT)(?P<den>\*|[A-Za-z0-9_\.]+)\s*\)\s*,\s*0\s*\)",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 _COUNT_DENOM_RE = re.compile(
     r"/\s*COUNT\s*\(\s*(?!DISTINCT)(?P<den>\*|[A-Za-z0-9_\.]+)\s*\)",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 _RATIO_INTENT_RE = re.compile(
     r"(비율|비중|율|퍼센트|백분율|ratio|rate|proportion|percentage|pct)",
     re.IGNORECASE,
 )
-_RATIO_ALIAS_RE = re.compile(r"(RATE|RATIO|PCT|PERCENT)", re.IGNORECASE)
+_RATIO_ALIAS_RE = re.compile(r"(RATE|RATIO|PCT|PERCENT)", re.IGNORECASE | re.ASCII)
 _RATIO_DENOM_INTENT_RE = re.compile(
     r"(overall|total|all|out of|among|전체|총|분모|전체 대비|모수)",
     re.IGNORECASE,
 )
-_COUNT_ALIAS_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_$#]*$")
-_DENOM_ALIAS_HINT_RE = re.compile(r"(TOTAL|TOT|DENOM|ALL|BASE|OVERALL)", re.IGNORECASE)
+_COUNT_ALIAS_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_$#]*$", re.ASCII)
+_DENOM_ALIAS_HINT_RE = re.compile(r"(TOTAL|TOT|DENOM|ALL|BASE|OVERALL)", re.IGNORECASE | re.ASCII)
 _LAB_INTENT_RE = re.compile(r"(\blab(?:oratory|s|events?)?\b|검사|검체)", re.IGNORECASE)
 _CATEGORICAL_REWRITE_INTENT_RE = re.compile(
     r"(service|department|admission\s*type|discharge\s*location|admission\s*location|insurance|race|ethnicity|language|status|category|code|"
@@ -143,34 +185,49 @@ _FIRST_ICU_INTENT_RE = re.compile(
 )
 _CATEGORICAL_EQ_LITERAL_RE = re.compile(
     r"(?P<ref>(?:[A-Za-z_][A-Za-z0-9_$#]*\.)?[A-Za-z_][A-Za-z0-9_$#]*)\s*=\s*'(?P<lit>[^']+)'",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 _TABLE_ALIAS_REF_RE = re.compile(
     r"\b(?:FROM|JOIN)\s+([A-Za-z_][A-Za-z0-9_$#]*)(?!\.)\b(?:\s+([A-Za-z_][A-Za-z0-9_$#]*))?",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 _ITEMID_SCALAR_SUBQUERY_EQ_RE = re.compile(
     r"(?P<lhs>(?:[A-Za-z_][A-Za-z0-9_$#]*\.)?ITEMID)\s*=\s*\(",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 _ITEMID_ICD_EQ_RE = re.compile(
     r"(?P<lhs>[A-Za-z_][A-Za-z0-9_$#]*)\.(?P<lcol>ITEMID|ICD_CODE)\s*=\s*"
     r"(?P<rhs>[A-Za-z_][A-Za-z0-9_$#]*)\.(?P<rcol>ITEMID|ICD_CODE)",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 _SIMPLE_COLUMN_REF_RE = re.compile(
     r"^(?:(?P<prefix>[A-Za-z_][A-Za-z0-9_$#]*)\.)?(?P<col>[A-Za-z_][A-Za-z0-9_$#]*)$",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
+)
+_AVG_ALIAS_MAP = {
+    "DOSES_PER_24_HRS": "avg_doses",
+    "AMOUNT": "avg_amount",
+    "VALUE": "avg_value",
+    "ANCHOR_AGE": "avg_age",
+    "LOS": "avg_los",
+    "DIAGNOSIS_COUNT": "avg_diag",
+    "DIAG_CNT": "avg_diag",
+    "PROCEDURE_COUNT": "avg_proc",
+    "PROC_CNT": "avg_proc",
+}
+_AVG_ALIAS_RE = re.compile(
+    r"AVG\(\s*([A-Za-z0-9_\.]*(" + "|".join(_AVG_ALIAS_MAP) + r"))\s*\)\s+AS\s+[A-Za-z0-9_]+",
+    re.IGNORECASE | re.ASCII,
 )
 _COUNTLIKE_ALIAS_RE = re.compile(
     r"^(CNT|COUNT|N_|NUM_|.*_CNT|.*_COUNT|TOTAL_.*|.*_TOTAL)$",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 _RAW_LABEL_LIKE_RE = re.compile(
     r"(?P<ref>(?:[A-Za-z_][A-Za-z0-9_$#]*\.)?LABEL)\s+"
     r"(?P<op>LIKE|NOT\s+LIKE)\s+"
     r"'(?P<lit>[^']*)'",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 
 def _schema_hints() -> dict[str, Any]:
@@ -216,26 +273,60 @@ def _timestamp_cols() -> set[str]:
     value = _schema_hints().get("timestamp_cols")
     return value if isinstance(value, set) else set()
 
-_HAS_ICU_RE = re.compile(r"\bHAS_ICU_STAY\b\s*=\s*(?:'Y'|1|TRUE)", re.IGNORECASE)
-_ICU_STAY_RE = re.compile(r"\bICU_STAY\b\s*=\s*(?:'Y'|'YES'|1|TRUE)", re.IGNORECASE)
-_ICUSTAYS_FLAG_RE = re.compile(r"\bICUSTAYS\b\s*=\s*(?:'Y'|'YES'|1|TRUE)", re.IGNORECASE)
-_ICUSTAYS_NOT_NULL_RE = re.compile(r"\bICUSTAYS\b\s+IS\s+NOT\s+NULL", re.IGNORECASE)
-_DIFF_RE = re.compile(r"([A-Za-z0-9_\\.]+)\s*-\s*([A-Za-z0-9_\\.]+)")
-_TS_DIFF_RE = re.compile(r"TIMESTAMPDIFF\s*\(\s*DAY\s*,\s*([A-Za-z0-9_\\.]+)\s*,\s*([A-Za-z0-9_\\.]+)\s*\)", re.IGNORECASE)
-_EXTRACT_YEAR_RE = re.compile(r"EXTRACT\s*\(\s*YEAR\s+FROM\s+([A-Za-z0-9_\\.]+)\s*\)", re.IGNORECASE)
+# Pseudo ICU flag predicates, one named alternative per form so a single scan
+# can dispatch on match.lastgroup.
+_ICU_FLAG_RE = re.compile(
+    r"(?P<has_icu_stay>\bHAS_ICU_STAY\b\s*=\s*(?:'Y'|1|TRUE))"
+    r"|(?P<icu_stay>\bICU_STAY\b\s*=\s*(?:'Y'|'YES'|1|TRUE))"
+    r"|(?P<icustays_flag>\bICUSTAYS\b\s*=\s*(?:'Y'|'YES'|1|TRUE))"
+    r"|(?P<icustays_not_null>\bICUSTAYS\b\s+IS\s+NOT\s+NULL)",
+    re.IGNORECASE | re.ASCII,
+)
+_ICU_FLAG_RULES = {
+    "has_icu_stay": "has_icu_stay_to_icustays",
+    "icu_stay": "icu_stay_to_icustays",
+    "icustays_flag": "icustays_flag_to_icustays",
+    "icustays_not_null": "icustays_not_null_to_icustays",
+}
+_DIFF_RE = re.compile(r"([A-Za-z0-9_\\.]+)\s*-\s*([A-Za-z0-9_\\.]+)", re.ASCII)
+_TS_DIFF_RE = re.compile(
+    r"TIMESTAMPDIFF\s*\(\s*DAY\s*,\s*([A-Za-z0-9_\\.]+)\s*,\s*([A-Za-z0-9_\\.]+)\s*\)",
+    re.IGNORECASE | re.ASCII,
+)
+_EXTRACT_YEAR_RE = re.compile(r"EXTRACT\s*\(\s*YEAR\s+FROM\s+([A-Za-z0-9_\\.]+)\s*\)", re.IGNORECASE | re.ASCII)
 _OUTER_ROWNUM_RE = re.compile(
     r"^\s*SELECT\s+\*\s+FROM\s*\((SELECT .*?)\)\s*WHERE\s+ROWNUM\s*<=\s*(\d+)\s*;?\s*$",
-    re.IGNORECASE | re.DOTALL,
+    re.IGNORECASE | re.DOTALL | re.ASCII,
 )
+_ALIAS_NAME_RE = re.compile(r"[A-Za-z0-9_]+", re.ASCII)
+_TABLE_ALIAS_PREFIX_RE = re.compile(r"\b(?:FROM|JOIN)\s+", re.IGNORECASE)
+_WORD_RUN_RE = re.compile(r"\w+")
+# FROM T T / JOIN T T; the backreference is case-insensitive like the rest of the match.
+_DEDUPE_ALIAS_RE = re.compile(r"\b(from|join)\s+([A-Za-z0-9_]+)\s+\2\b", re.IGNORECASE | re.ASCII)
+_LABEL_REF_RE = re.compile(r"(?<!\.)\bLABEL\b", re.IGNORECASE | re.ASCII)
+_LONG_TITLE_REF_RE = re.compile(r"(?<!\.)\bLONG_TITLE\b", re.IGNORECASE | re.ASCII)
+_LABEL_LOOKUP_TABLE_RE = re.compile(r"\b(?:D_ITEMS|D_LABITEMS)\b", re.IGNORECASE | re.ASCII)
+_LONG_TITLE_LOOKUP_TABLE_RE = re.compile(r"\b(?:D_ICD_DIAGNOSES|D_ICD_PROCEDURES)\b", re.IGNORECASE | re.ASCII)
+# Event table -> join that brings in its LABEL / LONG_TITLE lookup as alias d.
+_LOOKUP_JOIN_TEMPLATES: dict[str, str] = {
+    "CHARTEVENTS": " JOIN D_ITEMS d ON {alias}.ITEMID = d.ITEMID",
+    "LABEVENTS": " JOIN D_LABITEMS d ON {alias}.ITEMID = d.ITEMID",
+    "DIAGNOSES_ICD": (
+        " JOIN D_ICD_DIAGNOSES d ON {alias}.ICD_CODE = d.ICD_CODE AND {alias}.ICD_VERSION = d.ICD_VERSION"
+    ),
+    "PROCEDURES_ICD": (
+        " JOIN D_ICD_PROCEDURES d ON {alias}.ICD_CODE = d.ICD_CODE AND {alias}.ICD_VERSION = d.ICD_VERSION"
+    ),
+}
 _ABS_YEAR_RE = re.compile(r"(?<!\d)(?:19|20|21)\d{2}(?!\d)")
 _SYSDATE_YEAR_DIFF_RE = re.compile(
     r"\(\s*(?:SYSDATE|CURRENT_DATE)\s*-\s*(?:CAST\s*\(\s*)?([A-Za-z0-9_\\.]+)"
     r"(?:\s+AS\s+DATE\s*\))?\s*\)\s*/\s*365(?:\.25)?",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 _ADD_MONTHS_PRED_RE = re.compile(
     r"([A-Za-z0-9_\\.]+)\s*(>=|>|<=|<)\s*ADD_MONTHS\s*\(\s*(?:SYSDATE|CURRENT_DATE)\s*,\s*[-+]?\d+\s*\*\s*12\s*\)",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 _POST_WINDOW_KO_RE = re.compile(r"후\s*(\d+)\s*일|(\d+)\s*일\s*이내")
 _POST_WINDOW_EN_RE = re.compile(r"(?:within|after)\s+(\d+)\s+day", re.IGNORECASE)
@@ -244,6 +335,29 @@ _TOP_N_KO_RE = re.compile(r"(?:상위|탑)\s*(\d+)")
 _TOP_N_KO_ONLY_RE = re.compile(r"(?<!\d)([0-9][0-9,]*)\s*(?:개|건|명|행|줄)\s*만")
 _COUNT_BY_GENDER_EN_RE = re.compile(r"\bcount\b.*\bby\s+gender\b", re.IGNORECASE)
 _COUNT_BY_GENDER_KO_RE = re.compile(r"성별.*(건수|건|수|카운트)|.*(건수|건|수|카운트).*성별")
+# Question tokens -> (table, alias) for the count-by-gender template, checked in order.
+_GENDER_COUNT_TARGETS: tuple[tuple[tuple[str, ...], tuple[str, str]], ...] = (
+    (("diagnos", "진단"), ("DIAGNOSES_ICD", "dx")),
+    (("procedur", "시술", "수술"), ("PROCEDURES_ICD", "pr")),
+    (("transfer", "이동"), ("TRANSFERS", "t")),
+    (("service", "서비스"), ("SERVICES", "s")),
+    (("prescription", "약물", "처방", "drug", "medication"), ("PRESCRIPTIONS", "r")),
+    (("chart event", "chart", "차트"), ("CHARTEVENTS", "c")),
+    (("lab event", "lab", "검사"), ("LABEVENTS", "l")),
+    (("icu",), ("ICUSTAYS", "i")),
+    (("admission", "입원"), ("ADMISSIONS", "a")),
+)
+_COUNT_BY_GENDER_SQL: dict[str, str] = {
+    table: (
+        "SELECT p.GENDER, COUNT(*) AS CNT "
+        f"FROM {table} {alias} "
+        f"JOIN PATIENTS p ON {alias}.SUBJECT_ID = p.SUBJECT_ID "
+        "WHERE p.GENDER IS NOT NULL "
+        "GROUP BY p.GENDER "
+        "ORDER BY CNT DESC"
+    )
+    for _, (table, alias) in _GENDER_COUNT_TARGETS
+}
 _AGE_GROUP_INTENT_RE = re.compile(r"(연령대|나이대|age\s*(group|band|range)|연령\s*구간)", re.IGNORECASE)
 _GENDER_INTENT_RE = re.compile(r"(성별|남성|여성|\bgender\b|\bsex\b)", re.IGNORECASE)
 _EXTREMA_INTENT_RE = re.compile(
@@ -253,24 +367,24 @@ _EXTREMA_INTENT_RE = re.compile(
 _DIAGNOSIS_INTENT_RE = re.compile(r"(진단|diagnos)", re.IGNORECASE)
 _DEATHTIME_FROM_DISCHTIME_RE = re.compile(
     r"(?P<death>(?:[A-Za-z0-9_]+\.)?DEATHTIME)\s*<=\s*\(?\s*(?P<dis>(?:[A-Za-z0-9_]+\.)?DISCHTIME)\s*\+\s*INTERVAL\s*'(?P<days>\d+)'\s*DAY\s*\)?",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 _ICD_VERSION_CODE_AND_RE = re.compile(
     r"(?P<ver_col>(?:[A-Za-z0-9_]+\.)?ICD_VERSION)\s*=\s*(?P<version>9|10)\s+AND\s+"
     r"(?P<code_col>(?:[A-Za-z0-9_]+\.)?ICD_CODE)\s+LIKE\s+(?P<quote>'?)(?P<prefix>[A-Za-z0-9]+)%(?P=quote)",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 _ICD_CODE_VERSION_AND_RE = re.compile(
     r"(?P<code_col>(?:[A-Za-z0-9_]+\.)?ICD_CODE)\s+LIKE\s+(?P<quote>'?)(?P<prefix>[A-Za-z0-9]+)%(?P=quote)\s+AND\s+"
     r"(?P<ver_col>(?:[A-Za-z0-9_]+\.)?ICD_VERSION)\s*=\s*(?P<version>9|10)",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 _COMORBIDITY_HINT_RE = re.compile(r"(동반|comorbid|co[-\s]*morbid|\+|\band\b|및|함께|with)", re.IGNORECASE)
 _EXPLICIT_ICD_PREFIX_RE = re.compile(r"\b(?:[A-TV-Z][0-9][0-9A-Z]{1,3}|[0-9]{3})\b", re.IGNORECASE)
 _ICD_CODE_HINT_RE = re.compile(r"(icd|진단\s*코드|진단코드|코드)", re.IGNORECASE)
 _ADM_ICU_IN_RE = re.compile(
     r"(?P<adm>[A-Za-z0-9_]+)\.HADM_ID\s+IN\s*\(\s*SELECT\s+HADM_ID\s+FROM\s+ICUSTAYS\s*\)",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 
 
@@ -289,6 +403,75 @@ def _token_at(text_upper: str, idx: int, token: str) -> bool:
     return True
 
 
+@lru_cache(maxsize=32)
+def _sql_upper(text: str) -> str:
+    # Uppercase view shared by helpers that only test keyword presence. The
+    # pipeline hands the same string object to consecutive steps until one
+    # rewrites it, so repeated lookups hit the cached hash and skip the copy.
+    return text.upper()
+
+
+@lru_cache(maxsize=512)
+def _word_re(ident: str) -> re.Pattern[str]:
+    return re.compile(rf"\b{re.escape(ident)}\b", re.IGNORECASE | re.ASCII)
+
+
+@lru_cache(maxsize=512)
+def _not_null_re(ident: str, unqualified: bool = False) -> re.Pattern[str]:
+    # unqualified=True skips matches preceded by "." (e.g. col but not t.col).
+    prefix = r"(?<!\.)" if unqualified else ""
+    return re.compile(rf"{prefix}\b{re.escape(ident)}\b\s+IS\s+NOT\s+NULL", re.IGNORECASE | re.ASCII)
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _ireplace_first(text: str, needle_lower: str, repl: str) -> str | None:
+    """Replace the first whole-word, case-insensitive ``needle_lower`` in ``text``.
+
+    Words of a multi-word needle may be separated by any whitespace, matching
+    ``\\bgroup\\s+by\\b`` without going through the regex engine. Returns None when
+    the needle does not occur.
+    """
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        pattern = r"\b" + r"\s+".join(map(re.escape, needle_lower.split())) + r"\b"
+        match = re.search(pattern, text, re.IGNORECASE)
+        if not match:
+            return None
+        return text[: match.start()] + repl + text[match.end():]
+
+    first, *rest = needle_lower.split()
+    pos = lowered.find(first)
+    while pos != -1:
+        end = pos + len(first)
+        if pos == 0 or not _is_word_char(text[pos - 1]):
+            for word in rest:
+                gap = end
+                while gap < len(text) and text[gap].isspace():
+                    gap += 1
+                if gap == end or not lowered.startswith(word, gap):
+                    end = -1
+                    break
+                end = gap + len(word)
+            if end != -1 and (end == len(text) or not _is_word_char(text[end])):
+                return text[:pos] + repl + text[end:]
+        pos = lowered.find(first, pos + 1)
+    return None
+
+
+def _inject_where_predicate(text: str, predicate: str) -> str:
+    injected = _ireplace_first(text, "where", f"WHERE {predicate} AND")
+    if injected is None:
+        injected = _ireplace_first(text, "group by", f"WHERE {predicate} GROUP BY")
+    if injected is None:
+        injected = _ireplace_first(text, "order by", f"WHERE {predicate} ORDER BY")
+    if injected is None:
+        injected = text.rstrip(";") + f" WHERE {predicate}"
+    return injected
+
+
 def _find_final_select_from_span(sql: str) -> tuple[str, int, int] | None:
     core = sql.strip().rstrip(";")
     if not core:
@@ -366,7 +549,7 @@ def _find_final_select_from_span(sql: str) -> tuple[str, int, int] | None:
 def _find_first_top_level_keyword(sql: str, start_idx: int, keywords: tuple[str, ...]) -> int:
     if not sql or start_idx < 0 or start_idx >= len(sql):
         return -1
-    upper = sql.upper()
+    upper = _sql_upper(sql)
     depth = 0
     in_single = False
     i = start_idx
@@ -706,7 +889,7 @@ def _build_ko_sample_template(question: str) -> tuple[str | None, list[str]]:
     limit = _extract_sample_limit_from_question(q, default=100)
     cols_sql = ", ".join(columns)
     rules.append("sample_rows_template_ko")
-    return f"SELECT {cols_sql} FROM {table} WHERE {first} IS NOT NULL AND ROWNUM <= {limit}", rules
+    return _SAMPLE_ROWS_SQL.format(cols=cols_sql, table=table, first=first, limit=limit), rules
 
 
 def _first(items: Iterable[str]) -> str | None:
@@ -715,6 +898,8 @@ def _first(items: Iterable[str]) -> str | None:
     return None
 
 
+# Several helpers resolve the same table alias on an unchanged SQL snapshot.
+@lru_cache(maxsize=2048)
 def _find_table_alias(text: str, table: str) -> str | None:
     pattern = re.compile(rf"\b(from|join)\s+{re.escape(table)}(?:\s+([A-Za-z0-9_]+))?", re.IGNORECASE)
     match = pattern.search(text)
@@ -759,11 +944,16 @@ def _insert_join(text: str, join_clause: str) -> str:
     return text.rstrip(";") + join_clause
 
 
+@lru_cache(maxsize=64)
+def _build_lookup_join(table: str, alias: str) -> str:
+    return _LOOKUP_JOIN_TEMPLATES[table].format(alias=alias)
+
+
 def _inject_join_in_outer(
     sql: str,
     base_table: str,
     join_template: str,
-    replace_from: str,
+    replace_from: re.Pattern[str],
     replace_to: str,
 ) -> tuple[str | None, list[str]]:
     rules: list[str] = []
@@ -787,7 +977,7 @@ def _inject_join_in_outer(
     join_clause = join_template.format(alias=alias)
 
     inner = pattern.sub(base_clause + join_clause, inner, count=1)
-    inner = re.sub(replace_from, replace_to, inner, flags=re.IGNORECASE)
+    inner = replace_from.sub(replace_to, inner)
     rules.append("inject_join_in_outer")
     return f"SELECT * FROM ({inner}) WHERE ROWNUM <= {limit}", rules
 
@@ -822,7 +1012,7 @@ def _apply_rownum_cap(sql: str, cap: int = 100000) -> tuple[str, list[str]]:
             )
         return inner_sql.rstrip(";") + f" WHERE ROWNUM <= {cap}"
 
-    if "ROWNUM" in text.upper():
+    if "ROWNUM" in _sql_upper(text):
         match = _OUTER_ROWNUM_RE.match(text)
         if match:
             inner = match.group(1)
@@ -872,7 +1062,7 @@ def _should_apply_rownum_cap_conservative(question: str, sql: str) -> bool:
     q = (question or "").lower()
     if not q or not sql:
         return False
-    text_upper = sql.upper()
+    text_upper = _sql_upper(sql)
     explicit_sample_intent = any(
         token in q
         for token in (
@@ -914,7 +1104,7 @@ def _rewrite_oracle_syntax(sql: str) -> tuple[str, list[str]]:
     if _AND_TRUE_RE.search(text):
         text = _AND_TRUE_RE.sub("AND 1=1", text)
         rules.append("and_true_to_1eq1")
-    if "WHERE" not in text.upper() and re.search(r"\b1=1\b", text):
+    if "WHERE" not in _sql_upper(text) and re.search(r"\b1=1\b", text):
         text = re.sub(r"\b1=1\b", "WHERE 1=1", text, count=1, flags=re.IGNORECASE)
         rules.append("insert_where_for_1eq1")
 
@@ -936,25 +1126,136 @@ def _rewrite_oracle_syntax(sql: str) -> tuple[str, list[str]]:
     if _LIMIT_RE.search(text):
         n = int(_LIMIT_RE.search(text).group(1))
         text = _LIMIT_RE.sub("", text).rstrip()
-        if "ROWNUM" not in text.upper():
+        if "ROWNUM" not in _sql_upper(text):
             text = _wrap_with_rownum(text, n)
             rules.append("limit_to_rownum")
     if _FETCH_RE.search(text):
         n = int(_FETCH_RE.search(text).group(1))
         text = _FETCH_RE.sub("", text).rstrip()
-        if "ROWNUM" not in text.upper():
+        if "ROWNUM" not in _sql_upper(text):
             text = _wrap_with_rownum(text, n)
             rules.append("fetch_first_to_rownum")
     if _TOP_RE.search(text):
         n = int(_TOP_RE.search(text).group(1))
         text = _TOP_RE.sub("SELECT ", text, count=1)
-        if "ROWNUM" not in text.upper():
+        if "ROWNUM" not in _sql_upper(text):
             text = _wrap_with_rownum(text, n)
             rules.append("top_to_rownum")
 
     return text, rules
 
 
+# Alias maps are applied as one token scan instead of one regex pass per entry.
+# A pass per entry lets a later entry rewrite an earlier entry's output, so each
+# alias resolves to the end of that chain: _AliasChains maps a lowercased source
+# name to (final name, indexes of the entries that fired along the way).
+_AliasChains = dict[str, tuple[str, tuple[int, ...]]]
+
+
+@lru_cache(maxsize=16)
+def _alias_chains(items: tuple[tuple[str, str], ...]) -> _AliasChains | None:
+    """Precompute alias chains, or None when the map needs the per-entry passes.
+
+    The token scan is only equivalent when every name is a plain identifier and
+    none of them is FROM/JOIN (which would create or remove table positions).
+    """
+    for src, dest in items:
+        for name in (src, dest):
+            if not _ALIAS_NAME_RE.fullmatch(name) or name.upper() in {"FROM", "JOIN"}:
+                return None
+    chains: _AliasChains = {}
+    for start, (src, _) in enumerate(items):
+        key = src.lower()
+        if key in chains:
+            continue
+        fired = [start]
+        current = items[start][1]
+        pos = start
+        while True:
+            nxt = next((i for i in range(pos + 1, len(items)) if items[i][0].lower() == current.lower()), None)
+            if nxt is None:
+                break
+            fired.append(nxt)
+            current = items[nxt][1]
+            pos = nxt
+        chains[key] = (current, tuple(fired))
+    return chains
+
+
+def _lookup_alias_chain(
+    token: str,
+    items: tuple[tuple[str, str], ...],
+    chains: _AliasChains,
+) -> tuple[str, tuple[int, ...]] | None:
+    if token.isascii():
+        return chains.get(token.lower())
+    # Non-ASCII tokens can still match under Unicode case folding (e.g. long s).
+    for src, _ in items:
+        if re.fullmatch(re.escape(src), token, re.IGNORECASE):
+            return chains[src.lower()]
+    return None
+
+
+def _emit_alias_rules(
+    kind: str,
+    items: tuple[tuple[str, str], ...],
+    fired: set[int],
+    rules: list[str],
+) -> None:
+    for idx in sorted(fired):
+        src, dest = items[idx]
+        rules.append(f"{kind}:{src}->{dest}")
+
+
+def _apply_table_alias_chains(
+    text: str,
+    items: tuple[tuple[str, str], ...],
+    chains: _AliasChains,
+    rules: list[str],
+) -> str:
+    fired: set[int] = set()
+    parts: list[str] = []
+    last = 0
+    for prefix in _TABLE_ALIAS_PREFIX_RE.finditer(text):
+        token = _WORD_RUN_RE.match(text, prefix.end())
+        if not token:
+            continue
+        chain = _lookup_alias_chain(token.group(0), items, chains)
+        if chain is None:
+            continue
+        parts.append(text[last:token.start()])
+        parts.append(chain[0])
+        fired.update(chain[1])
+        last = token.end()
+    if not fired:
+        return text
+    parts.append(text[last:])
+    _emit_alias_rules("table", items, fired, rules)
+    return "".join(parts)
+
+
+def _apply_column_alias_chains(
+    text: str,
+    items: tuple[tuple[str, str], ...],
+    chains: _AliasChains,
+    rules: list[str],
+) -> str:
+    fired: set[int] = set()
+
+    def repl(match: re.Match[str]) -> str:
+        chain = chains.get(match.group(0).lower())
+        if chain is None:
+            return match.group(0)
+        fired.update(chain[1])
+        return chain[0]
+
+    rewritten = _ALIAS_NAME_RE.sub(repl, text)
+    if not fired:
+        return text
+    _emit_alias_rules("column", items, fired, rules)
+    return rewritten
+
+
 def _apply_schema_mappings(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
@@ -980,23 +1281,34 @@ def _apply_schema_mappings(sql: str) -> tuple[str, list[str]]:
             if str(src).strip() and str(dest).strip()
         })
 
+    table_items = tuple(table_aliases.items())
+    column_items = tuple(column_aliases.items())
+    table_chains = _alias_chains(table_items) if table_items else None
+    column_chains = _alias_chains(column_items) if column_items else None
+
     # Table name replacements: restrict to FROM/JOIN positions to avoid
     # accidental rewrites of non-table identifiers.
-    for src, dest in table_aliases.items():
-        pattern = re.compile(
-            rf"(?P<prefix>\b(?:FROM|JOIN)\s+){re.escape(src)}\b",
-            re.IGNORECASE,
-        )
-        if pattern.search(text):
-            text = pattern.sub(lambda m: f"{m.group('prefix')}{dest}", text)
-            rules.append(f"table:{src}->{dest}")
+    if table_chains is not None:
+        text = _apply_table_alias_chains(text, table_items, table_chains, rules)
+    else:
+        for src, dest in table_items:
+            pattern = re.compile(
+                rf"(?P<prefix>\b(?:FROM|JOIN)\s+){re.escape(src)}\b",
+                re.IGNORECASE,
+            )
+            if pattern.search(text):
+                text = pattern.sub(lambda m: f"{m.group('prefix')}{dest}", text)
+                rules.append(f"table:{src}->{dest}")
 
     # Column name replacements (case-insensitive, word boundaries)
-    for src, dest in column_aliases.items():
-        pattern = re.compile(rf"\b{re.escape(src)}\b", re.IGNORECASE)
-        if pattern.search(text):
-            text = pattern.sub(dest, text)
-            rules.append(f"column:{src}->{dest}")
+    if column_chains is not None:
+        text = _apply_column_alias_chains(text, column_items, column_chains, rules)
+    else:
+        for src, dest in column_items:
+            pattern = _word_re(src)
+            if pattern.search(text):
+                text = pattern.sub(dest, text)
+                rules.append(f"column:{src}->{dest}")
 
     return text, rules
 
@@ -1120,13 +1432,12 @@ def _ensure_microbiology_table(sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _ensure_microbiology_by_question(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_microbiology_by_question(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     if re.search(r"\bMICROBIOLOGYEVENTS\b", text, re.IGNORECASE):
         return text, rules
-    q = question.lower()
-    if not any(k in q for k in ("micro", "microbiology", "organism", "antibiotic", "culture", "specimen")):
+    if not any(k in question_lower for k in ("micro", "microbiology", "organism", "antibiotic", "culture", "specimen")):
         return text, rules
 
     m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
@@ -1141,15 +1452,18 @@ def _ensure_microbiology_by_question(question: str, sql: str) -> tuple[str, list
     return text, rules
 
 
-def _ensure_icustays_table(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_icustays_table(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     if re.search(r"\bICUSTAYS\b", text, re.IGNORECASE):
         return text, rules
 
-    q = question.lower()
-    icu_only = "icu stay" in q or "icu stays" in q or ("icu" in q and "los" in q)
-    if "admission" in q or "admissions" in q or "patient" in q or "patients" in q:
+    icu_only = (
+        "icu stay" in question_lower
+        or "icu stays" in question_lower
+        or ("icu" in question_lower and "los" in question_lower)
+    )
+    if any(k in question_lower for k in ("admission", "admissions", "patient", "patients")):
         icu_only = False
 
     # INTIME/OUTTIME are shared with TRANSFERS and should not alone force ICUSTAYS.
@@ -1170,14 +1484,13 @@ def _ensure_icustays_table(question: str, sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _ensure_chartevents_table(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_chartevents_table(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     if re.search(r"\bCHARTEVENTS\b", text, re.IGNORECASE):
         return text, rules
 
-    q = question.lower()
-    if "chart event" not in q and "chart events" not in q and "chart" not in q:
+    if "chart event" not in question_lower and "chart events" not in question_lower and "chart" not in question_lower:
         return text, rules
 
     m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
@@ -1192,11 +1505,10 @@ def _ensure_chartevents_table(question: str, sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _ensure_chart_label(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_chart_label(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    q = question.lower()
-    if "label" not in q or "chart" not in q:
+    if "label" not in question_lower or "chart" not in question_lower:
         return text, rules
     if re.search(r"\bD_ITEMS\b", text, re.IGNORECASE):
         return text, rules
@@ -1212,16 +1524,15 @@ def _ensure_chart_label(question: str, sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _ensure_labevents_table(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_labevents_table(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     if re.search(r"\bLABEVENTS\b", text, re.IGNORECASE):
         return text, rules
 
-    q = question.lower()
-    if not _has_lab_intent(q):
+    if not _has_lab_intent(question_lower):
         return text, rules
-    if "micro" in q or "microbiology" in q:
+    if "micro" in question_lower or "microbiology" in question_lower:
         return text, rules
 
     m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
@@ -1236,11 +1547,10 @@ def _ensure_labevents_table(question: str, sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _ensure_lab_label(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_lab_label(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    q = question.lower()
-    if "label" not in q or not _has_lab_intent(q):
+    if "label" not in question_lower or not _has_lab_intent(question_lower):
         return text, rules
     if re.search(r"\bD_LABITEMS\b", text, re.IGNORECASE):
         return text, rules
@@ -1256,14 +1566,13 @@ def _ensure_lab_label(question: str, sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _rewrite_label_field(question: str, sql: str) -> tuple[str, list[str]]:
+def _rewrite_label_field(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    q = question.lower()
-    if "label" not in q:
+    if "label" not in question_lower:
         return text, rules
 
-    if "chart" in q and "lab" not in q:
+    if "chart" in question_lower and "lab" not in question_lower:
         alias = _find_table_alias(text, "D_ITEMS")
         if alias:
             text = re.sub(r"(?<!\.)\bITEMID\b", f"{alias}.LABEL", text, flags=re.IGNORECASE)
@@ -1271,7 +1580,7 @@ def _rewrite_label_field(question: str, sql: str) -> tuple[str, list[str]]:
             rules.append("chart_label_itemid_to_label")
         return text, rules
 
-    if "lab" in q or "laboratory" in q:
+    if "lab" in question_lower or "laboratory" in question_lower:
         alias = _find_table_alias(text, "D_LABITEMS")
         if alias:
             text = re.sub(r"(?<!\.)\bITEMID\b", f"{alias}.LABEL", text, flags=re.IGNORECASE)
@@ -1280,17 +1589,16 @@ def _rewrite_label_field(question: str, sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _ensure_prescriptions_table(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_prescriptions_table(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     if re.search(r"\bPRESCRIPTIONS\b", text, re.IGNORECASE):
         return text, rules
 
-    q = question.lower()
-    if "emar" in q or "ingredient" in q:
+    if "emar" in question_lower or "ingredient" in question_lower:
         return text, rules
     triggers = ("prescription", "drug", "medication", "doses", "formulation")
-    if not any(t in q for t in triggers):
+    if not any(t in question_lower for t in triggers):
         return text, rules
 
     m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
@@ -1305,16 +1613,15 @@ def _ensure_prescriptions_table(question: str, sql: str) -> tuple[str, list[str]
     return text, rules
 
 
-def _ensure_inputevents_table(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_inputevents_table(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     if re.search(r"\bINPUTEVENTS\b", text, re.IGNORECASE):
         return text, rules
-    q = question.lower()
     triggers = ("input event", "input events", "input amount", "intake", "fluid intake", "infusion", "infusions")
-    if not any(t in q for t in triggers):
+    if not any(t in question_lower for t in triggers):
         return text, rules
-    if "ingredient" in q:
+    if "ingredient" in question_lower:
         return text, rules
 
     m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
@@ -1329,14 +1636,13 @@ def _ensure_inputevents_table(question: str, sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _ensure_outputevents_table(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_outputevents_table(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     if re.search(r"\bOUTPUTEVENTS\b", text, re.IGNORECASE):
         return text, rules
-    q = question.lower()
     triggers = ("output event", "output events", "output value", "output volume", "urine output", "drain output")
-    if not any(t in q for t in triggers):
+    if not any(t in question_lower for t in triggers):
         return text, rules
 
     m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
@@ -1351,16 +1657,15 @@ def _ensure_outputevents_table(question: str, sql: str) -> tuple[str, list[str]]
     return text, rules
 
 
-def _ensure_emar_table(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_emar_table(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    q = question.lower()
     triggers = ("emar", "med admin", "medication administration", "administration record", "dose given", "dose due")
-    if not any(t in q for t in triggers):
+    if not any(t in question_lower for t in triggers):
         return text, rules
 
     detail_triggers = ("detail", "administration type", "dose given", "dose due", "barcode")
-    target = "EMAR_DETAIL" if any(t in q for t in detail_triggers) else "EMAR"
+    target = "EMAR_DETAIL" if any(t in question_lower for t in detail_triggers) else "EMAR"
     if re.search(rf"\b{target}\b", text, re.IGNORECASE):
         return text, rules
 
@@ -1376,13 +1681,12 @@ def _ensure_emar_table(question: str, sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _ensure_diagnoses_icd_table(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_diagnoses_icd_table(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    q = question.lower()
-    if "diagnos" not in q:
+    if "diagnos" not in question_lower:
         return text, rules
-    if "title" in q:
+    if "title" in question_lower:
         return text, rules
     if re.search(r"\bDIAGNOSES_ICD\b", text, re.IGNORECASE):
         return text, rules
@@ -1399,15 +1703,14 @@ def _ensure_diagnoses_icd_table(question: str, sql: str) -> tuple[str, list[str]
     return text, rules
 
 
-def _ensure_procedures_icd_table(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_procedures_icd_table(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    q = question.lower()
-    if "procedur" not in q:
+    if "procedur" not in question_lower:
         return text, rules
-    if "title" in q:
+    if "title" in question_lower:
         return text, rules
-    if "procedure event" in q or "procedureevents" in q:
+    if "procedure event" in question_lower or "procedureevents" in question_lower:
         return text, rules
     if re.search(r"\bPROCEDURES_ICD\b", text, re.IGNORECASE):
         return text, rules
@@ -1424,13 +1727,12 @@ def _ensure_procedures_icd_table(question: str, sql: str) -> tuple[str, list[str
     return text, rules
 
 
-def _rewrite_prescriptions_drug_field(question: str, sql: str) -> tuple[str, list[str]]:
+def _rewrite_prescriptions_drug_field(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     if not re.search(r"\bPRESCRIPTIONS\b", text, re.IGNORECASE):
         return text, rules
-    q = question.lower()
-    if "drug" not in q and "medication" not in q:
+    if "drug" not in question_lower and "medication" not in question_lower:
         return text, rules
 
     if re.search(r"(?<!\.)\bITEMID\b", text, re.IGNORECASE):
@@ -1493,20 +1795,19 @@ def _rewrite_prescriptions_columns(sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _rewrite_icd_code_field(question: str, sql: str) -> tuple[str, list[str]]:
+def _rewrite_icd_code_field(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    q = question.lower()
-    if "code" not in q:
+    if "code" not in question_lower:
         return text, rules
 
-    if "diagnos" in q and re.search(r"\bDIAGNOSES_ICD\b", text, re.IGNORECASE):
+    if "diagnos" in question_lower and re.search(r"\bDIAGNOSES_ICD\b", text, re.IGNORECASE):
         if re.search(r"(?<!\.)\bITEMID\b", text, re.IGNORECASE):
             text = re.sub(r"(?<!\.)\bITEMID\b", "ICD_CODE", text, flags=re.IGNORECASE)
             rules.append("diagnoses_itemid_to_icd_code")
         return text, rules
 
-    if "procedur" in q and re.search(r"\bPROCEDURES_ICD\b", text, re.IGNORECASE):
+    if "procedur" in question_lower and re.search(r"\bPROCEDURES_ICD\b", text, re.IGNORECASE):
         if re.search(r"(?<!\.)\bITEMID\b", text, re.IGNORECASE):
             text = re.sub(r"(?<!\.)\bITEMID\b", "ICD_CODE", text, flags=re.IGNORECASE)
             rules.append("procedures_itemid_to_icd_code")
@@ -1524,13 +1825,12 @@ def _rewrite_itemid_in_icd_tables(sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _rewrite_emar_medication_field(question: str, sql: str) -> tuple[str, list[str]]:
+def _rewrite_emar_medication_field(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     if not re.search(r"\bEMAR\b", text, re.IGNORECASE):
         return text, rules
-    q = question.lower()
-    if "medication" not in q and "drug" not in q:
+    if "medication" not in question_lower and "drug" not in question_lower:
         return text, rules
 
     if re.search(r"(?<!\.)\bITEMID\b", text, re.IGNORECASE):
@@ -1539,11 +1839,10 @@ def _rewrite_emar_medication_field(question: str, sql: str) -> tuple[str, list[s
     return text, rules
 
 
-def _ensure_diagnosis_title_join(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_diagnosis_title_join(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    q = question.lower()
-    if "diagnos" not in q or "title" not in q:
+    if "diagnos" not in question_lower or "title" not in question_lower:
         return text, rules
     if re.search(r"\bDIAGNOSES_ICD\b", text, re.IGNORECASE):
         return text, rules
@@ -1566,11 +1865,10 @@ def _ensure_diagnosis_title_join(question: str, sql: str) -> tuple[str, list[str
     return text, rules
 
 
-def _ensure_procedure_title_join(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_procedure_title_join(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    q = question.lower()
-    if "procedur" not in q or "title" not in q:
+    if "procedur" not in question_lower or "title" not in question_lower:
         return text, rules
     if re.search(r"\bPROCEDURES_ICD\b", text, re.IGNORECASE):
         return text, rules
@@ -1619,19 +1917,21 @@ def _cleanup_procedure_title_joins(sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _ensure_services_table(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_services_table(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     if re.search(r"\bSERVICES\b", text, re.IGNORECASE):
         return text, rules
 
-    q = question.lower()
-    if "service" not in q:
+    if "service" not in question_lower:
         return text, rules
-    if "order" in q or "poe" in q:
+    if "order" in question_lower or "poe" in question_lower:
         return text, rules
 
-    if not re.search(r"\b(CURR_SERVICE|PREV_SERVICE)\b", text, re.IGNORECASE) and "current service" not in q:
+    if (
+        not re.search(r"\b(CURR_SERVICE|PREV_SERVICE)\b", text, re.IGNORECASE)
+        and "current service" not in question_lower
+    ):
         return text, rules
 
     m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
@@ -1646,13 +1946,12 @@ def _ensure_services_table(question: str, sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _ensure_transfers_eventtype(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_transfers_eventtype(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    q = question.lower()
-    if "transfer" not in q:
+    if "transfer" not in question_lower:
         return text, rules
-    if "event type" not in q and "eventtype" not in q:
+    if "event type" not in question_lower and "eventtype" not in question_lower:
         return text, rules
 
     if re.search(r"\bSERVICES\b", text, re.IGNORECASE) or re.search(
@@ -1684,7 +1983,7 @@ def _ensure_transfers_eventtype(question: str, sql: str) -> tuple[str, list[str]
     return text, rules
 
 
-def _rewrite_services_order_type(question: str, sql: str) -> tuple[str, list[str]]:
+def _rewrite_services_order_type(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     if not re.search(r"\bSERVICES\b", text, re.IGNORECASE):
@@ -1692,18 +1991,17 @@ def _rewrite_services_order_type(question: str, sql: str) -> tuple[str, list[str
     if not re.search(r"(?<!\.)\bORDER_TYPE\b", text, re.IGNORECASE):
         return text, rules
 
-    q = question.lower()
     target = "CURR_SERVICE"
-    if "previous service" in q or "prev service" in q or "prior service" in q:
+    if "previous service" in question_lower or "prev service" in question_lower or "prior service" in question_lower:
         target = "PREV_SERVICE"
-    elif "current service" in q:
+    elif "current service" in question_lower:
         target = "CURR_SERVICE"
     text = re.sub(r"(?<!\.)\bORDER_TYPE\b", target, text, flags=re.IGNORECASE)
     rules.append("services_order_type_to_curr_prev")
     return text, rules
 
 
-def _rewrite_icustays_careunit(question: str, sql: str) -> tuple[str, list[str]]:
+def _rewrite_icustays_careunit(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     if not re.search(r"\bICUSTAYS\b", text, re.IGNORECASE):
@@ -1711,11 +2009,10 @@ def _rewrite_icustays_careunit(question: str, sql: str) -> tuple[str, list[str]]
     if not re.search(r"\bCAREUNIT\b", text, re.IGNORECASE):
         return text, rules
 
-    q = question.lower()
     target = "FIRST_CAREUNIT"
-    if "last careunit" in q or "last care unit" in q:
+    if "last careunit" in question_lower or "last care unit" in question_lower:
         target = "LAST_CAREUNIT"
-    elif "first careunit" in q or "first care unit" in q:
+    elif "first careunit" in question_lower or "first care unit" in question_lower:
         target = "FIRST_CAREUNIT"
 
     aliases: set[str] = {"ICUSTAYS"}
@@ -1782,6 +2079,18 @@ def _rewrite_transfers_careunit_fields(sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
+_MICRO_ROWNUM_CAP_STRIPS: tuple[tuple[re.Pattern[str], str], ...] = tuple(
+    (re.compile(pattern, re.IGNORECASE | re.ASCII), replacement)
+    for pattern, replacement in (
+        (r"\bWHERE\s+ROWNUM\s*<=\s*\d+\s+AND\s+", "WHERE "),
+        (r"\bWHERE\s+ROWNUM\s*<=\s*\d+\s+GROUP\s+BY\b", "GROUP BY"),
+        (r"\bWHERE\s+ROWNUM\s*<=\s*\d+\s+ORDER\s+BY\b", "ORDER BY"),
+        (r"\bWHERE\s+ROWNUM\s*<=\s*\d+\b", ""),
+    )
+)
+_MICROBIOLOGYEVENTS_RE = re.compile(r"\bMICROBIOLOGYEVENTS\b", re.IGNORECASE | re.ASCII)
+
+
 def _strip_rownum_cap_for_micro_topk(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
@@ -1790,33 +2099,12 @@ def _strip_rownum_cap_for_micro_topk(sql: str) -> tuple[str, list[str]]:
         return text, rules
     inner = match.group(1)
     limit = match.group(2)
-    if not re.search(r"\bMICROBIOLOGYEVENTS\b", inner, re.IGNORECASE):
+    if not _MICROBIOLOGYEVENTS_RE.search(inner):
         return text, rules
 
-    new_inner = re.sub(
-        r"\bWHERE\s+ROWNUM\s*<=\s*\d+\s+AND\s+",
-        "WHERE ",
-        inner,
-        flags=re.IGNORECASE,
-    )
-    new_inner = re.sub(
-        r"\bWHERE\s+ROWNUM\s*<=\s*\d+\s+GROUP\s+BY\b",
-        "GROUP BY",
-        new_inner,
-        flags=re.IGNORECASE,
-    )
-    new_inner = re.sub(
-        r"\bWHERE\s+ROWNUM\s*<=\s*\d+\s+ORDER\s+BY\b",
-        "ORDER BY",
-        new_inner,
-        flags=re.IGNORECASE,
-    )
-    new_inner = re.sub(
-        r"\bWHERE\s+ROWNUM\s*<=\s*\d+\b",
-        "",
-        new_inner,
-        flags=re.IGNORECASE,
-    )
+    new_inner = inner
+    for pattern, replacement in _MICRO_ROWNUM_CAP_STRIPS:
+        new_inner = pattern.sub(replacement, new_inner)
 
     if new_inner != inner:
         text = f"SELECT * FROM ({new_inner.strip()}) WHERE ROWNUM <= {limit}"
@@ -1824,14 +2112,28 @@ def _strip_rownum_cap_for_micro_topk(sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
+_GROUPED_ROWNUM_CAP_TABLES_RE = re.compile(r"\b(PRESCRIPTIONS|INPUTEVENTS|OUTPUTEVENTS)\b", re.ASCII)
+_GROUPED_ROWNUM_CAP_STRIPS: tuple[tuple[re.Pattern[str], str], ...] = tuple(
+    (re.compile(pattern, re.IGNORECASE | re.ASCII), replacement)
+    for pattern, replacement in (
+        (r"\bWHERE\s+ROWNUM\s*<=\s*(\d+)\s+AND\s+", "WHERE "),
+        (r"\s+AND\s+ROWNUM\s*<=\s*(\d+)\s+AND\s+", " AND "),
+        (r"\bWHERE\s+ROWNUM\s*<=\s*(\d+)\s+GROUP\s+BY\b", "GROUP BY"),
+        (r"\bWHERE\s+ROWNUM\s*<=\s*(\d+)\s+ORDER\s+BY\b", "ORDER BY"),
+        (r"\bWHERE\s+ROWNUM\s*<=\s*(\d+)\b", ""),
+        (r"\s+AND\s+ROWNUM\s*<=\s*(\d+)\b", ""),
+    )
+)
+
+
 def _strip_rownum_cap_for_grouped_tables(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    upper = text.upper()
-    if "GROUP BY" not in upper:
+    upper = _sql_upper(text)
+    if "GROUP BY" not in upper or "ROWNUM" not in upper:
         return text, rules
 
-    if not re.search(r"\b(PRESCRIPTIONS|INPUTEVENTS|OUTPUTEVENTS)\b", upper):
+    if not _GROUPED_ROWNUM_CAP_TABLES_RE.search(upper):
         return text, rules
 
     def _maybe_strip(match: re.Match, replacement: str) -> str:
@@ -1846,47 +2148,12 @@ def _strip_rownum_cap_for_grouped_tables(sql: str) -> tuple[str, list[str]]:
         return replacement
 
     changed = False
-    text = re.sub(
-        r"\bWHERE\s+ROWNUM\s*<=\s*(\d+)\s+AND\s+",
-        lambda m: _maybe_strip(m, "WHERE "),
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(
-        r"\s+AND\s+ROWNUM\s*<=\s*(\d+)\s+AND\s+",
-        lambda m: _maybe_strip(m, " AND "),
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(
-        r"\bWHERE\s+ROWNUM\s*<=\s*(\d+)\s+GROUP\s+BY\b",
-        lambda m: _maybe_strip(m, "GROUP BY"),
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(
-        r"\bWHERE\s+ROWNUM\s*<=\s*(\d+)\s+ORDER\s+BY\b",
-        lambda m: _maybe_strip(m, "ORDER BY"),
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(
-        r"\bWHERE\s+ROWNUM\s*<=\s*(\d+)\b",
-        lambda m: _maybe_strip(m, ""),
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(
-        r"\s+AND\s+ROWNUM\s*<=\s*(\d+)\b",
-        lambda m: _maybe_strip(m, ""),
-        text,
-        flags=re.IGNORECASE,
-    )
+    for pattern, replacement in _GROUPED_ROWNUM_CAP_STRIPS:
+        text = pattern.sub(lambda m: _maybe_strip(m, replacement), text)
 
-    new_text, changed = text, changed
     if changed:
         rules.append("strip_rownum_cap_for_grouped_tables")
-    return new_text, rules
+    return text, rules
 
 
 def _pushdown_outer_predicates(sql: str) -> tuple[str, list[str]]:
@@ -1989,11 +2256,10 @@ def _rewrite_icustays_los(sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _rewrite_warning_flag(question: str, sql: str) -> tuple[str, list[str]]:
+def _rewrite_warning_flag(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    q = question.lower()
-    if "warning" not in q:
+    if "warning" not in question_lower:
         return text, rules
     if not re.search(r"\bCHARTEVENTS\b", text, re.IGNORECASE):
         return text, rules
@@ -2004,11 +2270,10 @@ def _rewrite_warning_flag(question: str, sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _rewrite_lab_priority(question: str, sql: str) -> tuple[str, list[str]]:
+def _rewrite_lab_priority(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    q = question.lower()
-    if "priority" not in q:
+    if "priority" not in question_lower:
         return text, rules
     if not re.search(r"\bLABEVENTS\b", text, re.IGNORECASE):
         return text, rules
@@ -2019,18 +2284,17 @@ def _rewrite_lab_priority(question: str, sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _rewrite_micro_count_field(question: str, sql: str) -> tuple[str, list[str]]:
+def _rewrite_micro_count_field(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     if not re.search(r"\bMICROBIOLOGYEVENTS\b", text, re.IGNORECASE):
         return text, rules
-    q = question.lower()
     target = None
-    if "antibiotic" in q:
+    if "antibiotic" in question_lower:
         target = "AB_NAME"
-    elif "organism" in q:
+    elif "organism" in question_lower:
         target = "ORG_NAME"
-    elif "test" in q:
+    elif "test" in question_lower:
         target = "TEST_NAME"
     if not target:
         return text, rules
@@ -2057,15 +2321,14 @@ def _rewrite_micro_count_field(question: str, sql: str) -> tuple[str, list[str]]
     return text, rules
 
 
-def _ensure_icd_join(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_icd_join(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     if not re.search(r"(?<!\.)\bICD_CODE\b", text, re.IGNORECASE):
         return text, rules
 
-    q = question.lower()
     target = "DIAGNOSES_ICD"
-    if "procedure" in q:
+    if "procedure" in question_lower:
         target = "PROCEDURES_ICD"
 
     if re.search(rf"\b{target}\b", text, re.IGNORECASE):
@@ -2141,7 +2404,7 @@ def _rewrite_duration(sql: str) -> tuple[str, list[str]]:
 def _fix_orphan_by(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    if "GROUP BY" in text.upper():
+    if "GROUP BY" in _sql_upper(text):
         return text, rules
     if not re.search(r"\b(COUNT|AVG|SUM|MIN|MAX)\s*\(", text, re.IGNORECASE):
         return text, rules
@@ -2200,7 +2463,7 @@ def _rewrite_absolute_year_range(question: str, sql: str) -> tuple[str, list[str
     end_year = years[-1]
     if end_year < start_year or (end_year - start_year) > 30:
         return text, rules
-    if "ADD_MONTHS" not in text.upper():
+    if "ADD_MONTHS" not in _sql_upper(text):
         return text, rules
 
     changed = False
@@ -2342,11 +2605,10 @@ def _normalize_count_aliases(sql: str) -> tuple[str, list[str]]:
 
     new_text = _COUNT_ALIAS_RE.sub(repl, text)
     if aliases:
+        alias_re = re.compile(r"\b(?:" + "|".join(map(re.escape, aliases)) + r")\b", re.IGNORECASE)
+
         def fix_order(match: re.Match) -> str:
-            clause = match.group(1)
-            for old in aliases:
-                clause = re.sub(rf"\b{re.escape(old)}\b", "CNT", clause, flags=re.IGNORECASE)
-            return clause
+            return alias_re.sub("CNT", match.group(1))
 
         new_text = re.sub(r"(\border\s+by\b[^;]*)", fix_order, new_text, count=1, flags=re.IGNORECASE)
         rules.append("count_alias_to_cnt")
@@ -2354,7 +2616,7 @@ def _normalize_count_aliases(sql: str) -> tuple[str, list[str]]:
 
 
 def _is_simple_count_aggregate_sql(sql: str) -> bool:
-    upper = sql.upper()
+    upper = _sql_upper(sql)
     if upper.count("COUNT(") != 1:
         return False
     blocked_tokens = ("AVG(", "SUM(", "MIN(", "MAX(", "CASE WHEN", "/")
@@ -2364,7 +2626,7 @@ def _is_simple_count_aggregate_sql(sql: str) -> bool:
 
 
 def _is_simple_avg_aggregate_sql(sql: str) -> bool:
-    upper = sql.upper()
+    upper = _sql_upper(sql)
     if upper.count("AVG(") != 1:
         return False
     blocked_tokens = ("COUNT(", "SUM(", "MIN(", "MAX(", "CASE WHEN", "/")
@@ -2379,21 +2641,24 @@ def _normalize_count_aliases_for_simple_counts(sql: str) -> tuple[str, list[str]
     return _normalize_count_aliases(sql)
 
 
-def _ensure_group_by_not_null_for_simple_counts(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_group_by_not_null_for_simple_counts(question_lower: str, sql: str) -> tuple[str, list[str]]:
     if not _is_simple_count_aggregate_sql(sql):
         return sql, []
-    return _ensure_group_by_not_null(question, sql)
+    return _ensure_group_by_not_null(question_lower, sql)
 
 
-def _ensure_group_by_not_null_for_simple_avg(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_group_by_not_null_for_simple_avg(question_lower: str, sql: str) -> tuple[str, list[str]]:
     if not _is_simple_avg_aggregate_sql(sql):
         return sql, []
-    return _ensure_group_by_not_null(question, sql)
+    return _ensure_group_by_not_null(question_lower, sql)
 
 
 def _rewrite_avg_count_alias(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
+    upper = _sql_upper(text)
+    if "AVG" not in upper and "STDDEV" not in upper:
+        return text, rules
     aliases_in_order = re.findall(r"\bAS\s+([A-Za-z_][A-Za-z0-9_$#]*)\b", text, flags=re.IGNORECASE)
     projected_aliases = {alias.upper() for alias in aliases_in_order}
     count_like_aliases: list[str] = []
@@ -2455,57 +2720,49 @@ def _rewrite_avg_count_alias(sql: str) -> tuple[str, list[str]]:
 
 def _normalize_avg_aliases(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
-    text = sql
-    alias_map = {
-        "DOSES_PER_24_HRS": "avg_doses",
-        "AMOUNT": "avg_amount",
-        "VALUE": "avg_value",
-        "ANCHOR_AGE": "avg_age",
-        "LOS": "avg_los",
-        "DIAGNOSIS_COUNT": "avg_diag",
-        "DIAG_CNT": "avg_diag",
-        "PROCEDURE_COUNT": "avg_proc",
-        "PROC_CNT": "avg_proc",
-    }
-    for col, alias in alias_map.items():
-        pattern = re.compile(
-            rf"AVG\(\s*([A-Za-z0-9_\.]*{col})\s*\)\s+AS\s+[A-Za-z0-9_]+",
-            re.IGNORECASE,
-        )
-        if pattern.search(text):
-            text = pattern.sub(lambda m: f"AVG({m.group(1)}) AS {alias}", text)
+    if "AVG(" not in _sql_upper(sql):
+        return sql, rules
+    matched: set[str] = set()
+
+    def repl(match: re.Match) -> str:
+        col = match.group(2).upper()
+        matched.add(col)
+        return f"AVG({match.group(1)}) AS {_AVG_ALIAS_MAP[col]}"
+
+    text = _AVG_ALIAS_RE.sub(repl, sql)
+    for col in _AVG_ALIAS_MAP:
+        if col in matched:
             rules.append(f"avg_alias_{col.lower()}")
     return text, rules
 
 
-def _fix_order_by_bad_alias(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = sql
-    if _ORDER_BY_BAD_COUNT_RE.search(text):
-        text = _ORDER_BY_BAD_COUNT_RE.sub("ORDER BY CNT", text)
-        rules.append("order_by_bad_alias_to_cnt")
-    if re.search(r"\bORDER\s+BY\s+CNT\s*\(\s*\*\s*\)\s+CNT\b", text, re.IGNORECASE):
-        text = re.sub(r"\bORDER\s+BY\s+CNT\s*\(\s*\*\s*\)\s+CNT\b", "ORDER BY CNT", text, flags=re.IGNORECASE)
-        rules.append("order_by_cnt_star")
-    if re.search(r"\bORDER\s+BY\s+COUNT\(\*\)\s+CNT\b", text, re.IGNORECASE):
-        text = re.sub(r"\bORDER\s+BY\s+COUNT\(\*\)\s+CNT\b", "ORDER BY CNT", text, flags=re.IGNORECASE)
-        rules.append("order_by_count_cnt")
+def _apply_literal_fixups(sql: str) -> tuple[str, list[str]]:
+    matched: set[str] = set()
+
+    def repl(match: re.Match) -> str:
+        replacement, fixup_rules = _MASTER_FIXUP_HANDLERS[str(match.lastgroup)]
+        matched.update(fixup_rules)
+        return replacement
+
+    text = _MASTER_FIXUPS_RE.sub(repl, sql)
+    rules = [rule for rule in _MASTER_FIXUP_RULE_ORDER if rule in matched]
     return text, rules
 
 
 def _fix_order_by_count_suffix(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    if not re.search(r"\bORDER\s+BY\b", text, re.IGNORECASE):
+    text_upper = _sql_upper(text)
+    if "ORDER" not in text_upper or "CNT" not in text_upper:
         return text, rules
     if not re.search(r"\bCNT\b", text, re.IGNORECASE):
         return text, rules
     match = re.search(r"\bORDER\s+BY\s+([A-Za-z0-9_]+)(\s+DESC|\s+ASC)?\b", text, re.IGNORECASE)
     if not match:
         return text, rules
-    alias = match.group(1)
+    alias_upper = match.group(1).upper()
     direction = match.group(2) or ""
-    if alias.upper() != "CNT" and alias.upper().endswith("_COUNT"):
+    if alias_upper != "CNT" and alias_upper.endswith("_COUNT"):
         text = re.sub(
             r"\bORDER\s+BY\s+[A-Za-z0-9_]+(\s+DESC|\s+ASC)?\b",
             f"ORDER BY CNT{direction}",
@@ -2592,11 +2849,13 @@ def _strip_unrequested_top_n_cap(question: str, sql: str) -> tuple[str, list[str
     if outer:
         inner = outer.group(1).strip()
         limit = outer.group(2)
-        if _is_small_topn(limit) and ("GROUP BY" in inner.upper() or "ORDER BY" in inner.upper()):
+        inner_upper = inner.upper()
+        if _is_small_topn(limit) and ("GROUP BY" in inner_upper or "ORDER BY" in inner_upper):
             rules.append(f"strip_unrequested_top_n_rownum:{limit}")
             return inner, rules
 
-    if "GROUP BY" in text.upper() or "ORDER BY" in text.upper():
+    text_upper = _sql_upper(text)
+    if "GROUP BY" in text_upper or "ORDER BY" in text_upper:
         match = re.search(r"\bROWNUM\s*<=\s*(\d+)\b", text, re.IGNORECASE)
         if match and _is_small_topn(match.group(1)):
             stripped, changed = _strip_rownum_predicates(text)
@@ -2634,7 +2893,7 @@ def _enforce_top_n_wrapper(question: str, sql: str) -> tuple[str, list[str]]:
         text = stripped
         rules.append("strip_rownum_before_top_n")
 
-    if "ORDER BY" not in text.upper():
+    if "ORDER BY" not in _sql_upper(text):
         return text, rules
 
     wrapped = _wrap_with_rownum(text, n)
@@ -2654,7 +2913,7 @@ def _apply_monthly_trend_default_cap(question: str, sql: str, default_n: int = 1
     if not _MONTHLY_TREND_INTENT_RE.search(str(question or "")):
         return text, rules
 
-    upper = text.upper()
+    upper = _sql_upper(text)
     if "GROUP BY" not in upper or "ORDER BY" not in upper:
         return text, rules
     if "ROWNUM" in upper or _LIMIT_RE.search(text) or _FETCH_RE.search(text):
@@ -2689,7 +2948,7 @@ def _strip_first_icu_rownum_for_careunit_counts(question: str, sql: str) -> tupl
     if _FIRST_ICU_INTENT_RE.search(q):
         return text, rules
 
-    upper = text.upper()
+    upper = _sql_upper(text)
     if "ICUSTAYS" not in upper or "ROW_NUMBER(" not in upper:
         return text, rules
     if "GROUP BY" not in upper or "FIRST_CAREUNIT" not in upper:
@@ -2739,7 +2998,7 @@ def _apply_first_careunit_default_cap(question: str, sql: str, default_n: int =
     if not first_careunit_intent:
         return text, rules
 
-    upper = text.upper()
+    upper = _sql_upper(text)
     if "ROWNUM" in upper or _LIMIT_RE.search(text) or _FETCH_RE.search(text):
         return text, rules
     if "ICUSTAYS" not in upper or "GROUP BY" not in upper or "ORDER BY" not in upper:
@@ -3107,7 +3366,7 @@ def _rewrite_icu_mortality_outcome_alignment(question: str, sql: str) -> tuple[s
         return sql, rules
     if not (_ICU_QUERY_INTENT_RE.search(q) and _MORTALITY_QUERY_INTENT_RE.search(q)):
         return sql, rules
-    upper = text.upper()
+    upper = _sql_upper(text)
     if "ADMISSIONS" not in upper:
         return sql, rules
     span = _find_final_select_from_span(text)
@@ -3228,7 +3487,7 @@ def _rewrite_admissions_icd_count_grain(question: str, sql: str) -> tuple[str, l
     text = str(sql or "").strip()
     if not text:
         return sql, rules
-    upper = text.upper()
+    upper = _sql_upper(text)
     if "GROUP BY" in upper:
         return sql, rules
     if "ADMISSIONS" not in upper:
@@ -3271,18 +3530,7 @@ def _rewrite_admissions_icd_count_grain(question: str, sql: str) -> tuple[str, l
 
 def _infer_gender_count_target(question: str) -> tuple[str, str] | None:
     q = str(question or "").lower()
-    mapping: list[tuple[tuple[str, ...], tuple[str, str]]] = [
-        (("diagnos", "진단"), ("DIAGNOSES_ICD", "dx")),
-        (("procedur", "시술", "수술"), ("PROCEDURES_ICD", "pr")),
-        (("transfer", "이동"), ("TRANSFERS", "t")),
-        (("service", "서비스"), ("SERVICES", "s")),
-        (("prescription", "약물", "처방", "drug", "medication"), ("PRESCRIPTIONS", "r")),
-        (("chart event", "chart", "차트"), ("CHARTEVENTS", "c")),
-        (("lab event", "lab", "검사"), ("LABEVENTS", "l")),
-        (("icu",), ("ICUSTAYS", "i")),
-        (("admission", "입원"), ("ADMISSIONS", "a")),
-    ]
-    for tokens, target in mapping:
+    for tokens, target in _GENDER_COUNT_TARGETS:
         if any(token in q for token in tokens):
             return target
     return None
@@ -3294,6 +3542,9 @@ def _rewrite_count_by_gender_template(question: str, sql: str) -> tuple[str, lis
     if not q:
         return sql, rules
     q_lower = q.lower()
+    # Both intent patterns need a literal gender token; reject before running them.
+    if "gender" not in q_lower and "성별" not in q:
+        return sql, rules
     by_gender_intent = bool(_COUNT_BY_GENDER_EN_RE.search(q_lower) or _COUNT_BY_GENDER_KO_RE.search(q))
     if not by_gender_intent:
         return sql, rules
@@ -3301,14 +3552,14 @@ def _rewrite_count_by_gender_template(question: str, sql: str) -> tuple[str, lis
         return sql, rules
 
     text = str(sql or "").strip()
-    upper = text.upper()
+    upper = _sql_upper(text)
     if "COUNT(" not in upper or "GENDER" not in upper:
         return sql, rules
 
     target = _infer_gender_count_target(q)
     if not target:
         return sql, rules
-    target_table, target_alias = target
+    target_table = target[0]
     suspicious = (
         "CUSTOMER" in upper
         or "ACCOUNT" in upper
@@ -3320,16 +3571,8 @@ def _rewrite_count_by_gender_template(question: str, sql: str) -> tuple[str, lis
     if not suspicious:
         return sql, rules
 
-    rewritten = (
-        f"SELECT p.GENDER, COUNT(*) AS CNT "
-        f"FROM {target_table} {target_alias} "
-        f"JOIN PATIENTS p ON {target_alias}.SUBJECT_ID = p.SUBJECT_ID "
-        f"WHERE p.GENDER IS NOT NULL "
-        f"GROUP BY p.GENDER "
-        f"ORDER BY CNT DESC"
-    )
     rules.append(f"count_by_gender_template:{target_table}")
-    return rewritten, rules
+    return _COUNT_BY_GENDER_SQL[target_table], rules
 
 
 def _rewrite_age_group_diagnosis_extrema_by_gender(question: str, sql: str) -> tuple[str, list[str]]:
@@ -3346,7 +3589,7 @@ def _rewrite_age_group_diagnosis_extrema_by_gender(question: str, sql: str) -> t
         return sql, rules
 
     text = str(sql or "").strip().rstrip(";")
-    upper = text.upper()
+    upper = _sql_upper(text)
     if "PATIENTS" not in upper or "DIAGNOSES_ICD" not in upper or "COUNT(" not in upper:
         return sql, rules
     if re.search(r"\bPARTITION\s+BY\b[^\n;]*\bAGE_GROUP\b", upper, re.IGNORECASE):
@@ -3423,24 +3666,14 @@ def _rewrite_age_group_diagnosis_extrema_by_gender(question: str, sql: str) -> t
     return rewritten, rules
 
 
-def _strip_for_update(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = sql
-    if _FOR_UPDATE_RE.search(text):
-        text = _FOR_UPDATE_RE.sub("", text)
-        rules.append("strip_for_update")
-    return text, rules
-
-
-def _wrap_top_n(question: str, sql: str) -> tuple[str, list[str]]:
+def _wrap_top_n(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     if re.search(r"\bROWNUM\b", text, re.IGNORECASE) or _LIMIT_RE.search(text) or _FETCH_RE.search(text):
         return text, rules
 
-    q = question.lower()
-    match = re.search(r"\btop\s+(\d+)\b", q)
-    if not match and not any(k in q for k in ("top", "most", "highest")):
+    match = _TOP_N_EN_RE.search(question_lower)
+    if not match and not any(k in question_lower for k in ("top", "most", "highest")):
         return text, rules
     n = int(match.group(1)) if match else 10
     if n <= 0:
@@ -3454,6 +3687,8 @@ def _wrap_top_n(question: str, sql: str) -> tuple[str, list[str]]:
 def _reorder_count_select(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
+    if "COUNT(*)" not in _sql_upper(text):
+        return text, rules
     pattern = re.compile(
         r"^\s*SELECT\s+COUNT\(\*\)\s+AS\s+CNT\s*,\s*([A-Za-z0-9_\.]+)\s+FROM",
         re.IGNORECASE,
@@ -3470,6 +3705,8 @@ def _reorder_count_select(sql: str) -> tuple[str, list[str]]:
 def _reorder_avg_select(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
+    if "AVG(" not in _sql_upper(text):
+        return text, rules
     pattern = re.compile(
         r"^\s*SELECT\s+AVG\(\s*([A-Za-z0-9_\.]+)\s*\)\s+AS\s+([A-Za-z0-9_]+)\s*,\s*([A-Za-z0-9_\.]+)\s+FROM",
         re.IGNORECASE,
@@ -3488,6 +3725,8 @@ def _reorder_avg_select(sql: str) -> tuple[str, list[str]]:
 def _ensure_avg_not_null(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
+    if "AVG" not in _sql_upper(text):
+        return text, rules
     if re.search(r"\bFROM\s*\(\s*SELECT\b", text, re.IGNORECASE):
         # Avoid injecting predicates into inner GROUP BY blocks of derived tables.
         return text, rules
@@ -3502,34 +3741,26 @@ def _ensure_avg_not_null(sql: str) -> tuple[str, list[str]]:
 
     for expr in avg_exprs:
         col = expr.split(".")[-1]
-        if re.search(rf"\b{re.escape(expr)}\b\s+IS\s+NOT\s+NULL", text, re.IGNORECASE):
+        if _not_null_re(expr).search(text):
             continue
-        if re.search(rf"(?<!\.)\b{re.escape(col)}\b\s+IS\s+NOT\s+NULL", text, re.IGNORECASE):
+        if _not_null_re(col, unqualified=True).search(text):
             continue
 
         predicate = f"{expr} IS NOT NULL"
-        if re.search(r"\bwhere\b", text, re.IGNORECASE):
-            text = re.sub(r"\bwhere\b", f"WHERE {predicate} AND", text, count=1, flags=re.IGNORECASE)
-        elif re.search(r"\bgroup\s+by\b", text, re.IGNORECASE):
-            text = re.sub(r"\bgroup\s+by\b", f"WHERE {predicate} GROUP BY", text, count=1, flags=re.IGNORECASE)
-        elif re.search(r"\border\s+by\b", text, re.IGNORECASE):
-            text = re.sub(r"\border\s+by\b", f"WHERE {predicate} ORDER BY", text, count=1, flags=re.IGNORECASE)
-        else:
-            text = text.rstrip(";") + f" WHERE {predicate}"
+        text = _inject_where_predicate(text, predicate)
         rules.append(f"avg_not_null_{col.lower()}")
 
     return text, rules
 
 
-def _strip_transfers_eventtype_filter(question: str, sql: str) -> tuple[str, list[str]]:
+def _strip_transfers_eventtype_filter(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     if not re.search(r"\bTRANSFERS\b", text, re.IGNORECASE):
         return text, rules
 
-    q = question.lower()
     explicit_eventtype_intent = any(
-        token in q
+        token in question_lower
         for token in (
             "event type",
             "eventtype",
@@ -3587,7 +3818,7 @@ def _strip_invalid_eventtype_filter_for_non_transfers(sql: str) -> tuple[str, li
     text = str(sql or "").strip()
     if not text:
         return sql, rules
-    if "EVENTTYPE" not in text.upper():
+    if "EVENTTYPE" not in _sql_upper(text):
         return text, rules
     if re.search(r"\bTRANSFERS\b", text, re.IGNORECASE):
         return text, rules
@@ -3628,15 +3859,14 @@ def _strip_invalid_eventtype_filter_for_non_transfers(sql: str) -> tuple[str, li
     return text, rules
 
 
-def _strip_inpatient_admission_type_filter(question: str, sql: str) -> tuple[str, list[str]]:
+def _strip_inpatient_admission_type_filter(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     if not re.search(r"\bADMISSION_TYPE\b\s*=\s*'INPATIENT'", text, re.IGNORECASE):
         return text, rules
 
-    q = question.lower()
     explicit_admission_type_intent = any(
-        token in q
+        token in question_lower
         for token in (
             "admission type",
             "admission_type",
@@ -3689,42 +3919,48 @@ def _strip_inpatient_admission_type_filter(question: str, sql: str) -> tuple[str
     return text, rules
 
 
-def _strip_time_window_if_absent(question: str, sql: str) -> tuple[str, list[str]]:
+def _repl_dangling_where(match: re.Match[str]) -> str:
+    kind = match.lastgroup
+    if kind in ("where_and_kw", "where_kw"):
+        return match.group(kind)
+    if kind == "where_and":
+        return "WHERE"
+    if kind == "and_and":
+        return "AND"
+    return ""
+
+
+def _strip_time_window_if_absent(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    q = question.lower()
-    if _QUESTION_TIME_INTENT_RE.search(q):
+    if _QUESTION_TIME_INTENT_RE.search(question_lower):
         return text, rules
 
     if not _TIME_WINDOW_RE.search(text):
         return text, rules
 
     text = _TIME_WINDOW_RE.sub("", text)
-    text = re.sub(r"\bWHERE\s+AND\b", "WHERE", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bAND\s+AND\b", "AND", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bWHERE\s*(GROUP|ORDER)\b", r"\1", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bWHERE\s*$", "", text, flags=re.IGNORECASE)
+    text = _DANGLING_WHERE_RE.sub(_repl_dangling_where, text)
     rules.append("strip_time_window")
     return text, rules
 
 
-def _ensure_group_by_not_null(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_group_by_not_null(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     outer = _OUTER_ROWNUM_RE.match(text.strip().rstrip(";"))
     if outer:
         inner = outer.group(1).strip()
         limit = outer.group(2)
-        inner_fixed, inner_rules = _ensure_group_by_not_null(question, inner)
+        inner_fixed, inner_rules = _ensure_group_by_not_null(question_lower, inner)
         if inner_fixed != inner:
             rules.extend(inner_rules)
             rules.append("group_by_not_null_inner")
             return f"SELECT * FROM ({inner_fixed}) WHERE ROWNUM <= {limit}", rules
         return text, rules
-    if "GROUP BY" not in text.upper():
+    if "GROUP BY" not in _sql_upper(text):
         return text, rules
-    q = question.lower()
-    if "by" not in q and "count" not in q:
+    if "by" not in question_lower and "count" not in question_lower:
         return text, rules
 
     match = re.search(r"\bgroup\s+by\b\s+(.+?)(?:\border\s+by\b|$)", text, re.IGNORECASE | re.DOTALL)
@@ -3732,45 +3968,36 @@ def _ensure_group_by_not_null(question: str, sql: str) -> tuple[str, list[str]]:
         return text, rules
     group_clause = match.group(1)
     cols = [c.strip() for c in group_clause.split(",") if c.strip()]
-    simple_cols = []
-    for col in cols:
-        if _IDENT_RE.fullmatch(col) or re.fullmatch(r"[A-Za-z_][A-Za-z0-9_$#\\.]*", col):
-            simple_cols.append(col)
+    simple_cols = [col for col in cols if _ANY_IDENT_RE.fullmatch(col)]
     if not simple_cols:
         return text, rules
 
-    filters = []
-    for col in simple_cols:
-        if re.search(rf"\b{re.escape(col)}\b\s+IS\s+NOT\s+NULL", text, re.IGNORECASE):
-            continue
-        filters.append(f"{col} IS NOT NULL")
+    # Zero-width scan so a qualified column (a.b) does not hide a bare one (b).
+    not_null_re = re.compile(
+        r"(?=\b(" + "|".join(map(re.escape, simple_cols)) + r")\b\s+IS\s+NOT\s+NULL)",
+        re.IGNORECASE,
+    )
+    already_not_null = {m.group(1).lower() for m in not_null_re.finditer(text)}
+    filters = [f"{col} IS NOT NULL" for col in simple_cols if col.lower() not in already_not_null]
 
     if not filters:
         return text, rules
 
     predicate = " AND ".join(filters)
-    if re.search(r"\bwhere\b", text, re.IGNORECASE):
-        text = re.sub(r"\bwhere\b", f"WHERE {predicate} AND", text, count=1, flags=re.IGNORECASE)
-    else:
-        if re.search(r"\bgroup\s+by\b", text, re.IGNORECASE):
-            text = re.sub(r"\bgroup\s+by\b", f"WHERE {predicate} GROUP BY", text, count=1, flags=re.IGNORECASE)
-        elif re.search(r"\border\s+by\b", text, re.IGNORECASE):
-            text = re.sub(r"\border\s+by\b", f"WHERE {predicate} ORDER BY", text, count=1, flags=re.IGNORECASE)
-        else:
-            text = text.rstrip(";") + f" WHERE {predicate}"
+    text = _inject_where_predicate(text, predicate)
     rules.append("group_by_not_null")
     return text, rules
 
 
-def _ensure_order_by_count(question: str, sql: str) -> tuple[str, list[str]]:
+def _ensure_order_by_count(question_lower: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    if "GROUP BY" not in text.upper() or "COUNT(" not in text.upper():
+    text_upper = _sql_upper(text)
+    if "GROUP BY" not in text_upper or "COUNT(" not in text_upper:
         return text, rules
     if re.search(r"\border\s+by\b", text, re.IGNORECASE):
         return text, rules
-    q = question.lower()
-    if "by" not in q and "top" not in q and "count" not in q and "most" not in q and "highest" not in q:
+    if not any(k in question_lower for k in ("by", "top", "count", "most", "highest")):
         return text, rules
 
     order_expr = "CNT"
@@ -3784,16 +4011,17 @@ def _ensure_order_by_count(question: str, sql: str) -> tuple[str, list[str]]:
 
 def _dedupe_table_alias(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
-    text = sql
-    text2 = re.sub(r"\b(from|join)\s+([A-Za-z0-9_]+)\s+\2\b", r"\1 \2", text, flags=re.IGNORECASE)
-    if text2 != text:
+    text, count = _DEDUPE_ALIAS_RE.subn(r"\1 \2", sql)
+    if count:
         rules.append("dedupe_table_alias")
-    return text2, rules
+    return text, rules
 
 
 def _rewrite_timestampdiff(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
+    if "TIMESTAMPDIFF" not in _sql_upper(text):
+        return text, rules
 
     def repl(match: re.Match) -> str:
         start = match.group(1)
@@ -3809,6 +4037,8 @@ def _rewrite_timestampdiff(sql: str) -> tuple[str, list[str]]:
 def _rewrite_extract_year(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
+    if "EXTRACT" not in _sql_upper(text):
+        return text, rules
 
     def repl(match: re.Match) -> str:
         expr = match.group(1)
@@ -3823,32 +4053,14 @@ def _rewrite_extract_year(sql: str) -> tuple[str, list[str]]:
     return new_text, rules
 
 
-def _rewrite_icu_stay(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = sql
-    if not _ICU_STAY_RE.search(text):
-        return text, rules
-
-    alias = _find_table_alias(text, "ADMISSIONS")
-    if alias is None:
-        return text, rules
-
-    replacement = (
-        f"EXISTS (SELECT 1 FROM ICUSTAYS i "
-        f"WHERE {alias}.HADM_ID = i.HADM_ID AND {alias}.SUBJECT_ID = i.SUBJECT_ID)"
-    )
-    text = _ICU_STAY_RE.sub(replacement, text)
-    rules.append("icu_stay_to_icustays")
-    return text, rules
-
-
-def _rewrite_icustays_flag(sql: str) -> tuple[str, list[str]]:
+def _rewrite_icu_flags(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    if not _ICUSTAYS_FLAG_RE.search(text):
+    if not _ICU_FLAG_RE.search(text):
         return text, rules
 
-    alias = _find_table_alias(text, "ADMISSIONS")
+    adm_alias = _find_table_alias(text, "ADMISSIONS")
+    alias = adm_alias
     if alias is None:
         m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
         if m:
@@ -3859,46 +4071,33 @@ def _rewrite_icustays_flag(sql: str) -> tuple[str, list[str]]:
             if base_table.upper() in _tables_with_hadm_id():
                 alias = base_alias
 
-    replacement = "HADM_ID IN (SELECT HADM_ID FROM ICUSTAYS)"
-    if alias and _find_table_alias(text, "ADMISSIONS"):
-        replacement = (
-            f"EXISTS (SELECT 1 FROM ICUSTAYS i "
-            f"WHERE {alias}.HADM_ID = i.HADM_ID AND {alias}.SUBJECT_ID = i.SUBJECT_ID)"
-        )
+    exists_replacement = (
+        f"EXISTS (SELECT 1 FROM ICUSTAYS i "
+        f"WHERE {alias}.HADM_ID = i.HADM_ID AND {alias}.SUBJECT_ID = i.SUBJECT_ID)"
+    )
+    membership_replacement = "HADM_ID IN (SELECT HADM_ID FROM ICUSTAYS)"
+    if adm_alias:
+        membership_replacement = exists_replacement
     elif alias:
-        replacement = f"{alias}.HADM_ID IN (SELECT HADM_ID FROM ICUSTAYS)"
-    text = _ICUSTAYS_FLAG_RE.sub(replacement, text)
-    rules.append("icustays_flag_to_icustays")
-    return text, rules
+        membership_replacement = f"{alias}.HADM_ID IN (SELECT HADM_ID FROM ICUSTAYS)"
 
+    matched: set[str] = set()
 
-def _rewrite_icustays_not_null(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = sql
-    if not _ICUSTAYS_NOT_NULL_RE.search(text):
-        return text, rules
-
-    alias = _find_table_alias(text, "ADMISSIONS")
-    if alias is None:
-        m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
-        if m:
-            base_table = m.group(1)
-            base_alias = m.group(2) or base_table
-            if base_alias.upper() in {"WHERE", "JOIN", "GROUP", "ORDER"}:
-                base_alias = base_table
-            if base_table.upper() in _tables_with_hadm_id():
-                alias = base_alias
-
-    replacement = "HADM_ID IN (SELECT HADM_ID FROM ICUSTAYS)"
-    if alias and _find_table_alias(text, "ADMISSIONS"):
-        replacement = (
-            f"EXISTS (SELECT 1 FROM ICUSTAYS i "
-            f"WHERE {alias}.HADM_ID = i.HADM_ID AND {alias}.SUBJECT_ID = i.SUBJECT_ID)"
-        )
-    elif alias:
-        replacement = f"{alias}.HADM_ID IN (SELECT HADM_ID FROM ICUSTAYS)"
-    text = _ICUSTAYS_NOT_NULL_RE.sub(replacement, text)
-    rules.append("icustays_not_null_to_icustays")
+    def repl(match: re.Match) -> str:
+        kind = str(match.lastgroup)
+        if kind in {"has_icu_stay", "icu_stay"}:
+            # Bare stay flags are only rewritten against an ADMISSIONS alias.
+            if adm_alias is None:
+                return match.group(0)
+            matched.add(kind)
+            return exists_replacement
+        matched.add(kind)
+        return membership_replacement
+
+    text = _ICU_FLAG_RE.sub(repl, text)
+    for kind, rule in _ICU_FLAG_RULES.items():
+        if kind in matched:
+            rules.append(rule)
     return text, rules
 
 
@@ -3906,18 +4105,18 @@ def _ensure_label_join(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
 
-    if not re.search(r"(?<!\.)\bLABEL\b", text, re.IGNORECASE):
+    if not _LABEL_REF_RE.search(text):
         return text, rules
 
     # If label is already available via D_ITEMS or D_LABITEMS, skip
-    if re.search(r"\bD_ITEMS\b", text, re.IGNORECASE) or re.search(r"\bD_LABITEMS\b", text, re.IGNORECASE):
+    if _LABEL_LOOKUP_TABLE_RE.search(text):
         return text, rules
 
     injected, inject_rules = _inject_join_in_outer(
         text,
         "CHARTEVENTS",
-        " JOIN D_ITEMS d ON {alias}.ITEMID = d.ITEMID",
-        r"(?<!\.)\bLABEL\b",
+        _LOOKUP_JOIN_TEMPLATES["CHARTEVENTS"],
+        _LABEL_REF_RE,
         "d.LABEL",
     )
     if injected:
@@ -3927,17 +4126,16 @@ def _ensure_label_join(sql: str) -> tuple[str, list[str]]:
 
     if re.search(r"\bCHARTEVENTS\b", text, re.IGNORECASE):
         alias = _find_table_alias(text, "CHARTEVENTS") or "CHARTEVENTS"
-        join_clause = f" JOIN D_ITEMS d ON {alias}.ITEMID = d.ITEMID"
-        text = _insert_join(text, join_clause)
-        text = re.sub(r"(?<!\.)\bLABEL\b", "d.LABEL", text, flags=re.IGNORECASE)
+        text = _insert_join(text, _build_lookup_join("CHARTEVENTS", alias))
+        text = _LABEL_REF_RE.sub("d.LABEL", text)
         rules.append("join_d_items_for_label")
         return text, rules
 
     injected, inject_rules = _inject_join_in_outer(
         text,
         "LABEVENTS",
-        " JOIN D_LABITEMS d ON {alias}.ITEMID = d.ITEMID",
-        r"(?<!\.)\bLABEL\b",
+        _LOOKUP_JOIN_TEMPLATES["LABEVENTS"],
+        _LABEL_REF_RE,
         "d.LABEL",
     )
     if injected:
@@ -3947,9 +4145,8 @@ def _ensure_label_join(sql: str) -> tuple[str, list[str]]:
 
     if re.search(r"\bLABEVENTS\b", text, re.IGNORECASE):
         alias = _find_table_alias(text, "LABEVENTS") or "LABEVENTS"
-        join_clause = f" JOIN D_LABITEMS d ON {alias}.ITEMID = d.ITEMID"
-        text = _insert_join(text, join_clause)
-        text = re.sub(r"(?<!\.)\bLABEL\b", "d.LABEL", text, flags=re.IGNORECASE)
+        text = _insert_join(text, _build_lookup_join("LABEVENTS", alias))
+        text = _LABEL_REF_RE.sub("d.LABEL", text)
         rules.append("join_d_labitems_for_label")
         return text, rules
 
@@ -3960,17 +4157,17 @@ def _ensure_long_title_join(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
 
-    if not re.search(r"(?<!\.)\bLONG_TITLE\b", text, re.IGNORECASE):
+    if not _LONG_TITLE_REF_RE.search(text):
         return text, rules
 
-    if re.search(r"\bD_ICD_DIAGNOSES\b", text, re.IGNORECASE) or re.search(r"\bD_ICD_PROCEDURES\b", text, re.IGNORECASE):
+    if _LONG_TITLE_LOOKUP_TABLE_RE.search(text):
         return text, rules
 
     injected, inject_rules = _inject_join_in_outer(
         text,
         "DIAGNOSES_ICD",
-        " JOIN D_ICD_DIAGNOSES d ON {alias}.ICD_CODE = d.ICD_CODE AND {alias}.ICD_VERSION = d.ICD_VERSION",
-        r"(?<!\.)\bLONG_TITLE\b",
+        _LOOKUP_JOIN_TEMPLATES["DIAGNOSES_ICD"],
+        _LONG_TITLE_REF_RE,
         "d.LONG_TITLE",
     )
     if injected:
@@ -3980,17 +4177,16 @@ def _ensure_long_title_join(sql: str) -> tuple[str, list[str]]:
 
     if re.search(r"\bDIAGNOSES_ICD\b", text, re.IGNORECASE):
         alias = _find_table_alias(text, "DIAGNOSES_ICD") or "DIAGNOSES_ICD"
-        join_clause = f" JOIN D_ICD_DIAGNOSES d ON {alias}.ICD_CODE = d.ICD_CODE AND {alias}.ICD_VERSION = d.ICD_VERSION"
-        text = _insert_join(text, join_clause)
-        text = re.sub(r"(?<!\.)\bLONG_TITLE\b", "d.LONG_TITLE", text, flags=re.IGNORECASE)
+        text = _insert_join(text, _build_lookup_join("DIAGNOSES_ICD", alias))
+        text = _LONG_TITLE_REF_RE.sub("d.LONG_TITLE", text)
         rules.append("join_d_icd_diagnoses_for_long_title")
         return text, rules
 
     injected, inject_rules = _inject_join_in_outer(
         text,
         "PROCEDURES_ICD",
-        " JOIN D_ICD_PROCEDURES d ON {alias}.ICD_CODE = d.ICD_CODE AND {alias}.ICD_VERSION = d.ICD_VERSION",
-        r"(?<!\.)\bLONG_TITLE\b",
+        _LOOKUP_JOIN_TEMPLATES["PROCEDURES_ICD"],
+        _LONG_TITLE_REF_RE,
         "d.LONG_TITLE",
     )
     if injected:
@@ -4000,35 +4196,14 @@ def _ensure_long_title_join(sql: str) -> tuple[str, list[str]]:
 
     if re.search(r"\bPROCEDURES_ICD\b", text, re.IGNORECASE):
         alias = _find_table_alias(text, "PROCEDURES_ICD") or "PROCEDURES_ICD"
-        join_clause = f" JOIN D_ICD_PROCEDURES d ON {alias}.ICD_CODE = d.ICD_CODE AND {alias}.ICD_VERSION = d.ICD_VERSION"
-        text = _insert_join(text, join_clause)
-        text = re.sub(r"(?<!\.)\bLONG_TITLE\b", "d.LONG_TITLE", text, flags=re.IGNORECASE)
+        text = _insert_join(text, _build_lookup_join("PROCEDURES_ICD", alias))
+        text = _LONG_TITLE_REF_RE.sub("d.LONG_TITLE", text)
         rules.append("join_d_icd_procedures_for_long_title")
         return text, rules
 
     return text, rules
 
 
-def _rewrite_has_icu_stay(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = sql
-    if not _HAS_ICU_RE.search(text):
-        return text, rules
-
-    alias = _find_table_alias(text, "ADMISSIONS")
-
-    if alias is None:
-        return text, rules
-
-    replacement = (
-        f"EXISTS (SELECT 1 FROM ICUSTAYS i "
-        f"WHERE {alias}.HADM_ID = i.HADM_ID AND {alias}.SUBJECT_ID = i.SUBJECT_ID)"
-    )
-    text = _HAS_ICU_RE.sub(replacement, text)
-    rules.append("has_icu_stay_to_icustays")
-    return text, rules
-
-
 def _align_admissions_icu_match_keys(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
@@ -4038,9 +4213,9 @@ def _align_admissions_icu_match_keys(sql: str) -> tuple[str, list[str]]:
 
     admissions_table = str(cfg.get("admissions_table") or "ADMISSIONS").strip().upper() or "ADMISSIONS"
     icu_table = str(cfg.get("icustays_table") or "ICUSTAYS").strip().upper() or "ICUSTAYS"
-    if not re.search(rf"\b{re.escape(admissions_table)}\b", text, re.IGNORECASE):
+    if not _word_re(admissions_table).search(text):
         return text, rules
-    if not re.search(rf"\b{re.escape(icu_table)}\b", text, re.IGNORECASE):
+    if not _word_re(icu_table).search(text):
         return text, rules
 
     adm_alias = _find_table_alias(text, admissions_table) or admissions_table
@@ -4140,7 +4315,7 @@ def _rewrite_title_filter_with_icd_map(
         return text, rules
 
     table_name = str(cfg.get("table_name") or default_table_name).strip().upper() or default_table_name
-    if not re.search(rf"\b{re.escape(table_name)}\b", text, re.IGNORECASE):
+    if not _word_re(table_name).search(text):
         return text, rules
     if not _DIAGNOSIS_TITLE_FILTER_RE.search(text):
         return text, rules
@@ -4227,7 +4402,7 @@ def _rewrite_mortality_avg_under_icd_join(sql: str) -> tuple[str, list[str]]:
         return text, rules
     if not re.search(r"\bAVG\s*\(", text, re.IGNORECASE):
         return text, rules
-    if not re.search(rf"\b{re.escape(outcome_column)}\b", text, re.IGNORECASE):
+    if not _word_re(outcome_column).search(text):
         return text, rules
 
     adm_alias = _find_table_alias(text, admissions_table)
@@ -4272,7 +4447,7 @@ def _rewrite_ratio_denominator_distinct_under_icd_join(sql: str) -> tuple[str, l
     text = sql
     if not _JOIN_ICD_TABLE_RE.search(text):
         return text, rules
-    if "/" not in text or "COUNT(" not in text.upper():
+    if "/" not in text or "COUNT(" not in _sql_upper(text):
         return text, rules
 
     admissions_alias = _find_table_alias(text, "ADMISSIONS")
@@ -4316,7 +4491,7 @@ def recommend_postprocess_profile(
 
     q = str(question or "")
     text = str(sql or "")
-    upper = text.upper()
+    upper = _sql_upper(text)
     reasons: list[str] = []
 
     if _RATIO_INTENT_RE.search(q) and _JOIN_ICD_TABLE_RE.search(upper):
@@ -5032,9 +5207,9 @@ def _rewrite_label_filter_by_intent_profile(question: str, sql: str) -> tuple[st
             continue
         table_name = str(profile.get("table") or "D_ITEMS").strip().upper() or "D_ITEMS"
         event_table = str(profile.get("event_table") or "PROCEDUREEVENTS").strip().upper() or "PROCEDUREEVENTS"
-        if not re.search(rf"\b{re.escape(table_name)}\b", text, re.IGNORECASE):
+        if not _word_re(table_name).search(text):
             continue
-        if event_table and not re.search(rf"\b{re.escape(event_table)}\b", text, re.IGNORECASE):
+        if event_table and not _word_re(event_table).search(text):
             continue
 
         allow_sql_pattern_only = bool(profile.get("allow_sql_pattern_only", False))
@@ -5209,7 +5384,7 @@ def _add_icd_version_for_prefix_filters(sql: str) -> tuple[str, list[str]]:
             return digit_version
         return None
 
-    has_target_table = any(re.search(rf"\b{re.escape(table)}\b", text, re.IGNORECASE) for table in table_names)
+    has_target_table = any(_word_re(table).search(text) for table in table_names)
     if not has_target_table:
         return text, rules
     if not _ICD_CODE_LIKE_RE.search(text):
@@ -5261,7 +5436,8 @@ def _add_icd_version_for_prefix_filters(sql: str) -> tuple[str, list[str]]:
 def _fix_icd_version_prefix_mismatch(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    if "ICD_VERSION" not in text.upper() or "ICD_CODE" not in text.upper():
+    text_upper = _sql_upper(text)
+    if "ICD_VERSION" not in text_upper or "ICD_CODE" not in text_upper:
         return text, rules
 
     changed = False
@@ -5527,216 +5703,299 @@ def _quote_to_char_format_literals(sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _postprocess_sql_relaxed(question: str, sql: str) -> tuple[str, list[str]]:
-    """Apply low-risk SQL fixes only.
-
-    This path is intended for first-pass execution to reduce over-correction.
-    """
-    rules: list[str] = []
-    q = question.strip()
-
-    mapped, map_rules = _apply_schema_mappings(sql)
-    rules.extend(map_rules)
-
-    service_mortality_fixed, service_mortality_rules = _rewrite_service_mortality_query(q, mapped)
-    rules.extend(service_mortality_rules)
-
-    icu_mortality_fixed, icu_mortality_rules = _rewrite_icu_mortality_outcome_alignment(q, service_mortality_fixed)
-    rules.extend(icu_mortality_rules)
-
-    first_icu_fixed, first_icu_rules = _rewrite_unrequested_first_icu_window(q, icu_mortality_fixed)
-    rules.extend(first_icu_rules)
-
-    rewritten_date_cast, date_cast_rules = _rewrite_to_date_cast(first_icu_fixed)
-    rules.extend(date_cast_rules)
-
-    rewritten_extract_day, extract_day_rules = _rewrite_extract_day_diff(rewritten_date_cast)
-    rules.extend(extract_day_rules)
-
-    rewritten_ts, ts_rules = _rewrite_timestampdiff(rewritten_extract_day)
-    rules.extend(ts_rules)
-
-    rewritten_ext, ext_rules = _rewrite_extract_year(rewritten_ts)
-    rules.extend(ext_rules)
-
-    timed, time_rules = _normalize_timestamp_diffs(rewritten_ext)
-    rules.extend(time_rules)
-
-    deduped, dedupe_rules = _dedupe_table_alias(timed)
-    rules.extend(dedupe_rules)
-
-    grouped, group_rules = _fix_orphan_by(deduped)
-    rules.extend(group_rules)
-
-    having_fixed, having_rules = _fix_having_where(grouped)
-    rules.extend(having_rules)
-
-    ratio_denom_fixed, ratio_denom_rules = _rewrite_ratio_denominator_distinct_under_icd_join(having_fixed)
-    rules.extend(ratio_denom_rules)
-
-    count_fixed, count_rules = _normalize_count_aliases_for_simple_counts(ratio_denom_fixed)
-    rules.extend(count_rules)
-
-    grouped_count_fixed, grouped_count_rules = _ensure_group_by_not_null_for_simple_counts(q, count_fixed)
-    rules.extend(grouped_count_rules)
-
-    grouped_avg_fixed, grouped_avg_rules = _ensure_group_by_not_null_for_simple_avg(q, grouped_count_fixed)
-    rules.extend(grouped_avg_rules)
-
-    avg_not_null_fixed, avg_not_null_rules = _ensure_avg_not_null(grouped_avg_fixed)
-    rules.extend(avg_not_null_rules)
-
-    avg_count_fixed, avg_count_rules = _rewrite_avg_count_alias(avg_not_null_fixed)
-    rules.extend(avg_count_rules)
-
-    avg_alias_fixed, avg_alias_rules = _normalize_avg_aliases(avg_count_fixed)
-    rules.extend(avg_alias_rules)
-
-    hadm_not_null_fixed, hadm_not_null_rules = _ensure_hadm_not_null_for_distinct_counts(avg_alias_fixed)
-    rules.extend(hadm_not_null_rules)
-
-    hadm_group_fixed, hadm_group_rules = _ensure_prescriptions_hadm_not_null_for_grouping(hadm_not_null_fixed)
-    rules.extend(hadm_group_rules)
-
+# Each pipeline step is (triggers, helper, argument mode). A step only runs when
+# one of its lowercase triggers occurs in the current SQL; a tuple trigger (from
+# _on_all) needs every one of its substrings. An empty trigger set means the step
+# always runs (question-driven helpers, helpers that normalize whitespace, or
+# config-driven table names). The argument mode says whether the helper takes
+# the SQL only, the question, or the lowercased question.
+_Trigger = str | tuple[str, ...]
+_PipelineStep = tuple[frozenset[_Trigger], Callable[..., tuple[str, list[str]]], int]
+_SQL_ONLY = 0
+_QUESTION = 1
+_QUESTION_LOWER = 2
+_ALWAYS: frozenset[_Trigger] = frozenset()
+
+
+def _on(*needles: str) -> frozenset[_Trigger]:
+    return frozenset(needles)
+
+
+def _on_all(*needles: str) -> frozenset[_Trigger]:
+    return frozenset({needles})
+
+
+_RELAXED_PIPELINE: list[_PipelineStep] = [
+    (_ALWAYS, _apply_schema_mappings, _SQL_ONLY),
+    (_ALWAYS, _rewrite_service_mortality_query, _QUESTION),
+    (_ALWAYS, _rewrite_icu_mortality_outcome_alignment, _QUESTION),
+    (_on("icustays"), _rewrite_unrequested_first_icu_window, _QUESTION),
+    (_on("to_date"), _rewrite_to_date_cast, _SQL_ONLY),
+    (_on("extract"), _rewrite_extract_day_diff, _SQL_ONLY),
+    (_on("timestampdiff"), _rewrite_timestampdiff, _SQL_ONLY),
+    (_on("extract"), _rewrite_extract_year, _SQL_ONLY),
+    (_on("-"), _normalize_timestamp_diffs, _SQL_ONLY),
+    (_ALWAYS, _dedupe_table_alias, _SQL_ONLY),
+    (_on("by"), _fix_orphan_by, _SQL_ONLY),
+    (_on("having"), _fix_having_where, _SQL_ONLY),
+    (_on("/"), _rewrite_ratio_denominator_distinct_under_icd_join, _SQL_ONLY),
+    (_on("count("), _normalize_count_aliases_for_simple_counts, _SQL_ONLY),
+    (_on("group by"), _ensure_group_by_not_null_for_simple_counts, _QUESTION_LOWER),
+    (_on("group by"), _ensure_group_by_not_null_for_simple_avg, _QUESTION_LOWER),
+    (_on("avg"), _ensure_avg_not_null, _SQL_ONLY),
+    (_on("avg", "stddev"), _rewrite_avg_count_alias, _SQL_ONLY),
+    (_on("avg("), _normalize_avg_aliases, _SQL_ONLY),
+    (_ALWAYS, _ensure_hadm_not_null_for_distinct_counts, _SQL_ONLY),
+    (_ALWAYS, _ensure_prescriptions_hadm_not_null_for_grouping, _SQL_ONLY),
     # Keep relaxed mode intent-preserving: do not rewrite user-provided categorical
     # literals to nearest known values. This rewrite is reserved for aggressive mode.
-    transfers_eventtype_fixed, transfers_eventtype_rules = _strip_transfers_eventtype_filter(q, hadm_group_fixed)
-    rules.extend(transfers_eventtype_rules)
-
-    nontransfers_eventtype_fixed, nontransfers_eventtype_rules = _strip_invalid_eventtype_filter_for_non_transfers(
-        transfers_eventtype_fixed
-    )
-    rules.extend(nontransfers_eventtype_rules)
-
-    admission_type_fixed, admission_type_rules = _strip_inpatient_admission_type_filter(q, nontransfers_eventtype_fixed)
-    rules.extend(admission_type_rules)
-
-    ordered_count_fixed, ordered_count_rules = _ensure_order_by_count(q, admission_type_fixed)
-    rules.extend(ordered_count_rules)
-
-    ordered, order_rules = _fix_order_by_bad_alias(ordered_count_fixed)
-    rules.extend(order_rules)
-
-    ordered2, order_suffix_rules = _fix_order_by_count_suffix(ordered)
-    rules.extend(order_suffix_rules)
-
-    update_stripped, update_rules = _strip_for_update(ordered2)
-    rules.extend(update_rules)
-
-    d_items_title_fixed, d_items_title_rules = _rewrite_d_items_long_title_to_label(update_stripped)
-    rules.extend(d_items_title_rules)
-
-    scalar_itemid_fixed, scalar_itemid_rules = _rewrite_itemid_scalar_subquery_to_safe_in(d_items_title_fixed)
-    rules.extend(scalar_itemid_rules)
-
-    label_like_fixed, label_like_rules = _rewrite_label_like_case_insensitive(scalar_itemid_fixed)
-    rules.extend(label_like_rules)
-
-    to_char_fixed, to_char_rules = _quote_to_char_format_literals(label_like_fixed)
-    rules.extend(to_char_rules)
-
-    rewritten, rewrite_rules = _rewrite_oracle_syntax(to_char_fixed)
-    rules.extend(rewrite_rules)
-
-    uncapped, uncap_rules = _strip_unrequested_top_n_cap(q, rewritten)
-    rules.extend(uncap_rules)
-
-    first_icu_window_fixed, first_icu_window_rules = _strip_first_icu_rownum_for_careunit_counts(q, uncapped)
-    rules.extend(first_icu_window_rules)
-
-    top_fixed, top_rules = _enforce_top_n_wrapper(q, first_icu_window_fixed)
-    rules.extend(top_rules)
-
-    monthly_capped, monthly_cap_rules = _apply_monthly_trend_default_cap(q, top_fixed)
-    rules.extend(monthly_cap_rules)
-    careunit_capped, careunit_cap_rules = _apply_first_careunit_default_cap(q, monthly_capped)
-    rules.extend(careunit_cap_rules)
-    return careunit_capped, rules
-
-
-def _postprocess_sql_conservative(question: str, sql: str) -> tuple[str, list[str]]:
-    # Conservative mode should remain close to model output: start with relaxed
-    # fixes, then apply only a small set of high-signal semantic corrections.
-    q = question.strip()
-    text, rules = _postprocess_sql_relaxed(question, sql)
-
-    diagnosis_map_fixed, diagnosis_map_rules = _rewrite_diagnosis_title_filter_with_icd_map(q, text)
-    rules.extend(diagnosis_map_rules)
-
-    procedure_map_fixed, procedure_map_rules = _rewrite_procedure_title_filter_with_icd_map(q, diagnosis_map_fixed)
-    rules.extend(procedure_map_rules)
-
-    diagnosis_prefix_expanded, diagnosis_prefix_expand_rules = _expand_diagnosis_prefixes_from_question(
-        q,
-        procedure_map_fixed,
-    )
-    rules.extend(diagnosis_prefix_expand_rules)
-
-    icd_version_consistent, icd_version_consistent_rules = _fix_icd_version_prefix_mismatch(diagnosis_prefix_expanded)
-    rules.extend(icd_version_consistent_rules)
-
-    icd_version_fixed, icd_version_rules = _add_icd_version_for_prefix_filters(icd_version_consistent)
-    rules.extend(icd_version_rules)
-
-    mortality_rate_fixed, mortality_rate_rules = _rewrite_mortality_avg_under_icd_join(icd_version_fixed)
-    rules.extend(mortality_rate_rules)
-
-    ratio_denom_fixed, ratio_denom_rules = _rewrite_ratio_denominator_distinct_under_icd_join(mortality_rate_fixed)
-    rules.extend(ratio_denom_rules)
+    (_on("transfers"), _strip_transfers_eventtype_filter, _QUESTION_LOWER),
+    (_ALWAYS, _strip_invalid_eventtype_filter_for_non_transfers, _SQL_ONLY),
+    (_on("admission_type"), _strip_inpatient_admission_type_filter, _QUESTION_LOWER),
+    (_on_all("group by", "count("), _ensure_order_by_count, _QUESTION_LOWER),
+    (_on("order", "update"), _apply_literal_fixups, _SQL_ONLY),
+    (_on_all("order", "cnt"), _fix_order_by_count_suffix, _SQL_ONLY),
+    (_on("d_items"), _rewrite_d_items_long_title_to_label, _SQL_ONLY),
+    (_on("itemid"), _rewrite_itemid_scalar_subquery_to_safe_in, _SQL_ONLY),
+    (_on("d_items", "d_labitems"), _rewrite_label_like_case_insensitive, _SQL_ONLY),
+    (_on("to_char"), _quote_to_char_format_literals, _SQL_ONLY),
+    (_ALWAYS, _rewrite_oracle_syntax, _SQL_ONLY),
+    (_ALWAYS, _strip_unrequested_top_n_cap, _QUESTION),
+    (_ALWAYS, _strip_first_icu_rownum_for_careunit_counts, _QUESTION),
+    (_ALWAYS, _enforce_top_n_wrapper, _QUESTION),
+    (_ALWAYS, _apply_monthly_trend_default_cap, _QUESTION),
+    (_ALWAYS, _apply_first_careunit_default_cap, _QUESTION),
+]
+
+# Conservative mode should remain close to model output: it runs after the
+# relaxed pipeline and applies only a small set of high-signal semantic corrections.
+_CONSERVATIVE_PIPELINE: list[_PipelineStep] = [
+    (_ALWAYS, _rewrite_diagnosis_title_filter_with_icd_map, _QUESTION),
+    (_ALWAYS, _rewrite_procedure_title_filter_with_icd_map, _QUESTION),
+    (_on("diagnoses_icd"), _expand_diagnosis_prefixes_from_question, _QUESTION),
+    (_on("icd_version"), _fix_icd_version_prefix_mismatch, _SQL_ONLY),
+    (_ALWAYS, _add_icd_version_for_prefix_filters, _SQL_ONLY),
+    (_on("avg"), _rewrite_mortality_avg_under_icd_join, _SQL_ONLY),
+    (_on("/"), _rewrite_ratio_denominator_distinct_under_icd_join, _SQL_ONLY),
+    (_ALWAYS, _rewrite_post_window_deathtime_anchor, _QUESTION),
+    (_ALWAYS, _rewrite_admissions_icd_count_grain, _QUESTION),
+    (_ALWAYS, _rewrite_age_group_diagnosis_extrema_by_gender, _QUESTION),
+    (_ALWAYS, _strip_first_icu_rownum_for_careunit_counts, _QUESTION),
+    (_ALWAYS, _apply_monthly_trend_default_cap, _QUESTION),
+    (_ALWAYS, _apply_first_careunit_default_cap, _QUESTION),
+]
+
+_PIPELINE: list[_PipelineStep] = [
+    (_ALWAYS, _apply_schema_mappings, _SQL_ONLY),
+    (_ALWAYS, _rewrite_service_mortality_query, _QUESTION),
+    (_ALWAYS, _rewrite_icu_mortality_outcome_alignment, _QUESTION),
+    (_on("icustays"), _rewrite_unrequested_first_icu_window, _QUESTION),
+    (_ALWAYS, _ensure_microbiology_table, _SQL_ONLY),
+    (_ALWAYS, _ensure_microbiology_by_question, _QUESTION_LOWER),
+    (_ALWAYS, _ensure_icustays_table, _QUESTION_LOWER),
+    (_ALWAYS, _ensure_chartevents_table, _QUESTION_LOWER),
+    (_ALWAYS, _ensure_labevents_table, _QUESTION_LOWER),
+    (_ALWAYS, _ensure_services_table, _QUESTION_LOWER),
+    (_ALWAYS, _ensure_prescriptions_table, _QUESTION_LOWER),
+    (_ALWAYS, _ensure_inputevents_table, _QUESTION_LOWER),
+    (_ALWAYS, _ensure_outputevents_table, _QUESTION_LOWER),
+    (_ALWAYS, _ensure_emar_table, _QUESTION_LOWER),
+    (_ALWAYS, _ensure_diagnoses_icd_table, _QUESTION_LOWER),
+    (_ALWAYS, _ensure_procedures_icd_table, _QUESTION_LOWER),
+    (_on("prescriptions"), _rewrite_prescriptions_drug_field, _QUESTION_LOWER),
+    (_on("medication", "charttime"), _rewrite_prescriptions_columns, _SQL_ONLY),
+    (_on("diagnoses_icd", "procedures_icd"), _rewrite_icd_code_field, _QUESTION_LOWER),
+    (_on("diagnoses_icd", "procedures_icd"), _rewrite_itemid_in_icd_tables, _SQL_ONLY),
+    (_on("emar"), _rewrite_emar_medication_field, _QUESTION_LOWER),
+    (_ALWAYS, _ensure_transfers_eventtype, _QUESTION_LOWER),
+    (_on("transfers"), _rewrite_transfers_careunit_fields, _SQL_ONLY),
+    (_on("services"), _rewrite_services_order_type, _QUESTION_LOWER),
+    (_on("transfers"), _strip_transfers_eventtype_filter, _QUESTION_LOWER),
+    (_on("icu_stay", "icustays"), _rewrite_icu_flags, _SQL_ONLY),
+    (_on("admission_length", "admission_days"), _rewrite_admission_length, _SQL_ONLY),
+    (_on("duration"), _rewrite_duration, _SQL_ONLY),
+    (_on("to_date"), _rewrite_to_date_cast, _SQL_ONLY),
+    (_on("extract"), _rewrite_extract_day_diff, _SQL_ONLY),
+    (_on("timestampdiff"), _rewrite_timestampdiff, _SQL_ONLY),
+    (_on("extract"), _rewrite_extract_year, _SQL_ONLY),
+    (_ALWAYS, _ensure_admissions_join, _SQL_ONLY),
+    (_on("add_months"), _rewrite_absolute_year_range, _QUESTION),
+    (_on("sysdate", "current_date"), _rewrite_age_from_sysdate_diff, _SQL_ONLY),
+    (_ALWAYS, _ensure_patients_join, _SQL_ONLY),
+    (_on("patients"), _rewrite_patients_id, _SQL_ONLY),
+    (_on("icd_code"), _ensure_icd_join, _QUESTION_LOWER),
+    (_on("label"), _ensure_label_join, _SQL_ONLY),
+    (_on("d_icd_diagnoses"), _ensure_diagnosis_title_join, _QUESTION_LOWER),
+    (_ALWAYS, _ensure_procedure_title_join, _QUESTION_LOWER),
+    (_on("d_icd_procedures"), _cleanup_procedure_title_joins, _SQL_ONLY),
+    (_on("long_title"), _ensure_long_title_join, _SQL_ONLY),
+    (_ALWAYS, _rewrite_diagnosis_title_filter_with_icd_map, _QUESTION),
+    (_ALWAYS, _rewrite_procedure_title_filter_with_icd_map, _QUESTION),
+    (_on("diagnoses_icd"), _expand_diagnosis_prefixes_from_question, _QUESTION),
+    (_on("icd_version"), _fix_icd_version_prefix_mismatch, _SQL_ONLY),
+    (_ALWAYS, _add_icd_version_for_prefix_filters, _SQL_ONLY),
+    (_on("avg"), _rewrite_mortality_avg_under_icd_join, _SQL_ONLY),
+    (_on("/"), _rewrite_ratio_denominator_distinct_under_icd_join, _SQL_ONLY),
+    (_ALWAYS, _rewrite_post_window_deathtime_anchor, _QUESTION),
+    (_on("-"), _normalize_timestamp_diffs, _SQL_ONLY),
+    (_ALWAYS, _dedupe_table_alias, _SQL_ONLY),
+    (_on("by"), _fix_orphan_by, _SQL_ONLY),
+    (_on("having"), _fix_having_where, _SQL_ONLY),
+    (_ALWAYS, _align_admissions_icu_match_keys, _SQL_ONLY),
+    (_ALWAYS, _rewrite_admissions_icd_count_grain, _QUESTION),
+    (_ALWAYS, _rewrite_count_by_gender_template, _QUESTION),
+    (_on("hospital_expire_flag"), _rewrite_hospital_expire_flag, _SQL_ONLY),
+    (_on("anchor_year"), _rewrite_age_from_anchor, _SQL_ONLY),
+    (_on("extract"), _rewrite_age_from_birthdate, _SQL_ONLY),
+    (_on("extract"), _rewrite_birthdate_to_anchor_age, _SQL_ONLY),
+    (_on("birth_year"), _rewrite_birth_year_age, _SQL_ONLY),
+    (_ALWAYS, _rewrite_age_group_diagnosis_extrema_by_gender, _QUESTION),
+    (_on("careunit"), _rewrite_icustays_careunit, _QUESTION_LOWER),
+    (_on("icustays"), _rewrite_icustays_los, _SQL_ONLY),
+    (_on("statusdescription"), _rewrite_warning_flag, _QUESTION_LOWER),
+    (_on("labevents"), _rewrite_lab_priority, _QUESTION_LOWER),
+    (_on("microbiologyevents"), _rewrite_micro_count_field, _QUESTION_LOWER),
+    (_on("chartevents"), _ensure_chart_label, _QUESTION_LOWER),
+    (_on("labevents"), _ensure_lab_label, _QUESTION_LOWER),
+    (_ALWAYS, _rewrite_label_field, _QUESTION_LOWER),
+    (_on("count"), _normalize_count_aliases, _SQL_ONLY),
+    (_on("avg", "stddev"), _rewrite_avg_count_alias, _SQL_ONLY),
+    (_on("avg("), _normalize_avg_aliases, _SQL_ONLY),
+    (_ALWAYS, _ensure_hadm_not_null_for_distinct_counts, _SQL_ONLY),
+    (_ALWAYS, _ensure_prescriptions_hadm_not_null_for_grouping, _SQL_ONLY),
+    (_on("prescriptions"), _rewrite_prescriptions_hadm_count_to_admissions_exists, _QUESTION),
+    (_on("services"), _rewrite_services_hadm_count_to_admissions_join, _QUESTION),
+    (_on("sysdate", "current_date"), _strip_time_window_if_absent, _QUESTION_LOWER),
+    (_on("group by"), _ensure_group_by_not_null, _QUESTION_LOWER),
+    (_on("avg"), _ensure_avg_not_null, _SQL_ONLY),
+    (_on("admission_type"), _strip_inpatient_admission_type_filter, _QUESTION_LOWER),
+    (_on_all("group by", "count("), _ensure_order_by_count, _QUESTION_LOWER),
+    (_on("order", "update"), _apply_literal_fixups, _SQL_ONLY),
+    (_on_all("order", "cnt"), _fix_order_by_count_suffix, _SQL_ONLY),
+    # Do not replace whole SQL by keyword-triggered canonical templates here.
+    # Postprocess should only normalize/fix generated SQL.
+    (_on("count(*)"), _reorder_count_select, _SQL_ONLY),
+    (_on("avg("), _reorder_avg_select, _SQL_ONLY),
+    # Disable automatic ROWNUM capping; preserve explicit Top-N only.
+    (_ALWAYS, _wrap_top_n, _QUESTION_LOWER),
+    (_on_all("microbiologyevents", "rownum"), _strip_rownum_cap_for_micro_topk, _SQL_ONLY),
+    (_on_all("group by", "rownum"), _strip_rownum_cap_for_grouped_tables, _SQL_ONLY),
+    (_on("rownum"), _pushdown_outer_predicates, _SQL_ONLY),
+    (_on_all("group", "null"), _fix_missing_where_predicate, _SQL_ONLY),
+    (_ALWAYS, _rewrite_unknown_categorical_equals, _QUESTION),
+    (_on("transfers"), _strip_transfers_eventtype_filter, _QUESTION_LOWER),
+    (_ALWAYS, _strip_invalid_eventtype_filter_for_non_transfers, _SQL_ONLY),
+    (_on("d_items"), _rewrite_d_items_long_title_to_label, _SQL_ONLY),
+    (_on("itemid"), _rewrite_itemid_scalar_subquery_to_safe_in, _SQL_ONLY),
+    (_on("itemid"), _rewrite_itemid_icd_join_mismatch, _SQL_ONLY),
+    (_on("d_items", "d_labitems"), _rewrite_label_like_case_insensitive, _SQL_ONLY),
+    (_ALWAYS, _rewrite_label_filter_by_intent_profile, _QUESTION),
+    (_on("to_char"), _quote_to_char_format_literals, _SQL_ONLY),
+    (_ALWAYS, _rewrite_oracle_syntax, _SQL_ONLY),
+    (_ALWAYS, _rewrite_count_columns_to_ratio_by_intent, _QUESTION),
+    (_ALWAYS, _strip_unrequested_top_n_cap, _QUESTION),
+    (_ALWAYS, _strip_first_icu_rownum_for_careunit_counts, _QUESTION),
+    (_ALWAYS, _enforce_top_n_wrapper, _QUESTION),
+    (_ALWAYS, _apply_monthly_trend_default_cap, _QUESTION),
+    (_ALWAYS, _apply_first_careunit_default_cap, _QUESTION),
+]
+
+
+def _run_pipeline(question: str, sql: str, pipeline: list[_PipelineStep], rules: list[str]) -> str:
+    """Run pipeline steps over sql, appending fired rule names to the shared rules list."""
+    text = sql
+    needles = text.lower()
+    # Trigger hits for the current text; many steps share triggers, so each
+    # substring is searched at most once until a step rewrites the SQL.
+    present: dict[_Trigger, bool] = {}
+    question_lower = question.lower()
+    for triggers, fn, arg_mode in pipeline:
+        if triggers:
+            for trigger in triggers:
+                hit = present.get(trigger)
+                if hit is None:
+                    if isinstance(trigger, tuple):
+                        hit = all(part in needles for part in trigger)
+                    else:
+                        hit = trigger in needles
+                    present[trigger] = hit
+                if hit:
+                    break
+            else:
+                continue
+        if arg_mode == _QUESTION_LOWER:
+            fixed, step_rules = fn(question_lower, text)
+        elif arg_mode == _QUESTION:
+            fixed, step_rules = fn(question, text)
+        else:
+            fixed, step_rules = fn(text)
+        if step_rules:
+            rules.extend(step_rules)
+        if fixed != text:
+            text = fixed
+            needles = text.lower()
+            present.clear()
+    return text
 
-    window_fixed, window_rules = _rewrite_post_window_deathtime_anchor(q, ratio_denom_fixed)
-    rules.extend(window_rules)
 
-    admissions_icd_grain_fixed, admissions_icd_grain_rules = _rewrite_admissions_icd_count_grain(q, window_fixed)
-    rules.extend(admissions_icd_grain_rules)
+def _postprocess_sql_relaxed(question: str, sql: str, rules: list[str]) -> str:
+    """Apply low-risk SQL fixes only.
 
-    age_gender_extrema_fixed, age_gender_extrema_rules = _rewrite_age_group_diagnosis_extrema_by_gender(
-        q,
-        admissions_icd_grain_fixed,
-    )
-    rules.extend(age_gender_extrema_rules)
+    This path is intended for first-pass execution to reduce over-correction.
+    """
+    return _run_pipeline(question.strip(), sql, _RELAXED_PIPELINE, rules)
+
+
+def _postprocess_sql_conservative(question: str, sql: str, rules: list[str]) -> str:
+    text = _postprocess_sql_relaxed(question, sql, rules)
+    return _run_pipeline(question.strip(), text, _CONSERVATIVE_PIPELINE, rules)
+
+
+_POSTPROCESS_CACHE_SIZE = 4096
+# Runtime metadata consulted by the rewrite helpers. Their mtimes are part of the
+# memo key so that edits to these files are picked up without a restart.
+_POSTPROCESS_DEPENDENCY_PATHS: tuple[Path, ...] = (
+    project_path("var/metadata/sql_postprocess_rules.json"),
+    project_path("var/metadata/sql_postprocess_schema_hints.json"),
+    project_path("var/metadata/diagnosis_icd_map.jsonl"),
+    project_path("var/metadata/procedure_icd_map.jsonl"),
+    project_path("var/metadata/label_intent_profiles.jsonl"),
+    project_path("var/metadata/column_value_docs.jsonl"),
+    project_path("docs/query_visualization_eval_aside.jsonl"),
+    project_path("docs/데이터 탐색 항목_컬럼 값.xlsx"),
+)
+# The diagnosis map also folds in D_ICD_DIAGNOSES rows that are re-read on this period.
+_POSTPROCESS_CACHE_TTL_SEC = 300
 
-    first_icu_window_fixed, first_icu_window_rules = _strip_first_icu_rownum_for_careunit_counts(q, age_gender_extrema_fixed)
-    rules.extend(first_icu_window_rules)
 
-    monthly_capped, monthly_cap_rules = _apply_monthly_trend_default_cap(q, first_icu_window_fixed)
-    rules.extend(monthly_cap_rules)
-    careunit_capped, careunit_cap_rules = _apply_first_careunit_default_cap(q, monthly_capped)
-    rules.extend(careunit_cap_rules)
-    return careunit_capped, rules
+def _postprocess_dependency_key() -> tuple[float, ...]:
+    mtimes = [path.stat().st_mtime if path.exists() else -1.0 for path in _POSTPROCESS_DEPENDENCY_PATHS]
+    mtimes.append(float(int(time.time() // _POSTPROCESS_CACHE_TTL_SEC)))
+    return tuple(mtimes)
 
 
-def postprocess_sql(question: str, sql: str, profile: str | None = None) -> tuple[str, list[str]]:
+@lru_cache(maxsize=_POSTPROCESS_CACHE_SIZE)
+def _postprocess_sql_impl(
+    q: str,
+    sql: str,
+    profile_mode: str,
+    dependency_key: tuple[float, ...],
+) -> tuple[str, tuple[str, ...]]:
+    # dependency_key is only part of the cache key; see _postprocess_dependency_key.
     rules: list[str] = []
-    q = question.strip()
-    profile_mode = str(profile or "auto").strip().lower()
-    if profile_mode not in {"auto", "relaxed", "aggressive"}:
-        profile_mode = "auto"
-
-    learned_fix = find_learned_sql_fix(sql)
-    if isinstance(learned_fix, dict):
-        fixed_sql = str(learned_fix.get("fixed_sql") or "").strip()
-        if fixed_sql and fixed_sql.strip().rstrip(";") != str(sql).strip().rstrip(";"):
-            sql = fixed_sql
-            rule_id = str(learned_fix.get("id") or "").strip()
-            if rule_id:
-                mark_learned_sql_fix_used(rule_id)
-                rules.append(f"learned_error_fix:{rule_id}")
-            else:
-                rules.append("learned_error_fix")
 
     match = _COUNT_RE.match(q)
     if match:
         table = match.group(1)
         rules.append("count_rows_sampled_template")
-        return f"SELECT COUNT(*) AS cnt FROM {table} WHERE ROWNUM <= 1000", rules
+        return _COUNT_SAMPLE_SQL.format(table=table), tuple(rules)
 
     match = _DISTINCT_RE.match(q)
     if match:
         col = match.group(1)
         table = match.group(2)
         rules.append("distinct_sample_template")
-        return f"SELECT DISTINCT {col} FROM {table} WHERE {col} IS NOT NULL AND ROWNUM <= 50", rules
+        return _DISTINCT_SAMPLE_SQL.format(col=col, table=table), tuple(rules)
 
     match = _SAMPLE_RE.match(q)
     if match:
@@ -5746,15 +6005,12 @@ def postprocess_sql(question: str, sql: str, profile: str | None = None) -> tupl
         if cols and first:
             cols_sql = ", ".join(cols)
             rules.append("sample_rows_template")
-            return (
-                f"SELECT {cols_sql} FROM {table} WHERE {first} IS NOT NULL AND ROWNUM <= 100",
-                rules,
-            )
+            return _SAMPLE_ROWS_SQL.format(cols=cols_sql, table=table, first=first, limit=100), tuple(rules)
 
     ko_sample_sql, ko_sample_rules = _build_ko_sample_template(q)
     if ko_sample_sql:
         rules.extend(ko_sample_rules)
-        return ko_sample_sql, rules
+        return ko_sample_sql, tuple(rules)
 
     execution_cfg = load_sql_postprocess_rules().get("execution", {})
     mode = str(execution_cfg.get("mode") or "conservative").strip().lower()
@@ -5762,366 +6018,41 @@ def postprocess_sql(question: str, sql: str, profile: str | None = None) -> tupl
         mode = "conservative"
 
     if profile_mode == "relaxed":
-        relaxed_sql, relaxed_rules = _postprocess_sql_relaxed(q, sql)
-        rules.extend(relaxed_rules)
-        return relaxed_sql, rules
+        relaxed_sql = _postprocess_sql_relaxed(q, sql, rules)
+        return relaxed_sql, tuple(rules)
 
     if profile_mode != "aggressive" and mode == "conservative":
-        conservative_sql, conservative_rules = _postprocess_sql_conservative(q, sql)
-        rules.extend(conservative_rules)
-        return conservative_sql, rules
-
-    mapped, map_rules = _apply_schema_mappings(sql)
-    rules.extend(map_rules)
-
-    service_mortality_fixed, service_mortality_rules = _rewrite_service_mortality_query(q, mapped)
-    rules.extend(service_mortality_rules)
-
-    icu_mortality_fixed, icu_mortality_rules = _rewrite_icu_mortality_outcome_alignment(q, service_mortality_fixed)
-    rules.extend(icu_mortality_rules)
-
-    first_icu_fixed, first_icu_rules = _rewrite_unrequested_first_icu_window(q, icu_mortality_fixed)
-    rules.extend(first_icu_rules)
-
-    micro_fixed, micro_rules = _ensure_microbiology_table(first_icu_fixed)
-    rules.extend(micro_rules)
-
-    micro_by_q, micro_q_rules = _ensure_microbiology_by_question(q, micro_fixed)
-    rules.extend(micro_q_rules)
-
-    icu_forced, icu_force_rules = _ensure_icustays_table(q, micro_by_q)
-    rules.extend(icu_force_rules)
-
-    chart_forced, chart_rules = _ensure_chartevents_table(q, icu_forced)
-    rules.extend(chart_rules)
-
-    lab_forced, lab_rules = _ensure_labevents_table(q, chart_forced)
-    rules.extend(lab_rules)
+        conservative_sql = _postprocess_sql_conservative(q, sql, rules)
+        return conservative_sql, tuple(rules)
 
-    services_forced, services_rules = _ensure_services_table(q, lab_forced)
-    rules.extend(services_rules)
+    pipeline_sql = _run_pipeline(q, sql, _PIPELINE, rules)
+    return pipeline_sql, tuple(rules)
 
-    prescriptions_forced, prescriptions_rules = _ensure_prescriptions_table(q, services_forced)
-    rules.extend(prescriptions_rules)
 
-    input_forced, input_rules = _ensure_inputevents_table(q, prescriptions_forced)
-    rules.extend(input_rules)
-
-    output_forced, output_rules = _ensure_outputevents_table(q, input_forced)
-    rules.extend(output_rules)
-
-    emar_forced, emar_rules = _ensure_emar_table(q, output_forced)
-    rules.extend(emar_rules)
-
-    diagnoses_forced, diagnoses_rules = _ensure_diagnoses_icd_table(q, emar_forced)
-    rules.extend(diagnoses_rules)
-
-    procedures_forced, procedures_rules = _ensure_procedures_icd_table(q, diagnoses_forced)
-    rules.extend(procedures_rules)
-
-    prescriptions_field_fixed, prescriptions_field_rules = _rewrite_prescriptions_drug_field(q, procedures_forced)
-    rules.extend(prescriptions_field_rules)
-
-    prescriptions_col_fixed, prescriptions_col_rules = _rewrite_prescriptions_columns(prescriptions_field_fixed)
-    rules.extend(prescriptions_col_rules)
-
-    icd_code_fixed, icd_code_rules = _rewrite_icd_code_field(q, prescriptions_col_fixed)
-    rules.extend(icd_code_rules)
-
-    icd_itemid_fixed, icd_itemid_rules = _rewrite_itemid_in_icd_tables(icd_code_fixed)
-    rules.extend(icd_itemid_rules)
-
-    emar_field_fixed, emar_field_rules = _rewrite_emar_medication_field(q, icd_itemid_fixed)
-    rules.extend(emar_field_rules)
-
-    transfers_fixed, transfers_rules = _ensure_transfers_eventtype(q, emar_field_fixed)
-    rules.extend(transfers_rules)
-
-    transfers_careunit_fixed, transfers_careunit_rules = _rewrite_transfers_careunit_fields(transfers_fixed)
-    rules.extend(transfers_careunit_rules)
-
-    services_order_fixed, services_order_rules = _rewrite_services_order_type(q, transfers_careunit_fixed)
-    rules.extend(services_order_rules)
-
-    transfers_eventtype_fixed, transfers_eventtype_rules = _strip_transfers_eventtype_filter(q, services_order_fixed)
-    rules.extend(transfers_eventtype_rules)
-
-    rewritten_icu, icu_rules = _rewrite_has_icu_stay(transfers_eventtype_fixed)
-    rules.extend(icu_rules)
-
-    rewritten_icu2, icu2_rules = _rewrite_icu_stay(rewritten_icu)
-    rules.extend(icu2_rules)
-
-    rewritten_icu3, icu3_rules = _rewrite_icustays_flag(rewritten_icu2)
-    rules.extend(icu3_rules)
-
-    rewritten_icu4, icu4_rules = _rewrite_icustays_not_null(rewritten_icu3)
-    rules.extend(icu4_rules)
-
-    rewritten_adm_len, adm_len_rules = _rewrite_admission_length(rewritten_icu4)
-    rules.extend(adm_len_rules)
-
-    rewritten_dur, dur_rules = _rewrite_duration(rewritten_adm_len)
-    rules.extend(dur_rules)
-
-    rewritten_date_cast, date_cast_rules = _rewrite_to_date_cast(rewritten_dur)
-    rules.extend(date_cast_rules)
-
-    rewritten_extract_day, extract_day_rules = _rewrite_extract_day_diff(rewritten_date_cast)
-    rules.extend(extract_day_rules)
-
-    rewritten_ts, ts_rules = _rewrite_timestampdiff(rewritten_extract_day)
-    rules.extend(ts_rules)
-
-    rewritten_ext, ext_rules = _rewrite_extract_year(rewritten_ts)
-    rules.extend(ext_rules)
-
-    joined_adm, adm_rules = _ensure_admissions_join(rewritten_ext)
-    rules.extend(adm_rules)
-
-    year_range_fixed, year_range_rules = _rewrite_absolute_year_range(q, joined_adm)
-    rules.extend(year_range_rules)
-
-    age_from_diff_fixed, age_from_diff_rules = _rewrite_age_from_sysdate_diff(year_range_fixed)
-    rules.extend(age_from_diff_rules)
-
-    joined_patients, patient_rules = _ensure_patients_join(age_from_diff_fixed)
-    rules.extend(patient_rules)
-
-    rewritten_patients_id, patient_id_rules = _rewrite_patients_id(joined_patients)
-    rules.extend(patient_id_rules)
-
-    joined_icd, icd_rules = _ensure_icd_join(question, rewritten_patients_id)
-    rules.extend(icd_rules)
-
-    labeled, label_rules = _ensure_label_join(joined_icd)
-    rules.extend(label_rules)
-
-    diag_title_fixed, diag_title_rules = _ensure_diagnosis_title_join(q, labeled)
-    rules.extend(diag_title_rules)
-
-    proc_title_fixed, proc_title_rules = _ensure_procedure_title_join(q, diag_title_fixed)
-    rules.extend(proc_title_rules)
-
-    proc_cleanup_fixed, proc_cleanup_rules = _cleanup_procedure_title_joins(proc_title_fixed)
-    rules.extend(proc_cleanup_rules)
-
-    titled, title_rules = _ensure_long_title_join(proc_cleanup_fixed)
-    rules.extend(title_rules)
-
-    diagnosis_map_fixed, diagnosis_map_rules = _rewrite_diagnosis_title_filter_with_icd_map(q, titled)
-    rules.extend(diagnosis_map_rules)
-
-    procedure_map_fixed, procedure_map_rules = _rewrite_procedure_title_filter_with_icd_map(q, diagnosis_map_fixed)
-    rules.extend(procedure_map_rules)
-
-    diagnosis_prefix_expanded, diagnosis_prefix_expand_rules = _expand_diagnosis_prefixes_from_question(
-        q,
-        procedure_map_fixed,
-    )
-    rules.extend(diagnosis_prefix_expand_rules)
-
-    icd_version_consistent, icd_version_consistent_rules = _fix_icd_version_prefix_mismatch(diagnosis_prefix_expanded)
-    rules.extend(icd_version_consistent_rules)
-
-    icd_version_fixed, icd_version_rules = _add_icd_version_for_prefix_filters(icd_version_consistent)
-    rules.extend(icd_version_rules)
-
-    mortality_rate_fixed, mortality_rate_rules = _rewrite_mortality_avg_under_icd_join(icd_version_fixed)
-    rules.extend(mortality_rate_rules)
-
-    ratio_denom_fixed, ratio_denom_rules = _rewrite_ratio_denominator_distinct_under_icd_join(mortality_rate_fixed)
-    rules.extend(ratio_denom_rules)
-
-    window_fixed, window_rules = _rewrite_post_window_deathtime_anchor(q, ratio_denom_fixed)
-    rules.extend(window_rules)
-
-    timed, time_rules = _normalize_timestamp_diffs(window_fixed)
-    rules.extend(time_rules)
-
-    deduped, dedupe_rules = _dedupe_table_alias(timed)
-    rules.extend(dedupe_rules)
-
-    grouped, group_rules = _fix_orphan_by(deduped)
-    rules.extend(group_rules)
-
-    having_fixed, having_rules = _fix_having_where(grouped)
-    rules.extend(having_rules)
-
-    aligned_icu_keys, align_icu_rules = _align_admissions_icu_match_keys(having_fixed)
-    rules.extend(align_icu_rules)
-
-    admissions_icd_grain_fixed, admissions_icd_grain_rules = _rewrite_admissions_icd_count_grain(q, aligned_icu_keys)
-    rules.extend(admissions_icd_grain_rules)
-
-    gender_template_fixed, gender_template_rules = _rewrite_count_by_gender_template(q, admissions_icd_grain_fixed)
-    rules.extend(gender_template_rules)
-
-    expire_fixed, expire_rules = _rewrite_hospital_expire_flag(gender_template_fixed)
-    rules.extend(expire_rules)
-
-    age_fixed, age_rules = _rewrite_age_from_anchor(expire_fixed)
-    rules.extend(age_rules)
-
-    birth_fixed, birth_rules = _rewrite_age_from_birthdate(age_fixed)
-    rules.extend(birth_rules)
-
-    birth_col_fixed, birth_col_rules = _rewrite_birthdate_to_anchor_age(birth_fixed)
-    rules.extend(birth_col_rules)
-
-    birth_year_fixed, birth_year_rules = _rewrite_birth_year_age(birth_col_fixed)
-    rules.extend(birth_year_rules)
-
-    age_gender_extrema_fixed, age_gender_extrema_rules = _rewrite_age_group_diagnosis_extrema_by_gender(
-        q,
-        birth_year_fixed,
-    )
-    rules.extend(age_gender_extrema_rules)
-
-    icu_careunit_fixed, icu_careunit_rules = _rewrite_icustays_careunit(q, age_gender_extrema_fixed)
-    rules.extend(icu_careunit_rules)
-
-    icu_los_fixed, icu_los_rules = _rewrite_icustays_los(icu_careunit_fixed)
-    rules.extend(icu_los_rules)
-
-    warning_fixed, warning_rules = _rewrite_warning_flag(q, icu_los_fixed)
-    rules.extend(warning_rules)
-
-    lab_priority_fixed, lab_priority_rules = _rewrite_lab_priority(q, warning_fixed)
-    rules.extend(lab_priority_rules)
-
-    micro_field_fixed, micro_field_rules = _rewrite_micro_count_field(q, lab_priority_fixed)
-    rules.extend(micro_field_rules)
-
-    chart_label_fixed, chart_label_rules = _ensure_chart_label(q, micro_field_fixed)
-    rules.extend(chart_label_rules)
-
-    lab_label_fixed, lab_label_rules = _ensure_lab_label(q, chart_label_fixed)
-    rules.extend(lab_label_rules)
-
-    label_field_fixed, label_field_rules = _rewrite_label_field(q, lab_label_fixed)
-    rules.extend(label_field_rules)
-
-    count_fixed, count_rules = _normalize_count_aliases(label_field_fixed)
-    rules.extend(count_rules)
-
-    avg_fixed, avg_rules = _rewrite_avg_count_alias(count_fixed)
-    rules.extend(avg_rules)
-
-    avg_alias_fixed, avg_alias_rules = _normalize_avg_aliases(avg_fixed)
-    rules.extend(avg_alias_rules)
-
-    hadm_not_null_fixed, hadm_not_null_rules = _ensure_hadm_not_null_for_distinct_counts(avg_alias_fixed)
-    rules.extend(hadm_not_null_rules)
-
-    hadm_group_fixed, hadm_group_rules = _ensure_prescriptions_hadm_not_null_for_grouping(hadm_not_null_fixed)
-    rules.extend(hadm_group_rules)
-
-    admissions_count_fixed, admissions_count_rules = _rewrite_prescriptions_hadm_count_to_admissions_exists(
-        q,
-        hadm_group_fixed,
-    )
-    rules.extend(admissions_count_rules)
-
-    services_adm_fixed, services_adm_rules = _rewrite_services_hadm_count_to_admissions_join(
-        q,
-        admissions_count_fixed,
-    )
-    rules.extend(services_adm_rules)
-
-    time_stripped, time_rules = _strip_time_window_if_absent(q, services_adm_fixed)
-    rules.extend(time_rules)
-
-    grouped_filtered, group_filter_rules = _ensure_group_by_not_null(q, time_stripped)
-    rules.extend(group_filter_rules)
-
-    avg_not_null_fixed, avg_not_null_rules = _ensure_avg_not_null(grouped_filtered)
-    rules.extend(avg_not_null_rules)
-
-    admission_type_fixed, admission_type_rules = _strip_inpatient_admission_type_filter(q, avg_not_null_fixed)
-    rules.extend(admission_type_rules)
-
-    ordered, order_rules = _ensure_order_by_count(q, admission_type_fixed)
-    rules.extend(order_rules)
-
-    ordered2, order_alias_rules = _fix_order_by_bad_alias(ordered)
-    rules.extend(order_alias_rules)
-
-    ordered3, order_suffix_rules = _fix_order_by_count_suffix(ordered2)
-    rules.extend(order_suffix_rules)
-
-    update_stripped, update_rules = _strip_for_update(ordered3)
-    rules.extend(update_rules)
-
-    # Do not replace whole SQL by keyword-triggered canonical templates here.
-    # Postprocess should only normalize/fix generated SQL.
-    reordered, reorder_rules = _reorder_count_select(update_stripped)
-    rules.extend(reorder_rules)
-
-    avg_reordered, avg_reorder_rules = _reorder_avg_select(reordered)
-    rules.extend(avg_reorder_rules)
-
-    wrapped, wrap_rules = _wrap_top_n(q, avg_reordered)
-    rules.extend(wrap_rules)
-
-    # Disable automatic ROWNUM capping; preserve explicit Top-N only.
-    capped = wrapped
-
-    micro_cap_fixed, micro_cap_rules = _strip_rownum_cap_for_micro_topk(capped)
-    rules.extend(micro_cap_rules)
-
-    group_cap_fixed, group_cap_rules = _strip_rownum_cap_for_grouped_tables(micro_cap_fixed)
-    rules.extend(group_cap_rules)
-
-    pushed_fixed, pushed_rules = _pushdown_outer_predicates(group_cap_fixed)
-    rules.extend(pushed_rules)
-
-    missing_where_fixed, missing_where_rules = _fix_missing_where_predicate(pushed_fixed)
-    rules.extend(missing_where_rules)
-
-    categorical_fixed, categorical_rules = _rewrite_unknown_categorical_equals(q, missing_where_fixed)
-    rules.extend(categorical_rules)
-
-    transfers_eventtype_final, transfers_eventtype_final_rules = _strip_transfers_eventtype_filter(q, categorical_fixed)
-    rules.extend(transfers_eventtype_final_rules)
-
-    nontransfers_eventtype_final, nontransfers_eventtype_final_rules = _strip_invalid_eventtype_filter_for_non_transfers(
-        transfers_eventtype_final
-    )
-    rules.extend(nontransfers_eventtype_final_rules)
-
-    d_items_title_fixed, d_items_title_rules = _rewrite_d_items_long_title_to_label(nontransfers_eventtype_final)
-    rules.extend(d_items_title_rules)
-
-    scalar_itemid_fixed, scalar_itemid_rules = _rewrite_itemid_scalar_subquery_to_safe_in(d_items_title_fixed)
-    rules.extend(scalar_itemid_rules)
-
-    itemid_icd_fixed, itemid_icd_rules = _rewrite_itemid_icd_join_mismatch(scalar_itemid_fixed)
-    rules.extend(itemid_icd_rules)
-
-    label_like_fixed, label_like_rules = _rewrite_label_like_case_insensitive(itemid_icd_fixed)
-    rules.extend(label_like_rules)
-
-    label_profile_fixed, label_profile_rules = _rewrite_label_filter_by_intent_profile(q, label_like_fixed)
-    rules.extend(label_profile_rules)
+def postprocess_sql(question: str, sql: str, profile: str | None = None) -> tuple[str, list[str]]:
+    rules: list[str] = []
+    q = question.strip()
+    profile_mode = str(profile or "auto").strip().lower()
+    if profile_mode not in {"auto", "relaxed", "aggressive"}:
+        profile_mode = "auto"
 
-    to_char_fixed, to_char_rules = _quote_to_char_format_literals(label_profile_fixed)
-    rules.extend(to_char_rules)
+    learned_fix = find_learned_sql_fix(sql)
+    if isinstance(learned_fix, dict):
+        fixed_sql = str(learned_fix.get("fixed_sql") or "").strip()
+        if fixed_sql and fixed_sql.strip().rstrip(";") != str(sql).strip().rstrip(";"):
+            sql = fixed_sql
+            rule_id = str(learned_fix.get("id") or "").strip()
+            if rule_id:
+                mark_learned_sql_fix_used(rule_id)
+                rules.append(f"learned_error_fix:{rule_id}")
+            else:
+                rules.append("learned_error_fix")
 
-    rewritten, rewrite_rules = _rewrite_oracle_syntax(to_char_fixed)
-    rules.extend(rewrite_rules)
-    ratio_fixed, ratio_rules = _rewrite_count_columns_to_ratio_by_intent(q, rewritten)
-    rules.extend(ratio_rules)
-    uncapped, uncap_rules = _strip_unrequested_top_n_cap(q, ratio_fixed)
-    rules.extend(uncap_rules)
-    first_icu_window_fixed, first_icu_window_rules = _strip_first_icu_rownum_for_careunit_counts(q, uncapped)
-    rules.extend(first_icu_window_rules)
+    # Some rewrite rules look at the raw SQL before its trailing ";" is removed, so the
+    # memo key must be the SQL exactly as given.
+    processed_sql, processed_rules = _postprocess_sql_impl(q, sql, profile_mode, _postprocess_dependency_key())
+    rules.extend(processed_rules)
+    return processed_sql, rules
 
-    top_fixed, top_rules = _enforce_top_n_wrapper(q, first_icu_window_fixed)
-    rules.extend(top_rules)
 
-    monthly_capped, monthly_cap_rules = _apply_monthly_trend_default_cap(q, top_fixed)
-    rules.extend(monthly_cap_rules)
-    careunit_capped, careunit_cap_rules = _apply_first_careunit_default_cap(q, monthly_capped)
-    rules.extend(careunit_cap_rules)
-    return careunit_capped, rules
+postprocess_sql.cache_clear = _postprocess_sql_impl.cache_clear  # type: ignore[attr-defined]
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import re
+import threading
 from typing import Any
 
 from app.core.config import get_settings
@@ -8,6 +9,15 @@ from app.services.agents.llm_client import LLMClient
 
 
 _HANGUL_RE = re.compile(r"[\uac00-\ud7a3]")
+_WHITESPACE_RE = re.compile(r"\s+")
+_ELECTIVE_RE = re.compile(r"\belective\b", re.IGNORECASE)
+_WORD_PATTERNS: dict[str, re.Pattern[str]] = {
+    word: re.compile(rf"\b{re.escape(word)}\b", re.IGNORECASE)
+    for word in ("emergency", "urgent", "scheduled", "optional", "selective")
+}
+_TRANSLATION_CACHE_SIZE = 512
+_TRANSLATION_CACHE: dict[str, str] = {}
+_TRANSLATION_CACHE_LOCK = threading.Lock()
 
 TRANSLATE_SYSTEM_PROMPT = (
     "Translate Korean to concise English. Preserve medical terms, acronyms, "
@@ -22,11 +32,14 @@ TRANSLATE_SYSTEM_PROMPT = (
 
 
 def contains_korean(text: str) -> bool:
+    # ASCII-only text (most English questions) cannot contain Hangul.
+    if text.isascii():
+        return False
     return bool(_HANGUL_RE.search(text))
 
 
 def _replace_word(text: str, src: str, dst: str) -> str:
-    return re.sub(rf"\b{re.escape(src)}\b", dst, text, flags=re.IGNORECASE)
+    return _WORD_PATTERNS[src].sub(dst, text)
 
 
 def _enforce_admission_type_fidelity(source_ko: str, translated_en: str) -> str:
@@ -36,7 +49,7 @@ def _enforce_admission_type_fidelity(source_ko: str, translated_en: str) -> str:
         return text
 
     source_lower = source.lower()
-    source_compact = re.sub(r"\s+", "", source_lower)
+    source_compact = _WHITESPACE_RE.sub("", source_lower)
 
     has_emergency_ko = "응급" in source
     has_urgent_ko = "긴급" in source
@@ -54,7 +67,7 @@ def _enforce_admission_type_fidelity(source_ko: str, translated_en: str) -> str:
 
     # Preserve elective admission semantics when source implies 예약/선택.
     if has_elective_ko:
-        if not re.search(r"\belective\b", text, re.IGNORECASE):
+        if not _ELECTIVE_RE.search(text):
             text = _replace_word(text, "scheduled", "elective")
             text = _replace_word(text, "optional", "elective")
             text = _replace_word(text, "selective", "elective")
@@ -63,6 +76,12 @@ def _enforce_admission_type_fidelity(source_ko: str, translated_en: str) -> str:
 
 
 def translate_to_english(text: str) -> tuple[str, dict[str, Any]]:
+    # Repeated questions (reruns, shared demo prompts) reuse the earlier translation
+    # instead of paying another LLM round trip; no tokens are spent, so usage is empty.
+    cached = _TRANSLATION_CACHE.get(text)
+    if cached is not None:
+        return cached, {}
+
     settings = get_settings()
     client = LLMClient()
     messages = [
@@ -75,7 +94,12 @@ def translate_to_english(text: str) -> tuple[str, dict[str, Any]]:
         max_tokens=min(settings.llm_max_output_tokens, 256),
     )
     translated = (response.get("content") or "").strip()
-    if translated.startswith('"') and translated.endswith('"'):
+    if translated[:1] == '"' == translated[-1:]:
         translated = translated[1:-1].strip()
     translated = _enforce_admission_type_fidelity(text, translated)
+    if translated:
+        with _TRANSLATION_CACHE_LOCK:
+            if len(_TRANSLATION_CACHE) >= _TRANSLATION_CACHE_SIZE:
+                _TRANSLATION_CACHE.pop(next(iter(_TRANSLATION_CACHE)))
+            _TRANSLATION_CACHE[text] = translated
     return translated, response.get("usage", {})
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+from collections import deque
 from pathlib import Path
+import atexit
+import io
 import json
+import os
+import threading
 import time
 from typing import Any
 
@@ -14,6 +19,11 @@ except Exception:  # pragma: no cover
     class PyMongoError(Exception):
         pass
 
+try:
+    import orjson
+except Exception:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
 from app.core.config import get_settings
 
 
@@ -21,6 +31,8 @@ _EVENT_COLLECTION = None
 _EVENT_COLLECTION_READY = False
 _EVENT_COLLECTION_FAILED = False
 _EVENT_COLLECTION_NAME = "app_events"
+_FD_CACHE: dict[str, io.FileIO] = {}
+_FD_LOCK = threading.Lock()
 
 
 def _get_event_collection():
@@ -61,10 +73,73 @@ def append_event(path: str, payload: dict[str, Any]) -> None:
         except PyMongoError:
             pass
 
-    file_path = Path(path)
-    file_path.parent.mkdir(parents=True, exist_ok=True)
-    with file_path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(payload, ensure_ascii=True) + "\n")
+    _append_line(path, _dumps_event(payload) + b"\n")
+
+
+def _is_current_file(fd: io.FileIO, path: str) -> bool:
+    # A rotated or deleted log leaves the cached handle pointing at the old inode.
+    try:
+        on_disk = os.stat(path)
+    except OSError:
+        return False
+    opened = os.fstat(fd.fileno())
+    return (on_disk.st_ino, on_disk.st_dev) == (opened.st_ino, opened.st_dev)
+
+
+def _append_line(path: str, data: bytes) -> None:
+    # One O_APPEND write per event keeps lines intact across writers.
+    with _FD_LOCK:
+        fd = _FD_CACHE.get(path)
+        if fd is not None and not _is_current_file(fd, path):
+            _FD_CACHE.pop(path, None)
+            try:
+                fd.close()
+            except OSError:
+                pass
+            fd = None
+        if fd is None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            fd = open(path, "ab", buffering=0)
+            _FD_CACHE[path] = fd
+        try:
+            fd.write(data)
+        except OSError:
+            _FD_CACHE.pop(path, None)
+            fd.close()
+            raise
+
+
+def _close_fds() -> None:
+    with _FD_LOCK:
+        for fd in _FD_CACHE.values():
+            try:
+                fd.close()
+            except OSError:
+                pass
+        _FD_CACHE.clear()
+
+
+atexit.register(_close_fds)
+
+
+def _dumps_event(payload: dict[str, Any]) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload)
+        except orjson.JSONEncodeError:
+            # Non-str keys or oversized ints: let json handle what it can.
+            pass
+    return json.dumps(payload, ensure_ascii=True).encode("utf-8")
+
+
+def _loads_event(line: str) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            # json accepts a few things orjson rejects (NaN, huge ints); keep them readable.
+            pass
+    return json.loads(line)
 
 
 def read_events(path: str, limit: int | None = None) -> list[dict[str, Any]]:
@@ -91,13 +166,18 @@ def read_events(path: str, limit: int | None = None) -> list[dict[str, Any]]:
     file_path = Path(path)
     if not file_path.exists():
         return []
-    lines = file_path.read_text(encoding="utf-8").splitlines()
-    if limit is not None:
-        lines = lines[-limit:]
+    with file_path.open("r", encoding="utf-8") as f:
+        if limit is not None and limit > 0:
+            # Keep only the tail instead of materializing the whole log.
+            lines: Any = deque(f, maxlen=limit)
+        else:
+            lines = f.readlines()
+            if limit is not None:
+                lines = lines[-limit:]
     items: list[dict[str, Any]] = []
     for line in lines:
         try:
-            items.append(json.loads(line))
+            items.append(_loads_event(line))
         except json.JSONDecodeError:
             continue
     return items
@@ -124,8 +204,6 @@ def write_events(path: str, events: list[dict[str, Any]]) -> None:
 
     file_path = Path(path)
     file_path.parent.mkdir(parents=True, exist_ok=True)
-    with file_path.open("w", encoding="utf-8") as f:
-        for item in events:
-            if not isinstance(item, dict):
-                continue
-            f.write(json.dumps(item, ensure_ascii=True) + "\n")
+    lines = [_dumps_event(item) + b"\n" for item in events if isinstance(item, dict)]
+    with file_path.open("wb") as f:
+        f.write(b"".join(lines))
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import os
+import re
 import threading
+from functools import lru_cache
 from typing import Any
 from pathlib import Path
 import logging
@@ -13,20 +15,23 @@ from app.services.runtime.request_context import get_request_user_id
 from app.services.runtime.settings_store import load_connection_settings
 from app.services.runtime.user_scope import normalize_user_id
 
-try:
-    import oracledb  # type: ignore
-except Exception:  # pragma: no cover - optional dependency
-    oracledb = None
+# Imported on first use by _require_oracledb; processes that never touch Oracle
+# (health checks, PDF-only workers) skip loading the driver.
+oracledb: Any = None
 
 
 _POOLS: dict[str, Any] = {}
+# Guards _POOL_KEY_LOCKS; pools themselves are created under their own key's lock
+# so a slow create_pool for one user does not block the others.
 _POOL_LOCK = threading.Lock()
+_POOL_KEY_LOCKS: dict[str, threading.Lock] = {}
 _CLIENT_INIT = False
 _CLIENT_LOCK = threading.Lock()
 logger = logging.getLogger(__name__)
-_SSL_RETRY_ERROR_MARKERS = (
-    "ORA-28759",
-    "ORA-288",
+_SSL_RETRY_ERROR_RE = re.compile(r"ORA-28759|ORA-288", re.IGNORECASE)
+_RECOVERABLE_ACQUIRE_ERROR_RE = re.compile(
+    r"DPY-4011|DPY-6005|DPI-1080|CONNECTION WAS CLOSED|CONNECTION RESET|EOF OCCURRED",
+    re.IGNORECASE,
 )
 
 
@@ -104,12 +109,11 @@ def _create_pool_with_retry(lib: Any, pool_kwargs: dict[str, Any], *, ssl_mode:
     try:
         return lib.create_pool(**pool_kwargs)
     except Exception as exc:
-        upper_msg = str(exc).upper()
         if (
             str(pool_kwargs.get("dsn", "")).lower().startswith("tcps://")
             and tcp_fallback_dsn
             and ssl_mode == "require"
-            and any(marker in upper_msg for marker in _SSL_RETRY_ERROR_MARKERS)
+            and _SSL_RETRY_ERROR_RE.search(str(exc))
         ):
             retry_kwargs = dict(pool_kwargs)
             retry_kwargs["dsn"] = tcp_fallback_dsn
@@ -118,15 +122,19 @@ def _create_pool_with_retry(lib: Any, pool_kwargs: dict[str, Any], *, ssl_mode:
 
 
 def _has_client_lib(lib_path: Path) -> bool:
-    return any(
-        next(lib_path.glob(pattern), None) is not None
-        for pattern in ("libclntsh.so*", "oci.dll", "libclntsh.dylib")
-    )
+    # One directory listing instead of a glob per library name.
+    try:
+        with os.scandir(lib_path) as entries:
+            return any(
+                entry.name.startswith("libclntsh.so") or entry.name in {"oci.dll", "libclntsh.dylib"}
+                for entry in entries
+            )
+    except OSError:
+        return False
 
 
-def _candidate_client_dirs() -> list[Path]:
+def _candidate_client_dirs(env_dir: str) -> list[Path]:
     candidates: list[Path] = []
-    env_dir = os.getenv("ORACLE_LIB_DIR", "").strip()
     if env_dir:
         candidates.append(Path(env_dir))
 
@@ -142,21 +150,33 @@ def _candidate_client_dirs() -> list[Path]:
         candidates.append(repo_root / rel)
         candidates.append(text_to_sql_root / rel)
 
-    deduped: list[Path] = []
-    seen: set[str] = set()
+    # First candidate wins for each resolved location.
+    deduped: dict[str, Path] = {}
     for path in candidates:
-        key = str(path.resolve()) if path.exists() else str(path)
-        if key in seen:
+        deduped.setdefault(str(path.resolve()) if path.exists() else str(path), path)
+    return list(deduped.values())
+
+
+@lru_cache(maxsize=8)
+def _find_client_dir(env_dir: str) -> Path | None:
+    # Keyed on ORACLE_LIB_DIR so the filesystem scan runs once per configured value.
+    for candidate in _candidate_client_dirs(env_dir):
+        if not candidate.exists():
             continue
-        seen.add(key)
-        deduped.append(path)
-    return deduped
+        if _has_client_lib(candidate):
+            return candidate
+    return None
 
 
 def _require_oracledb() -> Any:
+    global oracledb
     if oracledb is None:
-        raise HTTPException(
-            status_code=500, detail="oracledb library is not installed")
+        try:
+            import oracledb as lib  # type: ignore
+        except Exception as exc:  # pragma: no cover - optional dependency
+            raise HTTPException(
+                status_code=500, detail="oracledb library is not installed") from exc
+        oracledb = lib
     return oracledb
 
 
@@ -189,34 +209,29 @@ def _init_oracle_client() -> None:
         # Thin mode does not require Oracle Instant Client.
         return
     lib = _require_oracledb()
-    config_dir = os.getenv("ORACLE_TNS_ADMIN", "").strip()
     strict_thick = driver_mode == "thick"
-    selected_path: Path | None = None
-    for candidate in _candidate_client_dirs():
-        if not candidate.exists():
-            continue
-        if _has_client_lib(candidate):
-            selected_path = candidate
-            break
-    if selected_path is None:
-        if strict_thick:
-            raise HTTPException(
-                status_code=500,
-                detail=(
-                    "Oracle client init failed. ORACLE_DRIVER_MODE=thick but no Oracle client library "
-                    "was found. Set ORACLE_DRIVER_MODE=thin or provide ORACLE_LIB_DIR with Instant Client."
-                ),
-            )
-        # Auto mode: keep thin mode if no Instant Client is available.
-        return
-    lib_dir = str(selected_path)
-    if not config_dir:
-        candidate_tns = selected_path / "network" / "admin"
-        if candidate_tns.exists():
-            config_dir = str(candidate_tns)
     with _CLIENT_LOCK:
+        # Discovery runs under the lock so concurrent cold starts do not all scan.
         if _CLIENT_INIT:
             return
+        config_dir = os.getenv("ORACLE_TNS_ADMIN", "").strip()
+        selected_path = _find_client_dir(os.getenv("ORACLE_LIB_DIR", "").strip())
+        if selected_path is None:
+            if strict_thick:
+                raise HTTPException(
+                    status_code=500,
+                    detail=(
+                        "Oracle client init failed. ORACLE_DRIVER_MODE=thick but no Oracle client library "
+                        "was found. Set ORACLE_DRIVER_MODE=thin or provide ORACLE_LIB_DIR with Instant Client."
+                    ),
+                )
+            # Auto mode: keep thin mode if no Instant Client is available.
+            return
+        lib_dir = str(selected_path)
+        if not config_dir:
+            candidate_tns = selected_path / "network" / "admin"
+            if candidate_tns.exists():
+                config_dir = str(candidate_tns)
         try:
             if config_dir:
                 lib.init_oracle_client(lib_dir=lib_dir, config_dir=config_dir)
@@ -247,6 +262,14 @@ def _pool_key(user_id: str | None = None) -> str:
     return "__global__"
 
 
+def _pool_lock_for(key: str) -> threading.Lock:
+    lock = _POOL_KEY_LOCKS.get(key)
+    if lock is not None:
+        return lock
+    with _POOL_LOCK:
+        return _POOL_KEY_LOCKS.setdefault(key, threading.Lock())
+
+
 def _close_pool(pool: Any) -> None:
     try:
         pool.close()
@@ -256,11 +279,22 @@ def _close_pool(pool: Any) -> None:
 
 def get_pool(user_id: str | None = None):
     key = _pool_key(user_id)
-    with _POOL_LOCK:
+    # Lock-free fast path: a dict read is atomic under the GIL, and misses are
+    # re-checked under the key's lock before a pool is created.
+    pool = _POOLS.get(key)
+    if pool is not None:
+        return pool
+    with _pool_lock_for(key):
         pool = _POOLS.get(key)
         if pool is not None:
             return pool
+        # Settings are resolved under the lock so racing cold misses read them once.
+        pool = _create_pool(user_id)
+        _POOLS[key] = pool
+        return pool
 
+
+def _create_pool(user_id: str | None) -> Any:
     settings = get_settings()
     resolved_user = _resolve_user_id(user_id)
     overrides = load_connection_settings(
@@ -305,171 +339,170 @@ def get_pool(user_id: str | None = None):
         )
     _init_oracle_client()
     lib = _require_oracledb()
-    with _POOL_LOCK:
-        existing = _POOLS.get(key)
-        if existing is not None:
-            return existing
 
-        if prefer_env:
-            username = str(env_profile.get("user") or "").strip()
-            password = str(env_profile.get("password") or "")
-        else:
-            username = str(overrides.get("username") or settings.oracle_user or "").strip()
-            password_value = overrides.get("password")
-            if password_value is None:
-                password_value = settings.oracle_password
-            password = str(password_value or "")
-        if password != password.strip():
-            password = password.strip()
-        if not username:
-            raise HTTPException(
-                status_code=503,
-                detail="Oracle username is not configured. Save connection settings first.",
-            )
-        if not password:
-            raise HTTPException(
-                status_code=503,
-                detail="Oracle password is empty. Save connection settings with a valid password.",
-            )
-        pool_kwargs = {
-            "user": username,
-            "password": password,
-            "dsn": dsn,
-            "min": settings.oracle_pool_min,
-            "max": settings.oracle_pool_max,
-            "increment": settings.oracle_pool_inc,
-            "timeout": settings.oracle_pool_timeout_sec,
-        }
-        try:
-            created = _create_pool_with_retry(
-                lib,
-                pool_kwargs,
-                ssl_mode=ssl_mode,
-                tcp_fallback_dsn=tcp_fallback_dsn,
-            )
-        except Exception as exc:
-            # If env profile was preferred but failed, try user/runtime settings once.
-            if prefer_env and (dsn_override or (host and port and database)):
-                try:
-                    fallback_dsn = dsn_override
-                    fallback_tcp = ""
-                    fallback_ssl_mode = str(overrides.get("sslMode") or "").strip().lower()
-                    if not fallback_dsn:
-                        fallback_dsn, fallback_tcp = _build_dsn(
-                            host=host,
-                            port=port,
-                            database=database,
+    if prefer_env:
+        username = str(env_profile.get("user") or "").strip()
+        password = str(env_profile.get("password") or "")
+    else:
+        username = str(overrides.get("username") or settings.oracle_user or "").strip()
+        password_value = overrides.get("password")
+        if password_value is None:
+            password_value = settings.oracle_password
+        password = str(password_value or "")
+    if password != password.strip():
+        password = password.strip()
+    if not username:
+        raise HTTPException(
+            status_code=503,
+            detail="Oracle username is not configured. Save connection settings first.",
+        )
+    if not password:
+        raise HTTPException(
+            status_code=503,
+            detail="Oracle password is empty. Save connection settings with a valid password.",
+        )
+    pool_kwargs = {
+        "user": username,
+        "password": password,
+        "dsn": dsn,
+        "min": settings.oracle_pool_min,
+        "max": settings.oracle_pool_max,
+        "increment": settings.oracle_pool_inc,
+        "timeout": settings.oracle_pool_timeout_sec,
+        "stmtcachesize": settings.oracle_stmt_cache_size,
+    }
+    try:
+        created = _create_pool_with_retry(
+            lib,
+            pool_kwargs,
+            ssl_mode=ssl_mode,
+            tcp_fallback_dsn=tcp_fallback_dsn,
+        )
+    except Exception as exc:
+        # If env profile was preferred but failed, try user/runtime settings once.
+        if prefer_env and (dsn_override or (host and port and database)):
+            try:
+                fallback_dsn = dsn_override
+                fallback_tcp = ""
+                fallback_ssl_mode = str(overrides.get("sslMode") or "").strip().lower()
+                if not fallback_dsn:
+                    fallback_dsn, fallback_tcp = _build_dsn(
+                        host=host,
+                        port=port,
+                        database=database,
+                        ssl_mode=fallback_ssl_mode,
+                    )
+                if fallback_dsn:
+                    fallback_username = str(overrides.get("username") or "").strip()
+                    fallback_password = str(overrides.get("password") or "").strip()
+                    if fallback_username and fallback_password:
+                        fallback_kwargs = {
+                            "user": fallback_username,
+                            "password": fallback_password,
+                            "dsn": fallback_dsn,
+                            "min": settings.oracle_pool_min,
+                            "max": settings.oracle_pool_max,
+                            "increment": settings.oracle_pool_inc,
+                            "timeout": settings.oracle_pool_timeout_sec,
+                            "stmtcachesize": settings.oracle_stmt_cache_size,
+                        }
+                        created = _create_pool_with_retry(
+                            lib,
+                            fallback_kwargs,
                             ssl_mode=fallback_ssl_mode,
+                            tcp_fallback_dsn=fallback_tcp,
                         )
-                    if fallback_dsn:
-                        fallback_username = str(overrides.get("username") or "").strip()
-                        fallback_password = str(overrides.get("password") or "").strip()
-                        if fallback_username and fallback_password:
-                            fallback_kwargs = {
-                                "user": fallback_username,
-                                "password": fallback_password,
-                                "dsn": fallback_dsn,
-                                "min": settings.oracle_pool_min,
-                                "max": settings.oracle_pool_max,
-                                "increment": settings.oracle_pool_inc,
-                                "timeout": settings.oracle_pool_timeout_sec,
-                            }
-                            created = _create_pool_with_retry(
-                                lib,
-                                fallback_kwargs,
-                                ssl_mode=fallback_ssl_mode,
-                                tcp_fallback_dsn=fallback_tcp,
-                            )
-                            source_label = "connection_settings"
-                        else:
-                            raise _pool_create_error(exc) from exc
+                        source_label = "connection_settings"
                     else:
                         raise _pool_create_error(exc) from exc
-                except Exception as retry_exc:
-                    retry_http = _pool_create_error(retry_exc)
-                    raise HTTPException(
-                        status_code=retry_http.status_code,
-                        detail=f"{retry_http.detail} (source={source_label})",
-                    ) from retry_exc
-            else:
-                err_http = _pool_create_error(exc)
+                else:
+                    raise _pool_create_error(exc) from exc
+            except Exception as retry_exc:
+                retry_http = _pool_create_error(retry_exc)
                 raise HTTPException(
-                    status_code=err_http.status_code,
-                    detail=f"{err_http.detail} (source={source_label})",
-                ) from exc
-        _POOLS[key] = created
-        return created
+                    status_code=retry_http.status_code,
+                    detail=f"{retry_http.detail} (source={source_label})",
+                ) from retry_exc
+        else:
+            err_http = _pool_create_error(exc)
+            raise HTTPException(
+                status_code=err_http.status_code,
+                detail=f"{err_http.detail} (source={source_label})",
+            ) from exc
+    return created
+
+
+def warmup_pool() -> None:
+    """Create the default pool and open its minimum connections ahead of the first request."""
+    try:
+        pool = get_pool(None)
+        conns = [pool.acquire() for _ in range(max(1, int(getattr(pool, "min", 1) or 1)))]
+        for conn in conns:
+            conn.close()
+    except Exception as exc:  # pragma: no cover - depends on DB availability
+        logger.warning("Oracle pool warmup skipped: %s", getattr(exc, "detail", exc))
 
 
 def reset_pool(user_id: str | None = None) -> None:
     key = _pool_key(user_id)
-    with _POOL_LOCK:
+    with _pool_lock_for(key):
         pool = _POOLS.pop(key, None)
-        if pool is not None:
-            _close_pool(pool)
-            return
+    if pool is not None:
+        _close_pool(pool)
+        return
 
-        # Preserve legacy behavior for no-user contexts.
-        if key == "__global__":
-            pools = list(_POOLS.values())
-            _POOLS.clear()
-            for item in pools:
+    # Preserve legacy behavior for no-user contexts.
+    if key == "__global__":
+        for other_key in list(_POOLS):
+            with _pool_lock_for(other_key):
+                item = _POOLS.pop(other_key, None)
+            if item is not None:
                 _close_pool(item)
 
 
+def _acquire_with_timeout(pool: Any, *, accuracy_mode: bool) -> Any:
+    conn = pool.acquire()
+    try:
+        conn.call_timeout = resolve_call_timeout_ms(accuracy_mode=accuracy_mode)
+    except Exception:
+        pass
+    return conn
+
+
 def acquire_connection(user_id: str | None = None, *, accuracy_mode: bool = False):
     pool = get_pool(user_id)
     try:
-        conn = pool.acquire()
-        try:
-            conn.call_timeout = resolve_call_timeout_ms(accuracy_mode=accuracy_mode)
-        except Exception:
-            pass
-        return conn
+        return _acquire_with_timeout(pool, accuracy_mode=accuracy_mode)
     except Exception as exc:  # pragma: no cover - depends on driver
-        message = str(exc)
-        upper = message.upper()
-        recoverable = any(
-            marker in upper
-            for marker in (
-                "DPY-4011",
-                "DPY-6005",
-                "DPI-1080",
-                "CONNECTION WAS CLOSED",
-                "CONNECTION RESET",
-                "EOF OCCURRED",
-            )
-        )
-        if recoverable:
-            # Recover stale/disconnected pools once before failing the request.
-            reset_pool(user_id)
-            try:
-                conn = get_pool(user_id).acquire()
-                try:
-                    conn.call_timeout = resolve_call_timeout_ms(accuracy_mode=accuracy_mode)
-                except Exception:
-                    pass
-                return conn
-            except Exception as retry_exc:
-                raise HTTPException(
-                    status_code=503,
-                    detail=f"Oracle pool unavailable: {retry_exc}",
-                ) from retry_exc
-        if "DPY-4011" in upper:
-            logger.warning("Oracle acquire failed with DPY-4011 (accuracy_mode=%s): %s", accuracy_mode, message)
+        if not _RECOVERABLE_ACQUIRE_ERROR_RE.search(str(exc)):
+            raise HTTPException(
+                status_code=503, detail=f"Oracle pool unavailable: {exc}") from exc
+    # A single stale session is usually the culprit and the pool discards dead
+    # sessions (ping_interval), so retry on the same pool before rebuilding it.
+    try:
+        return _acquire_with_timeout(pool, accuracy_mode=accuracy_mode)
+    except Exception:
+        pass
+    # Recover stale/disconnected pools once before failing the request.
+    reset_pool(user_id)
+    try:
+        return _acquire_with_timeout(get_pool(user_id), accuracy_mode=accuracy_mode)
+    except Exception as retry_exc:
         raise HTTPException(
-            status_code=503, detail=f"Oracle pool unavailable: {exc}") from exc
+            status_code=503,
+            detail=f"Oracle pool unavailable: {retry_exc}",
+        ) from retry_exc
 
 
 def pool_status(user_id: str | None = None) -> dict[str, Any]:
     pool = get_pool(user_id)
     try:
         conn = pool.acquire()
-        cur = conn.cursor()
-        cur.execute("SELECT 1 FROM dual")
-        cur.fetchone()
-        cur.close()
-        conn.close()
+        try:
+            # One network round trip, no SQL parse/execute/fetch.
+            conn.ping()
+        finally:
+            conn.close()
     except Exception as exc:  # pragma: no cover - depends on driver
         raise HTTPException(
             status_code=503, detail=f"Oracle connection check failed: {exc}") from exc
@@ -19,7 +19,14 @@ _FROM_JOIN_TABLE_WITH_SCHEMA_RE = re.compile(
     r"\b(from|join)\s+(\"?[A-Za-z0-9_$#]+\"?)\s*\.\s*(\"?[A-Za-z0-9_$#]+\"?)",
     re.IGNORECASE,
 )
+_READ_ONLY_PREFIX_RE = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+_SELECT_WORD_RE = re.compile(r"\bselect\b", re.IGNORECASE)
+_SCHEMA_NAME_RE = re.compile(r"[A-Za-z0-9_$#]+")
+_TOTAL_COUNT_COLUMN = "__TOTAL_COUNT__"
+_ORDER_BY_RE = re.compile(r"\border\s+by\b", re.IGNORECASE)
 _CLIENT_TIMEOUT_MARKERS = ("DPY-4024", "DPI-1067", "ORA-03156")
+# (st_mtime_ns, owner) of the last schema_catalog.json read.
+_OWNER_CACHE: tuple[int, str] | None = None
 
 logger = logging.getLogger(__name__)
 
@@ -40,14 +47,23 @@ def _safe_close(resource: Any) -> None:
 
 
 def _load_metadata_owner() -> str:
+    global _OWNER_CACHE
+
     path: Path = project_path("var/metadata/schema_catalog.json")
-    if not path.exists():
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
         return ""
+    cached = _OWNER_CACHE
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
     try:
         data = json.loads(path.read_text(encoding="utf-8"))
     except json.JSONDecodeError:
         return ""
-    return str((data or {}).get("owner") or "").strip()
+    owner = str((data or {}).get("owner") or "").strip()
+    _OWNER_CACHE = (mtime_ns, owner)
+    return owner
 
 
 def _is_ora_00942(exc: Exception) -> bool:
@@ -55,7 +71,7 @@ def _is_ora_00942(exc: Exception) -> bool:
 
 
 def _valid_schema_name(schema: str) -> bool:
-    return bool(re.fullmatch(r"[A-Za-z0-9_$#]+", schema))
+    return bool(_SCHEMA_NAME_RE.fullmatch(schema))
 
 
 def _normalize_identifier(identifier: str) -> str:
@@ -70,6 +86,8 @@ def _strip_non_target_schema_prefixes(
     *,
     target_schemas: set[str],
 ) -> tuple[str, bool]:
+    if "." not in sql:
+        return sql, False
     normalized_targets = {
         _normalize_identifier(schema)
         for schema in target_schemas
@@ -79,18 +97,41 @@ def _strip_non_target_schema_prefixes(
 
     def _replace(match: re.Match[str]) -> str:
         nonlocal changed
-        keyword = match.group(1)
+        # The pattern admits no whitespace, so normalizing is unquote + upper.
         schema = match.group(2)
-        table = match.group(3)
-        if _normalize_identifier(schema) in normalized_targets:
+        if len(schema) >= 2 and schema[0] == '"' == schema[-1]:
+            schema = schema[1:-1]
+        if schema.upper() in normalized_targets:
             return match.group(0)
         changed = True
-        return f"{keyword} {table}"
+        return f"{match.group(1)} {match.group(3)}"
 
     rewritten = _FROM_JOIN_TABLE_WITH_SCHEMA_RE.sub(_replace, sql)
     return rewritten, changed
 
 
+def _fetch_lobs_as_values(cursor: Any, metadata: Any) -> Any:
+    # Only reached with a live connection, so the driver is already loaded.
+    import oracledb  # type: ignore
+
+    # LOB locators cost a round trip per value to read; fetch them inline as str/bytes.
+    if metadata.type_code == oracledb.DB_TYPE_CLOB:
+        return cursor.var(oracledb.DB_TYPE_LONG, arraysize=cursor.arraysize)
+    if metadata.type_code == oracledb.DB_TYPE_NCLOB:
+        # LONG goes through the database character set; keep national-charset text intact.
+        return cursor.var(oracledb.DB_TYPE_LONG_NVARCHAR, arraysize=cursor.arraysize)
+    if metadata.type_code == oracledb.DB_TYPE_BLOB:
+        return cursor.var(oracledb.DB_TYPE_LONG_RAW, arraysize=cursor.arraysize)
+    return None
+
+
+def _can_window_total_count(sql: str) -> bool:
+    # Wrapping as SELECT t.*, COUNT(*) OVER () FROM (...) t does not preserve the inner
+    # row order, so ordered queries (including ROWNUM top-N wrappers that order inside a
+    # subquery) keep the separate COUNT(*) round trip instead.
+    return not _ORDER_BY_RE.search(sql)
+
+
 def _classify_db_error(exc: Exception) -> str:
     message = str(exc).upper()
     if any(marker in message for marker in _CLIENT_TIMEOUT_MARKERS):
@@ -120,9 +161,10 @@ def execute_sql(
     tag = str(query_tag or "default").strip() or "default"
     # Keep executor policy aligned with precheck_sql:
     # allow plain SELECT and CTE-based read-only queries (WITH ... SELECT ...).
-    if not re.match(r"^\s*(select|with)\b", text, re.IGNORECASE):
+    prefix = _READ_ONLY_PREFIX_RE.match(text)
+    if not prefix:
         raise HTTPException(status_code=400, detail="Only SELECT queries are allowed")
-    if re.match(r"^\s*with\b", text, re.IGNORECASE) and not re.search(r"\bselect\b", text, re.IGNORECASE):
+    if prefix.group(1).lower() != "select" and not _SELECT_WORD_RE.search(text):
         raise HTTPException(status_code=400, detail="CTE query must include SELECT")
 
     logger.info(
@@ -147,15 +189,32 @@ def execute_sql(
 
         def _run_once(schema_name: str, sql_text: str) -> dict[str, Any]:
             if schema_name and _valid_schema_name(schema_name):
-                schema_cur = conn.cursor()
-                try:
-                    schema_cur.execute(f"ALTER SESSION SET CURRENT_SCHEMA = {schema_name}")
-                finally:
-                    _safe_close(schema_cur)
+                # Same as ALTER SESSION SET CURRENT_SCHEMA, but piggybacked on the next
+                # round trip; pooled sessions already on this schema skip it entirely.
+                target_schema = schema_name.upper()
+                if str(conn.current_schema or "").upper() != target_schema:
+                    conn.current_schema = target_schema
+
+            # Best-effort full result count for UI badges. Unordered queries get it as a
+            # window column on the same round trip; ordered ones use a separate COUNT(*).
+            want_total = bool(getattr(settings, "db_precount_enabled", False))
+            window_total = want_total and _can_window_total_count(sql_text)
+            row_cap_limit = max(0, int(getattr(settings, "row_cap", 0) or 0))
+            # Fetch in large batches (the driver default is 100 rows per round trip),
+            # but never more than the row cap needs.
+            array_size = max(1, int(getattr(settings, "db_fetch_array_size", 1000) or 1000))
+            if row_cap_limit > 0:
+                array_size = min(array_size, row_cap_limit + 1)
+
+            def _open_run_cursor() -> Any:
+                cur = conn.cursor()
+                cur.arraysize = array_size
+                cur.prefetchrows = array_size + 1
+                cur.outputtypehandler = _fetch_lobs_as_values
+                return cur
 
-            # Best-effort full result count for UI badges.
             total_count: int | None = None
-            if bool(getattr(settings, "db_precount_enabled", False)):
+            if want_total and not window_total:
                 count_cur = conn.cursor()
                 try:
                     count_cur.execute(f"SELECT COUNT(*) FROM ({sql_text})")
@@ -167,11 +226,26 @@ def execute_sql(
                 finally:
                     _safe_close(count_cur)
 
-            run_cur = conn.cursor()
+            run_cur = _open_run_cursor()
             try:
-                run_cur.execute(sql_text)
+                if window_total:
+                    try:
+                        run_cur.execute(
+                            f'SELECT t.*, COUNT(*) OVER () AS "{_TOTAL_COUNT_COLUMN}" FROM ({sql_text}) t'
+                        )
+                    except Exception as exc:
+                        # t.* is ambiguous when the query selects duplicate column names;
+                        # that is the wrapper's own failure, so run the plain query without
+                        # a total. Anything else (timeouts included) is the query's error.
+                        if "ORA-00918" not in str(exc).upper():
+                            raise
+                        window_total = False
+                        _safe_close(run_cur)
+                        run_cur = _open_run_cursor()
+                        run_cur.execute(sql_text)
+                else:
+                    run_cur.execute(sql_text)
                 columns = [d[0] for d in run_cur.description] if run_cur.description else []
-                row_cap_limit = max(0, int(getattr(settings, "row_cap", 0) or 0))
                 row_cap_reached = False
                 if row_cap_limit > 0:
                     rows = run_cur.fetchmany(row_cap_limit + 1)
@@ -180,6 +254,10 @@ def execute_sql(
                         row_cap_reached = True
                 else:
                     rows = run_cur.fetchall()
+                if window_total:
+                    columns = columns[:-1]
+                    total_count = int(rows[0][-1]) if rows else 0
+                    rows = [row[:-1] for row in rows]
                 return {
                     "columns": columns,
                     "rows": rows,
@@ -4,6 +4,11 @@ from pathlib import Path
 from typing import Any
 import json
 
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
 from app.core.config import get_settings
 from app.services.oracle.connection import acquire_connection
 from app.services.runtime.settings_store import load_table_scope
@@ -49,6 +54,9 @@ _SYSTEM_OWNER_PREFIXES = (
     "FLOWS_",
 )
 
+# Dictionary views return thousands of rows for a real schema; fetch them in few round trips.
+_METADATA_FETCH_ARRAY_SIZE = 5000
+
 
 def _is_application_owner(owner: str) -> bool:
     upper = str(owner or "").strip().upper()
@@ -59,6 +67,12 @@ def _is_application_owner(owner: str) -> bool:
     return not any(upper.startswith(prefix) for prefix in _SYSTEM_OWNER_PREFIXES)
 
 
+def _dump_json(data: dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, ensure_ascii=True, indent=2).encode("utf-8")
+
+
 def _build_table_pair_clause(
     pairs: list[tuple[str, str]],
     *,
@@ -154,6 +168,8 @@ def extract_metadata(owner: str, output_dir: str = "var/metadata") -> dict[str,
 
     conn = acquire_connection()
     cur = conn.cursor()
+    cur.arraysize = _METADATA_FETCH_ARRAY_SIZE
+    cur.prefetchrows = _METADATA_FETCH_ARRAY_SIZE + 1
 
     target_pairs, effective_owner, fallback_from_owner_lookup = _resolve_target_tables(cur, requested_owner)
     schema_catalog["owner"] = effective_owner
@@ -177,12 +193,19 @@ def extract_metadata(owner: str, output_dir: str = "var/metadata") -> dict[str,
             """,
             pair_binds,
         )
+        tables = schema_catalog["tables"]
+        current_table: str | None = None
+        table_columns: list[dict[str, Any]] = []
         for table_owner, table_name, column_name, data_type, nullable in cur.fetchall():
-            table_entry = schema_catalog["tables"].setdefault(
-                table_name,
-                {"owner": table_owner, "columns": [], "primary_keys": []},
-            )
-            table_entry["columns"].append({
+            # Rows arrive grouped by table (ORDER BY owner, table_name), so look the
+            # entry up only when the table changes.
+            if table_name != current_table:
+                current_table = table_name
+                table_columns = tables.setdefault(
+                    table_name,
+                    {"owner": table_owner, "columns": [], "primary_keys": []},
+                )["columns"]
+            table_columns.append({
                 "name": column_name,
                 "type": data_type,
                 "nullable": nullable == "Y",
@@ -220,10 +243,10 @@ def extract_metadata(owner: str, output_dir: str = "var/metadata") -> dict[str,
             elif ctype == "R":
                 fk_rows.append((table_owner, table_name, column_name, str(r_owner), str(r_cname)))
 
+        edges = join_graph["edges"]
         for fk_owner, fk_table, fk_column, r_owner, r_cname in fk_rows:
-            pk_cols = pk_by_constraint.get((r_owner, r_cname), [])
-            for pk_table, pk_column in pk_cols:
-                join_graph["edges"].append({
+            for pk_table, pk_column in pk_by_constraint.get((r_owner, r_cname), ()):
+                edges.append({
                     "from_schema": fk_owner,
                     "from_table": fk_table,
                     "from_column": fk_column,
@@ -235,14 +258,8 @@ def extract_metadata(owner: str, output_dir: str = "var/metadata") -> dict[str,
 
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
-    (output_path / "schema_catalog.json").write_text(
-        json.dumps(schema_catalog, ensure_ascii=True, indent=2),
-        encoding="utf-8",
-    )
-    (output_path / "join_graph.json").write_text(
-        json.dumps(join_graph, ensure_ascii=True, indent=2),
-        encoding="utf-8",
-    )
+    (output_path / "schema_catalog.json").write_bytes(_dump_json(schema_catalog))
+    (output_path / "join_graph.json").write_bytes(_dump_json(join_graph))
 
     cur.close()
     conn.close()
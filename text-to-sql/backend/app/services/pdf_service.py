@@ -11,8 +11,15 @@ from openai import AsyncOpenAI
 import re
 import base64
 from difflib import get_close_matches
+from functools import lru_cache
+from operator import itemgetter
 from typing import Any
 
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
 from app.services.runtime.state_store import get_state_store
 from app.services.oracle.executor import execute_sql
 from app.services.agents.orchestrator import run_oneshot
@@ -104,7 +111,51 @@ _SIGNAL_NAME_ALIASES: dict[str, str] = {
     "hospital_expire_flag": "in_hospital_mortality",
 }
 
-_RESULT_IDENTIFIER_COLUMNS = {"SUBJECT_ID", "HADM_ID", "STAY_ID"}
+_RESULT_IDENTIFIER_COLUMNS = frozenset({"SUBJECT_ID", "HADM_ID", "STAY_ID"})
+# hadm_id로 조인하는 병원(입원) 단위 step 타입
+_HOSPITAL_LEVEL_STEP_TYPES = frozenset(
+    {"lab", "diagnosis", "prescription", "microbiology", "admissions", "procedures"}
+)
+_WINDOW_KEY_ALIASES = {
+    "first_24h": "icu_first_24h",
+    "icu_24h": "icu_first_24h",
+    "admission_24h": "admission_first_24h",
+    "pre_discharge_24h": "icu_discharge_last_24h",
+}
+
+_ALIAS_RE = re.compile(r'(?:FROM|JOIN)\s+([A-Z_]+)\s+([A-Z]{1,4})\b', re.IGNORECASE)
+_COL_REF_RE = re.compile(r'\b([A-Za-z]{1,4})\.([A-Z_]+)\b', re.IGNORECASE)
+_NORM_NONWORD_RE = re.compile(r"[^a-z0-9]+")
+_CHARTTIME_RE = re.compile(r"charttime", re.IGNORECASE)
+_PAGE_MARKER_RE = re.compile(r'\[page \d+, block \d+\]')
+_PAGE_SEP_RE = re.compile(r'=== page \d+ ===')
+_NONALNUM_HANGUL_RUN_RE = re.compile(r'[^a-z0-9가-힣]+')
+_PAGE_HEADER_RE = re.compile(r"===\s*PAGE\s+(\d+)\s*===\n?", re.IGNORECASE)
+_SLUG_RE = re.compile(r"[^a-z0-9_]+")
+_SLUG_COLLAPSE_RE = re.compile(r"_+")
+_SELECT_LIST_RE = re.compile(r"select\s+(.*?)\s+from\b", re.IGNORECASE | re.DOTALL)
+_SELECT_KEY_RES = {
+    key: re.compile(rf"\b{key}\b") for key in ("subject_id", "hadm_id", "stay_id")
+}
+_SSO_TABLE_RE = re.compile(r'SSO\.([A-Za-z0-9_]+)')
+_CODE_CLEAN_RE = re.compile(r"[^A-Za-z0-9]+")
+_QUOTED_IDENT_RE = re.compile(r'"([A-Za-z_]+)"')
+_QUOTE_CHARS_RE = re.compile(r"[\"'`]")
+_GENDER_SPLIT_RE = re.compile(r"[,/|]+")
+_GENDER_TOKEN_RE = re.compile(r"[^a-zA-Z0-9가-힣]+")
+_MIN_DAYS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(day|days|일|d)\b", re.IGNORECASE)
+# 표/그림 추출 트리거 키워드 (한 번의 검색으로 판정, 페이지 텍스트 소문자 복사 없음)
+_ASSET_TRIGGER_RE = re.compile(
+    "|".join(
+        re.escape(kw)
+        for kw in (
+            'eligibility criteria', 'figure', 'flowchart', 'table',
+            'inclusion', 'exclusion', 'missing data', '24 hours before discharge',
+            'study population', 'participant selection',
+        )
+    ),
+    re.IGNORECASE | re.ASCII,
+)
 
 
 def _env_int(
@@ -181,36 +232,77 @@ def _normalize_signal_name(value: Any) -> str:
                 if normalized:
                     return normalized
         return ""
-    raw = str(value or "").strip().lower()
+    return _normalize_signal_key(str(value or ""))
+
+
+@lru_cache(maxsize=4096)
+def _normalize_signal_key(text: str) -> str:
+    raw = text.strip().lower()
     if not raw:
         return ""
-    key = re.sub(r"[^a-z0-9]+", "_", raw)
-    key = re.sub(r"_+", "_", key).strip("_")
+    # '_'도 [^a-z0-9]에 속하므로 한 번의 치환으로 연속 구분자가 '_' 하나로 합쳐진다
+    key = _NORM_NONWORD_RE.sub("_", raw).strip("_")
     return _SIGNAL_NAME_ALIASES.get(key, key)
 
 
+def _mtime_ns(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+# 메타데이터 JSON은 (경로, mtime) 기준으로 캐시 — 파일이 바뀌면 다시 파싱한다.
+# 반환값은 공유되므로 호출부에서 수정하지 않는다. 파싱 오류는 캐시되지 않고 그대로 올라간다.
+@lru_cache(maxsize=16)
+def _parse_json_file(path: str, mtime_ns: int) -> Any:
+    data = Path(path).read_bytes()
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # json은 NaN 등 orjson이 거부하는 값도 읽으므로 기존 동작 유지
+            pass
+    return json.loads(data.decode("utf-8"))
+
+
+def _read_json_cached(path: Path) -> Any:
+    mtime_ns = _mtime_ns(path)
+    if mtime_ns is None:
+        raise FileNotFoundError(str(path))
+    return _parse_json_file(str(path), mtime_ns)
+
+
 def _load_metadata_json(path_env: Path, path_local: Path) -> dict:
     path = path_env if path_env.exists() else path_local
     if not path.exists():
         logger.warning(f"Metadata file not found: {path}")
         return {}
     try:
-        return json.loads(path.read_text(encoding="utf-8"))
+        return _read_json_cached(path)
     except Exception as e:
         logger.error(f"Failed to load metadata {path}: {e}")
         return {}
 
 
+def _schema_catalog_path() -> Path:
+    return _SCHEMA_CATALOG_PATH if _SCHEMA_CATALOG_PATH.exists() else _SCHEMA_CATALOG_LOCAL
+
+
 def _load_schema_for_prompt() -> str:
     """schema_catalog.json에서 테이블/컬럼 정보를 읽어 프롬프트용 텍스트 생성"""
-    catalog_path = _SCHEMA_CATALOG_PATH if _SCHEMA_CATALOG_PATH.exists() else _SCHEMA_CATALOG_LOCAL
-
-    if not catalog_path.exists():
+    catalog_path = _schema_catalog_path()
+    mtime_ns = _mtime_ns(catalog_path)
+    if mtime_ns is None:
         logger.warning("schema_catalog.json을 찾을 수 없습니다: %s", catalog_path)
         return _fallback_schema()
+    return _render_schema_for_prompt(str(catalog_path), mtime_ns)
 
+
+@lru_cache(maxsize=1)
+def _render_schema_for_prompt(catalog_path: str, mtime_ns: int) -> str:
     try:
-        catalog = json.loads(catalog_path.read_text(encoding="utf-8"))
+        catalog = _parse_json_file(catalog_path, mtime_ns)
     except Exception as e:
         logger.warning("schema_catalog.json 파싱 실패: %s", e)
         return _fallback_schema()
@@ -245,11 +337,17 @@ def _fallback_schema() -> str:
 
 def _load_valid_columns() -> dict[str, set[str]]:
     """schema_catalog.json에서 테이블별 유효 컬럼명 집합을 로드"""
-    catalog_path = _SCHEMA_CATALOG_PATH if _SCHEMA_CATALOG_PATH.exists() else _SCHEMA_CATALOG_LOCAL
-    if not catalog_path.exists():
+    catalog_path = _schema_catalog_path()
+    mtime_ns = _mtime_ns(catalog_path)
+    if mtime_ns is None:
         return {}
+    return _parse_valid_columns(str(catalog_path), mtime_ns)
+
+
+@lru_cache(maxsize=1)
+def _parse_valid_columns(catalog_path: str, mtime_ns: int) -> dict[str, set[str]]:
     try:
-        catalog = json.loads(catalog_path.read_text(encoding="utf-8"))
+        catalog = _parse_json_file(catalog_path, mtime_ns)
     except Exception:
         return {}
 
@@ -272,10 +370,7 @@ def _fix_column_names_in_sql(sql: str) -> tuple[str, list[str]]:
     # SQL에서 테이블 alias → 실제 테이블명 매핑 구축
     alias_map: dict[str, str] = {}
     # FROM/JOIN TABLENAME alias 패턴
-    for match in re.finditer(
-        r'(?:FROM|JOIN)\s+([A-Z_]+)\s+([A-Z]{1,4})\b',
-        sql, re.IGNORECASE
-    ):
+    for match in _ALIAS_RE.finditer(sql):
         table_name = match.group(1).upper()
         alias = match.group(2).upper()
         if table_name in valid_cols:
@@ -313,12 +408,7 @@ def _fix_column_names_in_sql(sql: str) -> tuple[str, list[str]]:
         return original
 
     # alias.COLUMN_NAME 패턴 매칭
-    fixed_sql = re.sub(
-        r'\b([A-Za-z]{1,4})\.([A-Z_]+)\b',
-        replace_column,
-        sql,
-        flags=re.IGNORECASE
-    )
+    fixed_sql = _COL_REF_RE.sub(replace_column, sql)
 
     if fixes:
         logger.info("SQL 컬럼명 자동수정: %s", "; ".join(fixes))
@@ -341,6 +431,13 @@ def _has_identifier_columns(columns: list[str]) -> bool:
     return any(col in _RESULT_IDENTIFIER_COLUMNS for col in columns)
 
 
+def _result_has_identifier(columns: Any) -> bool:
+    """_has_identifier_columns(_normalize_result_columns(columns)) without building the list."""
+    if not isinstance(columns, list):
+        return False
+    return any(str(col or "").strip().upper() in _RESULT_IDENTIFIER_COLUMNS for col in columns)
+
+
 def _append_warning_once(result: dict[str, Any], message: str) -> None:
     warnings = result.get("warning")
     if not isinstance(warnings, list):
@@ -418,14 +515,14 @@ def _extract_codes(value: Any) -> list[str]:
         raw_items = text.split(",") if "," in text else [text]
     cleaned: list[str] = []
     for item in raw_items:
-        code = re.sub(r"[^A-Za-z0-9]+", "", str(item or "")).upper().strip()
+        code = _CODE_CLEAN_RE.sub("", str(item or "")).upper().strip()
         if code and code not in cleaned:
             cleaned.append(code)
     return cleaned
 
 
 def _extract_min_days(text: str) -> float | None:
-    matched = re.search(r"(\d+(?:\.\d+)?)\s*(day|days|일|d)\b", text, flags=re.IGNORECASE)
+    matched = _MIN_DAYS_RE.search(text)
     if not matched:
         if "24h" in text.lower() or "24 hour" in text.lower():
             return 1.0
@@ -484,7 +581,7 @@ def _load_pdf_schema_map() -> dict[str, Any]:
     if not path.exists():
         return schema
     try:
-        payload = json.loads(path.read_text(encoding="utf-8"))
+        payload = _read_json_cached(path)
     except Exception as exc:
         logger.warning("PDF schema map load failed (%s): %s", path, exc)
         return schema
@@ -614,9 +711,187 @@ WINDOW_TEMPLATES = {
     "icu_discharge_last_24h": "s.charttime BETWEEN p.outtime - INTERVAL '24' HOUR AND p.outtime"
 }
 
+# RAG 메타데이터 시그널용 SQL 템플릿: itemid만 채우고 {operator}/{value}는 실행 시 치환
+_SIGNAL_SQL_TEMPLATES = {
+    "CHARTEVENTS": "SELECT stay_id, charttime FROM SSO.CHARTEVENTS WHERE itemid IN ({itemid}) AND valuenum {{operator}} {{value}} AND valuenum IS NOT NULL",
+    # Lab items often need joining with D_LABITEMS for readable labels, but if itemID is known, direct query is faster.
+    # However, to maintain compatibility with existing 'lab' template logic:
+    "LABEVENTS": "SELECT hadm_id, charttime FROM SSO.LABEVENTS WHERE itemid IN ({itemid}) AND valuenum {{operator}} {{value}} AND valuenum IS NOT NULL",
+}
+
+
+@lru_cache(maxsize=1)
+def _build_signal_maps(
+    meta_path: str, mtime_ns: int
+) -> tuple[dict[str, str], dict[str, dict[str, str]], frozenset[str]]:
+    """Merge defaults with mimic_rag_metadata_full.json once per file version; callers copy the result."""
+    signal_map = DEFAULT_CORE_SIGNALS.copy()
+    signal_metadata = DEFAULT_SIGNAL_METADATA.copy()
+    try:
+        full_meta = _parse_json_file(meta_path, mtime_ns)
+        for item in full_meta:
+            name = _normalize_signal_name(item.get("signal_name", ""))
+            if not name:
+                continue
+            mapping = item.get("mapping", {})
+            itemid = mapping.get("itemid")
+            table = mapping.get("target_table", "").upper()
+
+            if itemid and table:
+                # Generate SQL Template
+                template = _SIGNAL_SQL_TEMPLATES.get(table)
+                if template:
+                    sql = template.format(itemid=itemid)
+                    signal_map[name] = sql
+                    # Also add synonyms
+                    for syn in item.get("synonyms", []):
+                        syn_key = _normalize_signal_name(syn)
+                        if not syn_key:
+                            continue
+                        if syn_key not in signal_map: # Don't overwrite core signals
+                            signal_map[syn_key] = sql
+
+                # Update Metadata
+                if name not in signal_metadata:
+                    signal_metadata[name] = {
+                        "target_table": table,
+                        "itemid": str(itemid)
+                    }
+                for syn in item.get("synonyms", []):
+                    syn_key = _normalize_signal_name(syn)
+                    if not syn_key or syn_key in signal_metadata:
+                        continue
+                    signal_metadata[syn_key] = {
+                        "target_table": table,
+                        "itemid": str(itemid),
+                    }
+    except Exception as e:
+        logger.error(f"Failed to load RAG metadata: {e}. Using defaults.")
+    return signal_map, signal_metadata, frozenset(signal_metadata)
+
+
+@lru_cache(maxsize=1024)
+def _closest_signal_name(signal_name: str, candidates: frozenset[str]) -> str | None:
+    # difflib은 후보 수천 개에 대해 순수 Python으로 비교하므로 같은 변수명은 한 번만 계산.
+    # 동점은 문자열 값으로 갈리므로 후보 순서와 무관하게 결과가 같다.
+    matches = get_close_matches(signal_name, candidates, n=1, cutoff=0.7)
+    return matches[0] if matches else None
+
+
+_EXTRACT_CONDITIONS_INSTRUCTIONS = """당신은 세계 최고의 임상 연구 정보 추출 전문가입니다.
+제공된 논문 텍스트와 추출된 시각적 자산(표, 그림 요약)에서 '코호트 선정 조건(Eligibility/Inclusion/Exclusion)'을 누락 없이 정밀하게 추출하세요.
+
+[필수 요구사항]
+1. **신속 정확한 추출**: 긴 설명보다는 JSON 필드를 정확히 채우는 데 집중하세요.
+2. **시각적 정보 우선**: 텍스트와 표/그림의 수치가 다를 경우 표/그림(Flowchart)을 따르세요.
+3. **핵심 요약**: `summary_ko`와 `criteria_summary_ko`는 각각 3문장 내외로 핵심만 요약하세요. (속도 최적화)
+4. **논리적 분해**: 각 조건을 DB 필터링 로직 위주로 설명하세요.
+5. **임상 변수 추출**: 주요 수치형 임상 변수를 찾아 `variables` 리스트에 담고, 반드시 단위(Unit)를 함께 명시하세요.
+6. **모호성 표시**: first admission 기준(unit), ICD 버전, death time 필드가 불명확하면 `ambiguities`에 질문 형태로 추가하세요.
+
+[주의 사항 (Medical Guardrails)]
+- **ICD 코드 변환**: 진단 조건이 나오면 질환명(Text)을 그대로 쓰지 말고, 반드시 상응하는 **ICD-9/10 코드(예: 850, 486)**를 찾아서 `variables`의 `codes` 파라미터에 배열로 담으세요. (예: `["850", "851"]`)
+- **임상적 상식**: SOFA 점수는 패혈증 진단 시 통상 **2점 이상**을 의미합니다. 문맥 없이 0점이나 비상식적인 수치를 추출하지 마세요. 불명확하면 `is_mandatory: false`로 설정하세요.
+- **원천 데이터 우선**: 복합 점수(SOFA, ROX)보다는 측정 가능한 원천 변수(혈압, 의식 수준, 호흡수) 추출에 집중하세요.
+
+## 출력 JSON 스키마
+{
+  "cohort_definition": {
+    "title": "논문 제목",
+    "description": "Short description (English)",
+    "summary_ko": "연구 요약 (핵심 3문장, 150~300자)",
+    "criteria_summary_ko": "선정/제외 기준 요약 (핵심 3문장, 150~300자)",
+    "extraction_details": {
+      "study_context": {
+        "data_source": "데이터 출처",
+        "database_version": "버전",
+        "study_period": "연구 기간",
+        "setting": "설정"
+      },
+      "cohort_criteria": {
+        "population": [
+          {
+            "criterion": "선정/제외 기준 텍스트",
+            "type": "inclusion|exclusion",
+            "operational_definition": "DB 구현 로직 설명",
+            "evidence": "[Source] 인용 원문 또는 요약",
+            "evidence_source": {
+              "type": "text|figure|table",
+              "page": "페이지 번호 (예: 1)"
+            }
+          }
+        ],
+        "index_unit": "patient|icu_stay",
+        "first_stay_only": "Yes|No"
+      },
+      "diagnosis_criteria": {
+        "coding_system": "ICD-10|ICD-9",
+        "codes": ["코드 리스트"],
+        "evidence": "[Source] 인용 원문",
+        "evidence_source": {
+          "type": "text|figure|table",
+          "page": "페이지 번호"
+        }
+      }
+    },
+    "methods_summary": {
+      "structured_summary": {
+        "study_design_setting": "연구 설계",
+        "data_source": "데이터 원천",
+        "population_selection": "대상자 선정",
+        "variables": "주요 변수",
+        "outcomes": "결과 지표"
+      }
+    },
+    "variables": [
+      {
+        "signal_name": "변수명 (예: heart_rate)",
+        "description": "변동성 설명 (예: Heart rate measured hourly during ICU stay)"
+      }
+    ],
+    "ambiguities": [
+      {
+        "id": "amb_xxx",
+        "question": "모호한 기준 질문",
+        "options": ["옵션1", "옵션2"],
+        "default_policy": "require_user_choice"
+      }
+    ]
+  }
+}
+"""
+
+
+@lru_cache(maxsize=4)
+def _shared_openai_client(api_key: str | None) -> AsyncOpenAI:
+    # 요청마다 새 클라이언트를 만들면 httpx 풀 생성 + TLS 핸드셰이크가 반복되므로 서비스 인스턴스 간 공유
+    return AsyncOpenAI(api_key=api_key)
+
+
+@lru_cache(maxsize=16)
+def _prompt_hash(relax_mode: bool, deterministic: bool, schema_head: str) -> str:
+    # 실제 텍스트가 아닌 '지침(Instruction)' 부분만 취합하여 해싱
+    instructions = [
+        "당신은 세계 최고의 임상 연구 정보 추출 전문가입니다.",
+        "3. 엄격한 준수: 논문에 명시된 조건을 절대 변경하지 마세요." if not relax_mode else "3. 결과 보장: 조건을 유연하게 적용하세요.",
+        "Deterministic" if deterministic else "RAG-enabled",
+        schema_head,  # 스키마 일부 포함
+    ]
+    return hashlib.sha256("".join(instructions).encode("utf-8")).hexdigest()[:12]
+
+
+def _sha256_hexdigest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+# 동일한 Intent(정형화된 연구 템플릿 등)는 SQL 컴파일 결과를 재사용
+_SQL_COMPILE_CACHE_SIZE = 256
+_SQL_COMPILE_CACHE: dict[str, dict[str, Any]] = {}
+
+
 class PDFCohortService:
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = _shared_openai_client(os.getenv("OPENAI_API_KEY"))
         self.model = os.getenv("ENGINEER_MODEL", "gpt-4o")
         self.signal_map = {}
         self.signal_metadata = {}
@@ -626,66 +901,26 @@ class PDFCohortService:
         """Initialize signal maps by merging defaults with dynamic JSON metadata."""
         self.signal_map = DEFAULT_CORE_SIGNALS.copy()
         self.signal_metadata = DEFAULT_SIGNAL_METADATA.copy()
-        
-        try:
-            # 1. Try absolute path (Docker environment standard)
-            meta_path = "/app/var/metadata/mimic_rag_metadata_full.json"
-            
-            # 2. If not found, try relative path (Local development fallback)
-            if not os.path.exists(meta_path):
-                # backend/app/services/pdf_service.py -> backend/app/services -> backend/app -> backend -> root -> var
-                meta_path = os.path.join(os.path.dirname(__file__), "../../../../var/metadata/mimic_rag_metadata_full.json")
-            
-            if os.path.exists(meta_path):
-                with open(meta_path, "r", encoding="utf-8") as f:
-                    full_meta = json.load(f)
-                    
-                for item in full_meta:
-                    name = _normalize_signal_name(item.get("signal_name", ""))
-                    if not name:
-                        continue
-                    mapping = item.get("mapping", {})
-                    itemid = mapping.get("itemid")
-                    table = mapping.get("target_table", "").upper()
-                    
-                    if itemid and table:
-                        # Generate SQL Template
-                        sql = None
-                        if table == "CHARTEVENTS":
-                            sql = f"SELECT stay_id, charttime FROM SSO.CHARTEVENTS WHERE itemid IN ({itemid}) AND valuenum {{operator}} {{value}} AND valuenum IS NOT NULL"
-                        elif table == "LABEVENTS":
-                             # Lab items often need joining with D_LABITEMS for readable labels, but if itemID is known, direct query is faster.
-                             # However, to maintain compatibility with existing 'lab' template logic:
-                             sql = f"SELECT hadm_id, charttime FROM SSO.LABEVENTS WHERE itemid IN ({itemid}) AND valuenum {{operator}} {{value}} AND valuenum IS NOT NULL"
-                        
-                        if sql:
-                            self.signal_map[name] = sql
-                            # Also add synonyms
-                            for syn in item.get("synonyms", []):
-                                syn_key = _normalize_signal_name(syn)
-                                if not syn_key:
-                                    continue
-                                if syn_key not in self.signal_map: # Don't overwrite core signals
-                                    self.signal_map[syn_key] = sql
-
-                        # Update Metadata
-                        if name not in self.signal_metadata:
-                            self.signal_metadata[name] = {
-                                "target_table": table,
-                                "itemid": str(itemid)
-                            }
-                        for syn in item.get("synonyms", []):
-                            syn_key = _normalize_signal_name(syn)
-                            if not syn_key or syn_key in self.signal_metadata:
-                                continue
-                            self.signal_metadata[syn_key] = {
-                                "target_table": table,
-                                "itemid": str(itemid),
-                            }
-            else:
-                logger.warning(f"RAG Metadata file not found at {meta_path}. Using defaults only.")
-        except Exception as e:
-            logger.error(f"Failed to load RAG metadata: {e}. Using defaults.")
+        self._signal_metadata_keys = frozenset(self.signal_metadata)
+        self._signal_maps_source: tuple[str, int] | None = None
+
+        # 1. Try absolute path (Docker environment standard)
+        meta_path = "/app/var/metadata/mimic_rag_metadata_full.json"
+
+        # 2. If not found, try relative path (Local development fallback)
+        if not os.path.exists(meta_path):
+            # backend/app/services/pdf_service.py -> backend/app/services -> backend/app -> backend -> root -> var
+            meta_path = os.path.join(os.path.dirname(__file__), "../../../../var/metadata/mimic_rag_metadata_full.json")
+
+        mtime_ns = _mtime_ns(Path(meta_path))
+        if mtime_ns is None:
+            logger.warning(f"RAG Metadata file not found at {meta_path}. Using defaults only.")
+            return
+        signal_map, signal_metadata, signal_keys = _build_signal_maps(meta_path, mtime_ns)
+        self.signal_map = signal_map.copy()
+        self.signal_metadata = signal_metadata.copy()
+        self._signal_metadata_keys = signal_keys
+        self._signal_maps_source = (meta_path, mtime_ns)
 
     async def _extract_pdf_content_async(self, file_content: bytes) -> dict:
         """PDF 텍스트 및 자산(표, 이미지) 추출을 비동기로 실행"""
@@ -702,12 +937,6 @@ class PDFCohortService:
             logger.error("PDF 열기 실패: %s", traceback.format_exc())
             raise RuntimeError(f"PDF 파일을 열 수 없습니다: {e}") from e
 
-        triggers = [
-            'eligibility criteria', 'figure', 'flowchart', 'table', 
-            'inclusion', 'exclusion', 'missing data', '24 hours before discharge',
-            'study population', 'participant selection'
-        ]
-
         text_parts = []
         assets = {"figures": [], "tables": []}
         max_pages = min(_PDF_MAX_PAGES, len(doc))
@@ -722,8 +951,7 @@ class PDFCohortService:
                 text_parts.append(f"\n=== PAGE {page_no} ===\n{page_text}")
 
             # 키워드 기반 자산 추출 (비용 및 성능 최적화)
-            lower_text = page_text.lower()
-            if any(kw in lower_text for kw in triggers):
+            if _ASSET_TRIGGER_RE.search(page_text):
                 logger.info(f"Page {page_no}에서 트리거 키워드 감지. 자산 추출 시작.")
                 
                 # 표 추출
@@ -764,13 +992,18 @@ class PDFCohortService:
         # 1. 소문자화
         t = text.lower()
         # 2. [Page X, Block Y] 마커 및 페이지 구분자 제거
-        t = re.sub(r'\[page \d+, block \d+\]', '', t)
-        t = re.sub(r'=== page \d+ ===', '', t)
-        # 3. 특수문자 제거 (알파벳, 숫자, 한글만 남김)
-        t = re.sub(r'[^a-z0-9가-힣]', ' ', t)
-        # 4. 공백 통합
-        t = re.sub(r'\s+', ' ', t).strip()
-        return t
+        if "[page " in t:
+            t = _PAGE_MARKER_RE.sub('', t)
+        if "=== page " in t:
+            t = _PAGE_SEP_RE.sub('', t)
+        # 3. 특수문자 제거 (알파벳, 숫자, 한글만 남김) — 연속 구간은 한 번에 치환
+        t = _NONALNUM_HANGUL_RUN_RE.sub(' ', t)
+        # 4. 공백 통합 (3 이후 남은 공백은 ' '뿐)
+        return " ".join(t.split())
+
+    def _canonical_hash(self, text: str) -> str:
+        """정규화 + UTF-8 인코딩 + SHA-256을 한 번에 수행 (asyncio.to_thread용)"""
+        return _sha256_hexdigest(self._canonicalize_text(text).encode("utf-8"))
 
     def _build_focus_text(self, full_text: str) -> str:
         """조건 추출 정확도를 유지하면서 프롬프트 입력 길이를 줄이기 위한 핵심 문단 추출."""
@@ -807,8 +1040,7 @@ class PDFCohortService:
 
     def _split_text_by_pages(self, full_text: str) -> list[dict[str, Any]]:
         text = str(full_text or "")
-        marker_re = re.compile(r"===\s*PAGE\s+(\d+)\s*===\n?", re.IGNORECASE)
-        matches = list(marker_re.finditer(text))
+        matches = list(_PAGE_HEADER_RE.finditer(text))
         if not matches:
             return [{"page": 1, "text": text, "global_start": 0}]
 
@@ -1594,12 +1826,12 @@ CohortSpec:
                 }
             )
 
-        cols = _normalize_result_columns(db_result.get("columns", []))
+        has_identifier = _result_has_identifier(db_result.get("columns", []))
         add_invariant(
             "result_has_identifier",
-            _has_identifier_columns(cols),
+            has_identifier,
             "결과에 subject_id/hadm_id/stay_id 중 최소 1개 식별자 컬럼이 있어야 합니다.",
-            0 if _has_identifier_columns(cols) else 1,
+            0 if has_identifier else 1,
         )
 
         if population_policy.get("require_icu"):
@@ -1974,7 +2206,7 @@ CohortSpec:
         try:
             dv_path = meta_dir / "derived_variables.json"
             if dv_path.exists():
-                dv_data = json.loads(dv_path.read_text(encoding="utf-8"))
+                dv_data = _read_json_cached(dv_path)
                 defs = []
                 for dv in dv_data.get("derived_variables", []):
                     derived_name = str(dv.get("derived_name") or "").strip()
@@ -1995,7 +2227,7 @@ CohortSpec:
         try:
             cm_path = meta_dir / "cohort_comorbidity_specs.json"
             if cm_path.exists():
-                cm_data = json.loads(cm_path.read_text(encoding="utf-8"))
+                cm_data = _read_json_cached(cm_path)
                 specs = []
                 for cm in cm_data:
                     specs.append(f"- {cm['group_key']} ({cm['group_label']}): {cm.get('map_terms', [])}")
@@ -2007,7 +2239,7 @@ CohortSpec:
         try:
             pp_path = meta_dir / "sql_postprocess_schema_hints.json"
             if pp_path.exists():
-                pp_data = json.loads(pp_path.read_text(encoding="utf-8"))
+                pp_data = _read_json_cached(pp_path)
                 hints = []
                 for table, cols in pp_data.get("tables", {}).items():
                     hints.append(f"- {table}: {', '.join(cols)}")
@@ -2025,7 +2257,7 @@ CohortSpec:
                 
                 full_path = Path(full_path_str)
                 if full_path.exists():
-                    full_data = json.loads(full_path.read_text(encoding="utf-8"))
+                    full_data = _read_json_cached(full_path)
                     var_hints = []
                     
                     # Create a lookup set for efficiency (normalize names)
@@ -2056,96 +2288,15 @@ CohortSpec:
         if not deterministic:
             rag_context = f"\n## REFERENCE COHORT EXAMPLES (RAG)\n{_load_reference_cohorts()}\n"
 
-        prompt = f"""당신은 세계 최고의 임상 연구 정보 추출 전문가입니다.
-제공된 논문 텍스트와 추출된 시각적 자산(표, 그림 요약)에서 '코호트 선정 조건(Eligibility/Inclusion/Exclusion)'을 누락 없이 정밀하게 추출하세요.
-
+        # 고정 지시문을 앞에, 논문별 가변 입력(RAG 예시, 본문, 자산)을 끝에 두어 프롬프트 프리픽스 캐시가 적중하도록 구성
+        prompt = f"""{_EXTRACT_CONDITIONS_INSTRUCTIONS}
 {rag_context}
-
-[필수 요구사항]
-1. **신속 정확한 추출**: 긴 설명보다는 JSON 필드를 정확히 채우는 데 집중하세요.
-2. **시각적 정보 우선**: 텍스트와 표/그림의 수치가 다를 경우 표/그림(Flowchart)을 따르세요.
-3. **핵심 요약**: `summary_ko`와 `criteria_summary_ko`는 각각 3문장 내외로 핵심만 요약하세요. (속도 최적화)
-4. **논리적 분해**: 각 조건을 DB 필터링 로직 위주로 설명하세요.
-5. **임상 변수 추출**: 주요 수치형 임상 변수를 찾아 `variables` 리스트에 담고, 반드시 단위(Unit)를 함께 명시하세요.
-6. **모호성 표시**: first admission 기준(unit), ICD 버전, death time 필드가 불명확하면 `ambiguities`에 질문 형태로 추가하세요.
-
 ## 추출 대상 정보
 ### 1. TEXT CONTENT
 {full_text}
 
 ### 2. VISUAL ASSETS (TABLES & FIGURES)
 {assets_summary if assets_summary else "No additional assets extracted."}
-
-[주의 사항 (Medical Guardrails)]
-- **ICD 코드 변환**: 진단 조건이 나오면 질환명(Text)을 그대로 쓰지 말고, 반드시 상응하는 **ICD-9/10 코드(예: 850, 486)**를 찾아서 `variables`의 `codes` 파라미터에 배열로 담으세요. (예: `["850", "851"]`)
-- **임상적 상식**: SOFA 점수는 패혈증 진단 시 통상 **2점 이상**을 의미합니다. 문맥 없이 0점이나 비상식적인 수치를 추출하지 마세요. 불명확하면 `is_mandatory: false`로 설정하세요.
-- **원천 데이터 우선**: 복합 점수(SOFA, ROX)보다는 측정 가능한 원천 변수(혈압, 의식 수준, 호흡수) 추출에 집중하세요.
-
-## 출력 JSON 스키마
-{{
-  "cohort_definition": {{
-    "title": "논문 제목",
-    "description": "Short description (English)",
-    "summary_ko": "연구 요약 (핵심 3문장, 150~300자)",
-    "criteria_summary_ko": "선정/제외 기준 요약 (핵심 3문장, 150~300자)",
-    "extraction_details": {{
-      "study_context": {{
-        "data_source": "데이터 출처",
-        "database_version": "버전",
-        "study_period": "연구 기간",
-        "setting": "설정"
-      }},
-      "cohort_criteria": {{
-        "population": [
-          {{
-            "criterion": "선정/제외 기준 텍스트",
-            "type": "inclusion|exclusion",
-            "operational_definition": "DB 구현 로직 설명",
-            "evidence": "[Source] 인용 원문 또는 요약",
-            "evidence_source": {{
-              "type": "text|figure|table",
-              "page": "페이지 번호 (예: 1)"
-            }}
-          }}
-        ],
-        "index_unit": "patient|icu_stay",
-        "first_stay_only": "Yes|No"
-      }},
-      "diagnosis_criteria": {{
-        "coding_system": "ICD-10|ICD-9",
-        "codes": ["코드 리스트"],
-        "evidence": "[Source] 인용 원문",
-        "evidence_source": {{
-          "type": "text|figure|table",
-          "page": "페이지 번호"
-        }}
-      }}
-    }},
-    "methods_summary": {{
-      "structured_summary": {{
-        "study_design_setting": "연구 설계",
-        "data_source": "데이터 원천",
-        "population_selection": "대상자 선정",
-        "variables": "주요 변수",
-        "outcomes": "결과 지표"
-      }}
-    }},
-    "variables": [
-      {{
-        "signal_name": "변수명 (예: heart_rate)",
-        "description": "변동성 설명 (예: Heart rate measured hourly during ICU stay)"
-      }}
-    ],
-    "ambiguities": [
-      {{
-        "id": "amb_xxx",
-        "question": "모호한 기준 질문",
-        "options": ["옵션1", "옵션2"],
-        "default_policy": "require_user_choice"
-      }}
-    ]
-  }}
-}}
 """
         response = await self.client.chat.completions.create(
             model=self.model,
@@ -2309,8 +2460,6 @@ CohortSpec:
         deterministic: bool = True,
     ) -> dict:
         """2단계: 추출된 코호트 조건(JSON)을 바탕으로 'Intent JSON'을 생성하고 SQL로 컴파일"""
-        derived_meta = _load_metadata_json(_DERIVED_VAR_PATH, _DERIVED_VAR_LOCAL)
-        derived_names = [v.get("derived_name") for v in derived_meta.get("derived_variables", [])]
         intent: dict[str, Any]
         if accuracy_mode and isinstance(canonical_spec, dict):
             intent = self._canonical_spec_to_intent(canonical_spec)
@@ -2373,17 +2522,45 @@ COHORT JSON:
             # 필수 조건만 남기거나 범위를 넓히는 로직 (현재는 LLM 가이드에 is_optional 위임)
             logger.info("완화 모드 활성화됨: 선택적 조건 필터링 검토")
 
-        compiled = self.compile_oracle_sql(intent, population_policy=population_policy, schema_map=schema_map)
+        compiled = self._compile_oracle_sql_cached(intent, population_policy=population_policy, schema_map=schema_map)
         compiled["intent"] = intent
         return compiled
 
+    def _compile_oracle_sql_cached(
+        self,
+        intent: dict,
+        population_policy: dict[str, Any] | None = None,
+        schema_map: dict[str, Any] | None = None,
+    ) -> dict:
+        """compile_oracle_sql 결과를 정규화된 입력(Intent/정책/스키마/시그널 맵 출처) 해시로 캐싱"""
+        try:
+            payload = json.dumps(
+                [intent, population_policy, schema_map, self._signal_maps_source],
+                ensure_ascii=False,
+                sort_keys=True,
+                separators=(",", ":"),
+                default=str,
+            )
+        except (TypeError, ValueError):
+            return self.compile_oracle_sql(intent, population_policy=population_policy, schema_map=schema_map)
+        cache_key = hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+        cached = _SQL_COMPILE_CACHE.get(cache_key)
+        if cached is None:
+            cached = self.compile_oracle_sql(intent, population_policy=population_policy, schema_map=schema_map)
+            if len(_SQL_COMPILE_CACHE) >= _SQL_COMPILE_CACHE_SIZE:
+                _SQL_COMPILE_CACHE.pop(next(iter(_SQL_COMPILE_CACHE)))
+            _SQL_COMPILE_CACHE[cache_key] = cached
+        # 호출자가 결과 dict에 intent 등을 추가하므로 캐시 항목은 복사해서 반환
+        compiled = dict(cached)
+        compiled["warning"] = list(cached.get("warning") or [])
+        return compiled
+
     def _get_best_join_key(self, s_type, s_params) -> str:
         """가이드라인 3: 테이블 성격에 맞는 최적의 조인 키 선택"""
         # [Hospital Level Tables] -> hadm_id 사용
         # lab, diagnosis, prescription, microbiology, inputevents(일부), admissions
-        hospital_tables = ["lab", "diagnosis", "prescription", "microbiology", "admissions", "procedures"]
-        
-        if s_type in hospital_tables:
+        if s_type in _HOSPITAL_LEVEL_STEP_TYPES:
             return "hadm_id"
             
         # [Stay Level Tables] -> stay_id 사용 (기본값)
@@ -2391,8 +2568,8 @@ COHORT JSON:
         return "stay_id"
 
     def _sanitize_step_slug(self, value: Any) -> str:
-        slug = re.sub(r"[^a-z0-9_]+", "_", str(value or "").strip().lower())
-        slug = re.sub(r"_+", "_", slug).strip("_")
+        slug = _SLUG_RE.sub("_", str(value or "").strip().lower())
+        slug = _SLUG_COLLAPSE_RE.sub("_", slug).strip("_")
         return slug or "unknown"
 
     def _pick_first_text(self, value: Any) -> str:
@@ -2430,13 +2607,7 @@ COHORT JSON:
         window = self._pick_first_text(raw_window)
         if not window:
             return ""
-        aliases = {
-            "first_24h": "icu_first_24h",
-            "icu_24h": "icu_first_24h",
-            "admission_24h": "admission_first_24h",
-            "pre_discharge_24h": "icu_discharge_last_24h",
-        }
-        normalized = aliases.get(window, window)
+        normalized = _WINDOW_KEY_ALIASES.get(window, window)
         if normalized in WINDOW_TEMPLATES:
             return normalized
         return ""
@@ -2587,9 +2758,9 @@ COHORT JSON:
             operator = "="
         safe["operator"] = operator
 
-        safe["drug"] = re.sub(r"[\"'`]", "", str(safe.get("drug") or "").strip())
+        safe["drug"] = _QUOTE_CHARS_RE.sub("", str(safe.get("drug") or "").strip())
         safe["gender"] = str(safe.get("gender") or "all").strip().lower() or "all"
-        safe["label"] = re.sub(r"[\"'`]", "", str(safe.get("label") or "").strip())
+        safe["label"] = _QUOTE_CHARS_RE.sub("", str(safe.get("label") or "").strip())
         if not isinstance(safe.get("signals"), list):
             picked = self._pick_first_text(safe.get("signals"))
             safe["signals"] = [picked] if picked else []
@@ -2634,7 +2805,7 @@ COHORT JSON:
                 text = value.strip()
                 if not text:
                     return []
-                parts = re.split(r"[,/|]+", text)
+                parts = _GENDER_SPLIT_RE.split(text)
                 return [p.strip() for p in parts if p and p.strip()]
             if isinstance(value, (list, tuple, set)):
                 out: list[str] = []
@@ -2647,7 +2818,7 @@ COHORT JSON:
 
         normalized_codes: set[str] = set()
         for token in _flatten(raw_gender):
-            key = re.sub(r"[^a-zA-Z0-9가-힣]+", "_", token.strip().lower()).strip("_")
+            key = _GENDER_TOKEN_RE.sub("_", token.strip().lower()).strip("_")
             if key in broad_tokens:
                 continue
             if key in male_tokens:
@@ -2668,13 +2839,13 @@ COHORT JSON:
 
     def _extract_select_keys(self, sql: str) -> set[str]:
         sql_text = str(sql or "")
-        m = re.search(r"select\s+(.*?)\s+from\b", sql_text, flags=re.IGNORECASE | re.DOTALL)
+        m = _SELECT_LIST_RE.search(sql_text)
         select_part = m.group(1).lower() if m else sql_text.lower()
         if "*" in select_part:
             return {"subject_id", "hadm_id", "stay_id"}
         available: set[str] = set()
-        for key in ("subject_id", "hadm_id", "stay_id"):
-            if re.search(rf"\b{key}\b", select_part):
+        for key, key_re in _SELECT_KEY_RES.items():
+            if key_re.search(select_part):
                 available.add(key)
         return available
 
@@ -2748,7 +2919,8 @@ COHORT JSON:
             signal_name: str,
         ) -> str | None:
             try:
-                return str(template).format(**params)
+                # format_map은 **params처럼 step마다 kwargs dict를 새로 만들지 않음
+                return str(template).format_map(params)
             except (KeyError, ValueError, IndexError) as exc:
                 logger.warning(
                     "Step '%s': SQL template render failed for '%s' (%s). Skipping step.",
@@ -3002,6 +3174,12 @@ WHERE {filter_clause}"""
                             continue
                 elif s_type == "diagnosis":
                     raw_codes = s_params.get("codes", [])
+                    if not raw_codes:
+                        logger.warning(
+                            "Step '%s': diagnosis codes are empty. Skipping step to avoid invalid IN () SQL.",
+                            s_name,
+                        )
+                        continue
                     if isinstance(raw_codes, list):
                         code_candidates: list[Any] = []
                         stack = list(raw_codes)
@@ -3012,12 +3190,12 @@ WHERE {filter_clause}"""
                             else:
                                 code_candidates.append(item)
                     else:
-                        raw_text = str(raw_codes or "")
+                        raw_text = str(raw_codes)
                         code_candidates = raw_text.split(",") if "," in raw_text else [raw_text]
 
                     cleaned_codes: list[str] = []
                     for code in code_candidates:
-                        normalized = re.sub(r"[^A-Za-z0-9]+", "", str(code or "")).upper().strip()
+                        normalized = _CODE_CLEAN_RE.sub("", str(code or "")).upper().strip()
                         if normalized and normalized not in cleaned_codes:
                             cleaned_codes.append(normalized)
 
@@ -3086,11 +3264,10 @@ WHERE {filter_clause}"""
             condition_parts = [f"s.{join_key} = p.{join_key}"]
             
             # 시간 정보(charttime)가 있는 경우에만 윈도우 필터 적용 (가드 로직)
+            # window_key는 _normalize_window_key에서 이미 WINDOW_TEMPLATES 키로 검증됨
             if window_key:
-                if "charttime" in signal_sql.lower():
-                    window_template = WINDOW_TEMPLATES.get(window_key)
-                    if window_template:
-                        condition_parts.append(window_template)
+                if _CHARTTIME_RE.search(signal_sql):
+                    condition_parts.append(WINDOW_TEMPLATES[window_key])
                 else:
                     logger.info(f"Step '{s_name}' skipped window filter: No 'charttime' in SQL.")
             
@@ -3108,19 +3285,19 @@ WHERE {operator_exists} (
             current_prev = s_name
 
         # 최종 쿼리 조립
-        cte_str = ",\n".join(ctes)
-        
-        cohort_sql = f"WITH {cte_str}\nSELECT * FROM {current_prev} FETCH FIRST 100 ROWS ONLY"
-        count_sql = f"WITH {cte_str}\nSELECT count(*) as patient_count FROM {current_prev}"
-        
+        # WITH 절은 한 번만 만들고 세 쿼리가 공유
+        with_clause = "WITH " + ",\n".join(ctes) + "\n"
+
+        cohort_sql = with_clause + f"SELECT * FROM {current_prev} FETCH FIRST 100 ROWS ONLY"
+        count_sql = with_clause + f"SELECT count(*) as patient_count FROM {current_prev}"
+
         # Funnel SQL (Step Counts)
-        debug_parts = []
-        for label, cte_ref in zip(step_labels, step_refs):
-            safe_label = str(label or "").replace("'", "''")
-            debug_parts.append(f"SELECT '{safe_label}' as step_name, count(*) as cnt FROM {cte_ref}")
+        debug_parts = [
+            "SELECT '" + str(label or "").replace("'", "''") + "' as step_name, count(*) as cnt FROM " + cte_ref
+            for label, cte_ref in zip(step_labels, step_refs)
+        ]
         debug_parts.append(f"SELECT 'Final Cohort' as step_name, count(*) as cnt FROM {current_prev}")
-        
-        debug_count_sql = f"WITH {cte_str}\n" + " UNION ALL ".join(debug_parts)
+        debug_count_sql = with_clause + " UNION ALL ".join(debug_parts)
 
         return {
             "cohort_sql": cohort_sql,
@@ -3158,9 +3335,9 @@ WHERE {operator_exists} (
             
             # 3. 근접 매칭 (퍼지) - 단순 구현
             if not mapping:
-                matches = get_close_matches(signal_name, self.signal_metadata.keys(), n=1, cutoff=0.7)
-                if matches:
-                    mapping = self.signal_metadata[matches[0]]
+                matched_name = _closest_signal_name(signal_name, self._signal_metadata_keys)
+                if matched_name:
+                    mapping = self.signal_metadata[matched_name]
 
             if mapping:
                 v["mapping"] = {
@@ -3186,7 +3363,7 @@ WHERE {operator_exists} (
 
     def _build_features(self, mapped_variables: list[dict[str, Any]]) -> list[dict[str, Any]]:
         """프론트엔드 배너/카드용 features 배열 생성 및 정렬"""
-        features: list[dict[str, Any]] = []
+        keyed: list[tuple[tuple[int, str, str, str], dict[str, Any]]] = []
         for item in mapped_variables:
             if not isinstance(item, dict):
                 continue
@@ -3199,34 +3376,28 @@ WHERE {operator_exists} (
             mapping = item.get("mapping") if isinstance(item.get("mapping"), dict) else {}
             table_name = str(mapping.get("target_table") or "Unknown").strip() or "Unknown"
             item_id = str(mapping.get("itemid") or "N/A").strip() or "N/A"
-            features.append({
+            # 정렬 키는 이미 정리된 값으로 행을 만들 때 한 번만 계산
+            table_lower = table_name.lower()
+            sort_key = (
+                1 if table_lower in {"", "unknown", "n/a"} else 0,
+                table_lower,
+                signal_name.lower(),
+                item_id.lower(),
+            )
+            keyed.append((sort_key, {
                 "name": signal_name,
                 "description": description,
                 "table_name": table_name,
                 "itemid": item_id,
-            })
+            }))
 
-        features.sort(
-            key=lambda row: (
-                1 if str(row.get("table_name") or "").lower() in {"", "unknown", "n/a"} else 0,
-                str(row.get("table_name") or "").lower(),
-                str(row.get("name") or "").lower(),
-                str(row.get("itemid") or "").lower(),
-            )
-        )
-        return features
+        keyed.sort(key=itemgetter(0))
+        return [row for _, row in keyed]
 
 
     def _calculate_prompt_hash(self, relax_mode: bool, deterministic: bool) -> str:
         """프롬프트 지시문의 해시를 계산하여 로직 변경 여부를 추적"""
-        # 실제 텍스트가 아닌 '지침(Instruction)' 부분만 취합하여 해싱
-        instructions = [
-            "당신은 세계 최고의 임상 연구 정보 추출 전문가입니다.",
-            "3. 엄격한 준수: 논문에 명시된 조건을 절대 변경하지 마세요." if not relax_mode else "3. 결과 보장: 조건을 유연하게 적용하세요.",
-            "Deterministic" if deterministic else "RAG-enabled",
-            _load_schema_for_prompt()[:100] # 스키마 일부 포함
-        ]
-        return hashlib.sha256("".join(instructions).encode("utf-8")).hexdigest()[:12]
+        return _prompt_hash(relax_mode, deterministic, _load_schema_for_prompt()[:100])
 
     async def verify_sql_integrity(self, sql: str) -> tuple[bool, str]:
         """가이드라인 5: schema_catalog 기반 사후 검증"""
@@ -3237,7 +3408,7 @@ WHERE {operator_exists} (
         tables_meta = catalog.get("tables", {})
         
         # 간단한 정규식으로 사용하는 테이블명 추출 (SSO.TABLE_NAME)
-        found_tables = re.findall(r'SSO\.([A-Za-z0-9_]+)', sql.upper())
+        found_tables = _SSO_TABLE_RE.findall(sql.upper())
         for tname in set(found_tables):
             if tname not in tables_meta:
                 return False, f"Table '{tname}' does not exist in schema_catalog."
@@ -3263,8 +3434,7 @@ WHERE {operator_exists} (
         row_count = int(db_result.get("row_count") or 0)
         if row_count <= 0:
             return True
-        cols = _normalize_result_columns(db_result.get("columns", []))
-        if not _has_identifier_columns(cols):
+        if not _result_has_identifier(db_result.get("columns", [])):
             return True
         return False
 
@@ -3287,7 +3457,9 @@ WHERE {operator_exists} (
         # Bump cache version when SQL assembly logic changes to avoid stale results.
         pipeline_version = "v59"
         accuracy_on = _PDF_ACCURACY_MODE_DEFAULT if accuracy_mode is None else bool(accuracy_mode)
-        file_hash = hashlib.sha256(file_content).hexdigest()
+        import asyncio
+        # 수 MB PDF 해싱이 이벤트 루프를 막지 않도록 스레드에서 수행 (hashlib은 GIL 해제)
+        file_hash = await asyncio.to_thread(_sha256_hexdigest, file_content)
         model_name = self.model
         prompt_hash = self._calculate_prompt_hash(relax_mode, deterministic)
         
@@ -3316,7 +3488,6 @@ WHERE {operator_exists} (
 
         # 0 & 1-3. 병렬 처리 시작: 텍스트 추출과 시각적 자산 요약을 동시에 대기
         logger.info("병렬 작업 시작: 텍스트 추출 및 자산 요약 대기")
-        import asyncio
         
         # 0. 텍스트 및 자산 기본 추출 (File IO/Parsing)
         extracted_task = self._extract_pdf_content_async(file_content)
@@ -3332,8 +3503,7 @@ WHERE {operator_exists} (
         page_count = int(extracted.get("page_count") or 0)
         pages_scanned = int(extracted.get("pages_scanned") or 0)
         
-        canonical_text = self._canonicalize_text(full_text)
-        canonical_hash = hashlib.sha256(canonical_text.encode("utf-8")).hexdigest()
+        canonical_hash = await asyncio.to_thread(self._canonical_hash, full_text)
 
         # 1-2. Secondary Cache 확인 (Canonical Hash 기반 - reuse_existing=True일 때만)
         if store and reuse_existing:
@@ -3373,15 +3543,19 @@ WHERE {operator_exists} (
         )
 
         # 1단계: 코호트 조건 추출
+        # 근거 스니펫 추출은 LLM 결과와 무관한 CPU 작업이므로 조건 추출 호출을 기다리는 동안 스레드에서 수행
         logger.info(f"1단계: 코호트 조건 추출 시작 (Deterministic: {deterministic})")
-        conditions = await self._extract_conditions(
-            focused_text,
-            assets_summary=assets_summary,
-            deterministic=deterministic,
-        )
-        adaptive_extract = run_adaptive_extraction(
-            focused_text,
-            start_level="fast",
+        conditions, adaptive_extract = await asyncio.gather(
+            self._extract_conditions(
+                focused_text,
+                assets_summary=assets_summary,
+                deterministic=deterministic,
+            ),
+            asyncio.to_thread(
+                run_adaptive_extraction,
+                focused_text,
+                start_level="fast",
+            ),
         )
         snippets = adaptive_extract.get("snippets") if isinstance(adaptive_extract.get("snippets"), list) else []
         adaptive_level = str(adaptive_extract.get("level") or "fast")
@@ -3629,7 +3803,7 @@ WHERE {operator_exists} (
                 # 대량 데이터 처리를 위한 Parallel 힌트 강제 삽입 (Oracle 최적화)
                 if "SELECT" in sql and "/*+" not in sql:
                     sql = sql.replace("SELECT", "SELECT /*+ PARALLEL(4) */", 1)
-                sql = re.sub(r'"([A-Za-z_]+)"', r'\1', sql)
+                sql = _QUOTED_IDENT_RE.sub(r'\1', sql)
                 sql_result[key] = sql
 
         # 3.5 SQL Integrity Verification (Guideline 5)
@@ -4087,7 +4261,7 @@ WHERE {operator_exists} (
             )
             data = json.loads(response.choices[0].message.content)
             fixed = str(data.get("fixed_sql", "")).strip().rstrip(";").replace("`", "")
-            fixed = re.sub(r'"([A-Za-z_]+)"', r'\1', fixed)
+            fixed = _QUOTED_IDENT_RE.sub(r'\1', fixed)
             logger.info("SQL 자동수정 완료: %s", fixed[:200])
             return fixed
         except Exception as e:
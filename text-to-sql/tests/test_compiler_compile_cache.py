@@ -0,0 +1,50 @@
+from app.services import pdf_service
+from app.services.pdf_service import PDFCohortService
+
+
+def _counting_service():
+    svc = PDFCohortService()
+    calls = []
+    original = svc.compile_oracle_sql
+
+    def _compile(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    svc.compile_oracle_sql = _compile
+    return svc, calls
+
+
+def test_compile_cache_hit_returns_equal_sql_and_isolated_copies():
+    pdf_service._SQL_COMPILE_CACHE.clear()
+    svc, calls = _counting_service()
+    intent = {
+        "steps": [
+            {"name": "MI", "type": "diagnosis", "params": {"codes": ["I21"], "icd_version": 10}, "is_exclusion": False}
+        ]
+    }
+    policy = {"accuracy_mode": True}
+
+    first = svc._compile_oracle_sql_cached(intent, population_policy=policy, schema_map={})
+    assert first["warning"]
+    first["warning"].append("mutated")
+    first["intent"] = {"steps": []}
+
+    second = svc._compile_oracle_sql_cached(intent, population_policy=policy, schema_map={})
+    assert len(calls) == 1
+    assert second["cohort_sql"] == first["cohort_sql"]
+    assert second["count_sql"] == first["count_sql"]
+    assert second["debug_count_sql"] == first["debug_count_sql"]
+    assert "mutated" not in second["warning"]
+    assert "intent" not in second
+
+
+def test_compile_cache_misses_on_different_population_policy():
+    pdf_service._SQL_COMPILE_CACHE.clear()
+    svc, calls = _counting_service()
+    intent = {"steps": []}
+
+    relaxed = svc._compile_oracle_sql_cached(intent, population_policy={"require_icu": False}, schema_map={})
+    strict = svc._compile_oracle_sql_cached(intent, population_policy={"require_icu": True}, schema_map={})
+    assert len(calls) == 2
+    assert relaxed["cohort_sql"] != strict["cohort_sql"]
@@ -0,0 +1,29 @@
+import json
+
+from app.services.logging_store import store
+
+
+def test_append_event_reopens_rotated_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "_get_event_collection", lambda: None)
+    log_path = tmp_path / "events.jsonl"
+    rotated_path = tmp_path / "events.jsonl.1"
+
+    store.append_event(str(log_path), {"type": "before", "ts": 1})
+    log_path.rename(rotated_path)
+    store.append_event(str(log_path), {"type": "after", "ts": 2})
+    store._close_fds()
+
+    assert [json.loads(line)["type"] for line in rotated_path.read_text().splitlines()] == ["before"]
+    assert [json.loads(line)["type"] for line in log_path.read_text().splitlines()] == ["after"]
+
+
+def test_append_event_recreates_deleted_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "_get_event_collection", lambda: None)
+    log_path = tmp_path / "events.jsonl"
+
+    store.append_event(str(log_path), {"type": "before", "ts": 1})
+    log_path.unlink()
+    store.append_event(str(log_path), {"type": "after", "ts": 2})
+    store._close_fds()
+
+    assert store.read_events(str(log_path)) == [{"type": "after", "ts": 2}]
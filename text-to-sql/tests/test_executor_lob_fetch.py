@@ -0,0 +1,32 @@
+from types import SimpleNamespace
+
+import oracledb
+
+from app.services.oracle.executor import _fetch_lobs_as_values
+
+
+class _StubCursor:
+    arraysize = 500
+
+    def var(self, type_code, arraysize):
+        return (type_code, arraysize)
+
+
+def _handle(type_code):
+    return _fetch_lobs_as_values(_StubCursor(), SimpleNamespace(type_code=type_code))
+
+
+def test_clob_is_fetched_as_long():
+    assert _handle(oracledb.DB_TYPE_CLOB) == (oracledb.DB_TYPE_LONG, 500)
+
+
+def test_nclob_is_fetched_as_long_nvarchar():
+    assert _handle(oracledb.DB_TYPE_NCLOB) == (oracledb.DB_TYPE_LONG_NVARCHAR, 500)
+
+
+def test_blob_is_fetched_as_long_raw():
+    assert _handle(oracledb.DB_TYPE_BLOB) == (oracledb.DB_TYPE_LONG_RAW, 500)
+
+
+def test_other_types_use_driver_default():
+    assert _handle(oracledb.DB_TYPE_VARCHAR) is None
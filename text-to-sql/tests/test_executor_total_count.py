@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.oracle import executor
+
+
+class _StubCursor:
+    def __init__(self, conn):
+        self._conn = conn
+        self._rows = []
+        self.description = None
+
+    def execute(self, sql):
+        self._conn.executed.append(sql)
+        if "COUNT(*) OVER ()" in sql:
+            if self._conn.window_error:
+                raise Exception(self._conn.window_error)
+            self.description = [("ID",), ("__TOTAL_COUNT__",)]
+            self._rows = [(1, 2), (2, 2)]
+        elif sql.startswith("SELECT COUNT(*) FROM"):
+            self.description = [("COUNT(*)",)]
+            self._rows = [(2,)]
+        else:
+            self.description = [("ID",)]
+            self._rows = [(1,), (2,)]
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchmany(self, size):
+        return self._rows[:size]
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def close(self):
+        pass
+
+
+class _StubConnection:
+    def __init__(self, *, window_error=None):
+        self.window_error = window_error
+        self.executed = []
+        self.current_schema = ""
+        self.call_timeout = 0
+
+    def cursor(self):
+        return _StubCursor(self)
+
+    def close(self):
+        pass
+
+
+def _run(monkeypatch, sql, conn):
+    settings = SimpleNamespace(
+        db_precount_enabled=True,
+        row_cap=100,
+        db_fetch_array_size=1000,
+        oracle_default_schema="",
+    )
+    monkeypatch.setattr(executor, "get_settings", lambda: settings)
+    monkeypatch.setattr(executor, "load_connection_settings", lambda: {})
+    monkeypatch.setattr(executor, "acquire_connection", lambda **_: conn)
+    monkeypatch.setattr(executor, "_load_metadata_owner", lambda: "")
+    return executor.execute_sql(sql, db_call_timeout_ms=5_000)
+
+
+def test_unordered_query_gets_total_from_window_column(monkeypatch):
+    conn = _StubConnection()
+    result = _run(monkeypatch, "SELECT id FROM t", conn)
+    assert len(conn.executed) == 1
+    assert "COUNT(*) OVER ()" in conn.executed[0]
+    assert result["columns"] == ["ID"]
+    assert result["rows"] == [(1,), (2,)]
+    assert result["total_count"] == 2
+
+
+def test_duplicate_column_window_failure_falls_back_to_plain_query(monkeypatch):
+    conn = _StubConnection(window_error="ORA-00918: column ambiguously defined")
+    result = _run(monkeypatch, "SELECT id FROM t", conn)
+    assert len(conn.executed) == 2
+    assert conn.executed[-1] == "SELECT id FROM t"
+    assert result["rows"] == [(1,), (2,)]
+    assert result["total_count"] is None
+
+
+def test_window_timeout_is_raised_without_retry(monkeypatch):
+    conn = _StubConnection(window_error="DPY-4024: call timeout of 5000 ms exceeded")
+    with pytest.raises(HTTPException) as excinfo:
+        _run(monkeypatch, "SELECT id FROM t", conn)
+    assert "CLIENT_TIMEOUT" in str(excinfo.value.detail)
+    assert len(conn.executed) == 1
+
+
+def test_ordered_query_uses_separate_count(monkeypatch):
+    conn = _StubConnection()
+    sql = "SELECT * FROM (SELECT id FROM t ORDER BY id DESC) WHERE ROWNUM <= 10"
+    result = _run(monkeypatch, sql, conn)
+    assert all("COUNT(*) OVER ()" not in executed for executed in conn.executed)
+    assert conn.executed == [f"SELECT COUNT(*) FROM ({sql})", sql]
+    assert result["total_count"] == 2
@@ -0,0 +1,63 @@
+from app.services.agents import sql_postprocess
+from app.services.agents.sql_postprocess import (
+    _postprocess_dependency_key,
+    _postprocess_sql_impl,
+    postprocess_sql,
+)
+
+
+def test_memo_hit_matches_uncached_result_and_returns_fresh_rules():
+    question = "Top 10 input event items by total amount"
+    sql = "SELECT GENDER, COUNT(*) FROM PATIENTS BY GENDER"
+    expected_sql, expected_rules = _postprocess_sql_impl.__wrapped__(
+        question, sql, "auto", _postprocess_dependency_key()
+    )
+
+    postprocess_sql.cache_clear()
+    first_sql, first_rules = postprocess_sql(question, sql)
+    first_rules.append("mutated")
+    second_sql, second_rules = postprocess_sql(question, sql)
+
+    assert _postprocess_sql_impl.cache_info().hits == 1
+    assert first_sql == second_sql == expected_sql
+    assert second_rules == list(expected_rules)
+
+
+def test_memo_misses_when_dependency_key_changes(monkeypatch):
+    question = "List patients"
+    sql = "SELECT SUBJECT_ID FROM PATIENTS"
+    postprocess_sql.cache_clear()
+
+    monkeypatch.setattr(sql_postprocess, "_postprocess_dependency_key", lambda: (1.0,))
+    postprocess_sql(question, sql)
+    monkeypatch.setattr(sql_postprocess, "_postprocess_dependency_key", lambda: (2.0,))
+    postprocess_sql(question, sql)
+
+    info = _postprocess_sql_impl.cache_info()
+    assert info.hits == 0
+    assert info.misses == 2
+
+
+def test_trailing_semicolon_gives_same_result_for_plain_select():
+    postprocess_sql.cache_clear()
+    question = "List patients"
+    plain = postprocess_sql(question, "SELECT SUBJECT_ID FROM PATIENTS")
+    with_semicolon = postprocess_sql(question, "SELECT SUBJECT_ID FROM PATIENTS;")
+    assert plain == with_semicolon
+
+
+def test_memo_does_not_share_entries_across_trailing_semicolon():
+    question = "Top 10 input event items by total amount"
+    sql = "SELECT GENDER, COUNT(*) FROM PATIENTS BY GENDER"
+
+    # Reference result computed without the memo.
+    expected_sql, expected_rules = _postprocess_sql_impl.__wrapped__(
+        question, sql + ";", "auto", _postprocess_dependency_key()
+    )
+
+    postprocess_sql.cache_clear()
+    postprocess_sql(question, sql)
+    memo_sql, memo_rules = postprocess_sql(question, sql + ";")
+
+    assert memo_sql == expected_sql
+    assert memo_rules == list(expected_rules)